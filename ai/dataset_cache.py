@@ -0,0 +1,242 @@
+"""
+Columnar dataset cache
+CSV kaynaklarını ve veritabanı tablosu çıkarımlarını bir kez tipli, kategorik-encode
+edilmiş kolonsal bir dosyaya çevirir ve sonraki çalıştırmalarda memory-mapped olarak
+yalnızca gereken kolonları yükler.
+
+Anahtarlar:
+- CSV: kaynak içeriğinin sha256 hash'i
+- tablo: bağlantı adresi (parolasız) + tablo + kolonlar + satır sayısı; satır sayısını
+  değiştirmeyen UPDATE'ler fark edilmez (eğitim tabloları toplu yüklenir)
+
+Format:
+- pyarrow kuruluysa: sıkıştırmasız, tek parçalı Arrow IPC (Feather v2) dosyası -> <ad>-<hash>-<hash>.arrow
+- değilse: kolon başına bir .npy dosyası + meta.json içeren klasör -> <ad>-<hash>-<hash>.npcols
+
+Sayısal kolonlar (null içermeyenler) dosyaya bakan salt-okunur görünümler olarak yüklenir,
+kopyalanmaz; kategorik kolonların kodları ve kategori listesi belleğe kopyalanır.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from streaming_loader import DEFAULT_DATABASE_URL, stream_crop_data
+
+try:
+    import fcntl
+except ImportError:  # Windows - index.json güncellemesi kilitsiz yapılır
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow opsiyonel - numpy formatına düşülür
+    pa = None
+    feather = None
+
+DEFAULT_CACHE_DIR = os.getenv(
+    'DATASET_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dataset_cache')
+)
+
+# Bu orandan az benzersiz değere sahip metin kolonları 'category' olarak saklanır
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def source_hash(path, chunk_size=1024 * 1024):
+    """Kaynak dosyanın içeriğinden sha256 hash üretir (parça parça okunur)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_index(index_path):
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_index(cache_dir, key, entry):
+    """index.json'a tek girdi ekler; paralel eğitimler birbirinin girdisini ezmesin diye kilit altında"""
+    index_path = os.path.join(cache_dir, 'index.json')
+    with open(os.path.join(cache_dir, 'index.lock'), 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        index = _read_index(index_path)
+        index[key] = entry
+        tmp_path = f"{index_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+
+
+def _cached_source_hash(source_path, cache_dir):
+    """Dosya boyutu/mtime değişmediyse hash'i yeniden hesaplamadan index'ten döndürür"""
+    stat = os.stat(source_path)
+    key = os.path.abspath(source_path)
+    entry = _read_index(os.path.join(cache_dir, 'index.json')).get(key)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    digest = source_hash(source_path)
+    _update_index(cache_dir, key, {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest})
+    return digest
+
+
+def _short_hash(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def _cache_stem(source_path):
+    """Dosya adı + tam yolun kısa hash'i: farklı klasörlerdeki aynı adlı kaynaklar çakışmaz"""
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return f"{name}-{_short_hash(os.path.abspath(source_path))[:8]}"
+
+
+def _cache_path(stem, digest, cache_dir):
+    extension = '.arrow' if feather is not None else '.npcols'
+    return os.path.join(cache_dir, f"{stem}-{digest[:16]}{extension}")
+
+
+def optimize_dtypes(df):
+    """Sayısalları küçült (float32 / en küçük int), tekrar eden metinleri 'category' yap"""
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_float_dtype(series):
+            df[col] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+        elif series.dtype == object and series.nunique(dropna=False) <= CATEGORY_MAX_UNIQUE_RATIO * max(len(series), 1):
+            df[col] = series.astype('category')
+    return df
+
+
+def _write_npcols(df, path):
+    os.makedirs(path)
+    meta = {'rows': len(df), 'columns': {}}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if series.dtype == object:
+            # object dizileri mmap ile açılamaz; benzersiz değer sayısı yüksek olsa da kodlarla sakla
+            series = series.astype('category')
+        file_name = f"{i}.npy"
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(path, file_name), series.cat.codes.to_numpy())
+            meta['columns'][col] = {'file': file_name, 'categories': series.cat.categories.tolist()}
+        else:
+            np.save(os.path.join(path, file_name), series.to_numpy())
+            meta['columns'][col] = {'file': file_name}
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def _read_npcols(path, columns):
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    data = {}
+    for col in columns:
+        info = meta['columns'][col]
+        values = np.load(os.path.join(path, info['file']), mmap_mode='r')
+        if 'categories' in info:
+            data[col] = pd.Categorical.from_codes(values, categories=info['categories'])
+        else:
+            data[col] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def _store(df, path, stem, cache_dir):
+    """DataFrame'i cache dosyasına yazar ve aynı kaynağın eski sürümlerini siler"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if feather is not None:
+        # Tek record batch: okurken kolonlar parçalı (chunked) olmaz, kopyasız görünüm mümkün olur
+        feather.write_feather(df, tmp_path, compression='uncompressed', chunksize=max(len(df), 1))
+    else:
+        _write_npcols(df, tmp_path)
+    os.replace(tmp_path, path)
+
+    pattern = re.compile(rf"^{re.escape(stem)}-[0-9a-f]{{16}}\.(arrow|npcols)$")
+    for name in os.listdir(cache_dir):
+        old = os.path.join(cache_dir, name)
+        if pattern.match(name) and old != path:
+            shutil.rmtree(old) if os.path.isdir(old) else os.remove(old)
+
+
+def _load(path, columns):
+    """Cache dosyasından istenen kolonları yükler (kaynakta olmayanlar atlanır)"""
+    if feather is not None:
+        available = pa.ipc.open_file(pa.memory_map(path)).schema.names
+        selected = [c for c in columns if c in available] if columns else available
+        table = feather.read_table(path, columns=selected, memory_map=True)
+        # split_blocks: kolonlar tek bloğa birleştirilmez, sayısallar mmap'e bakan görünüm kalır
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        available = list(json.load(f)['columns'])
+    selected = [c for c in columns if c in available] if columns else available
+    return _read_npcols(path, selected)
+
+
+def build_cache(source_path, cache_dir=None):
+    """Kaynağı kolonsal cache dosyasına çevirir (varsa yeniden kullanır) ve yolunu döndürür"""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = _cache_stem(source_path)
+    path = _cache_path(stem, _cached_source_hash(source_path, cache_dir), cache_dir)
+    if os.path.exists(path):
+        return path
+
+    start = time.perf_counter()
+    df = optimize_dtypes(pd.read_csv(source_path))
+    _store(df, path, stem, cache_dir)
+    print(f"[INFO] Kolonsal cache oluşturuldu: {path} ({len(df)} satır, {time.perf_counter() - start:.1f} sn)")
+    return path
+
+
+def load_dataset(source_path, columns=None, cache_dir=None):
+    """Veri setini cache üzerinden yükler; yalnızca istenen kolonlar memory-mapped okunur
+    
+    Kaynakta bulunmayan kolonlar sessizce atlanır (eksik kolon kontrolü çağırana aittir).
+    """
+    return _load(build_cache(source_path, cache_dir), columns)
+
+
+def load_table(table_name, numeric_columns, categorical_columns, target='crop', database_url=None,
+               cache_dir=None):
+    """Veritabanı tablosunu cache üzerinden yükler (stream_crop_data çıkarımı, float32/category)
+
+    Her çağrıda yalnızca COUNT(*) çalışır; satır sayısı değişmediyse tablo yeniden okunmaz.
+    Tablo boşsa None döner ve cache yazılmaz.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    database_url = database_url or DEFAULT_DATABASE_URL
+    columns = list(numeric_columns) + list(categorical_columns)
+
+    with create_engine(database_url).connect() as conn:
+        rows = conn.execute(text(f'SELECT COUNT(*) FROM "{table_name}"')).scalar()
+
+    source = f"{make_url(database_url).render_as_string(hide_password=True)}|{table_name}|{','.join(columns)}"
+    stem = f"{table_name}-{_short_hash(source)[:8]}"
+    path = _cache_path(stem, _short_hash(f"{source}|{rows}"), cache_dir)
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        df = stream_crop_data(table_name=table_name, database_url=database_url, numeric_columns=numeric_columns,
+                              categorical_columns=categorical_columns, target=target)
+        if df is None:
+            return None
+        _store(df, path, stem, cache_dir)
+        print(f"[INFO] Tablo cache'i oluşturuldu: {path} ({len(df)} satır, {time.perf_counter() - start:.1f} sn)")
+    return _load(path, columns)
@@ -2,14 +2,18 @@ import pandas as pd
 import numpy as np
 from xgboost import XGBClassifier
 from sklearn.preprocessing import LabelEncoder
+from sklearn.model_selection import train_test_split
 from scipy.optimize import differential_evolution
 import sys
 import os
 import pickle
+import time
 
 # Config dosyasını import etmek için path ekle
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from database_config import load_crop_data
+from dataset_cache import load_dataset, load_table
+from streaming_loader import stream_crop_data
 
 class CropRecommendationModel:
     """Crop öneri modeli - Fonksiyonel sınıf yapısı"""
@@ -23,11 +27,39 @@ class CropRecommendationModel:
                                 'temperature_celsius','rainfall_mm']
         self.categorical_features = ['region','soil_type','fertilizer_type','irrigation_method','weather_condition']
         self.target = 'crop'
+        self.native_categorical = False
     
-    def load_data(self):
-        """Veriyi yükler"""
-        print("Veritabanından veri çekiliyor...")
-        self.df = load_crop_data(table_name='crop_dataset_v_100bin')
+    def load_data(self, csv_path=None, streaming=False, sample_per_crop=None, use_cache=True):
+        """Veriyi yükler (csv_path verilirse kolonsal cache üzerinden, yoksa veritabanından)
+        
+        streaming=True: tablo server-side cursor ile parça parça, float32/category tiplerle okunur;
+        sample_per_crop verilirse her crop için en fazla o kadar satır tutulur.
+        use_cache=True: tablo çıkarımı kolonsal cache'e yazılır, satır sayısı değişene kadar
+        sonraki çalıştırmalar tabloyu yeniden okumaz; False ile load_crop_data kullanılır.
+        """
+        if csv_path:
+            print(f"Veri kolonsal cache üzerinden yükleniyor: {csv_path}")
+            self.df = load_dataset(csv_path, columns=self.numeric_features + self.categorical_features + [self.target])
+        elif streaming:
+            print("Veritabanından veri akışlı olarak çekiliyor...")
+            self.df = stream_crop_data(
+                table_name='crop_dataset_v_100bin',
+                numeric_columns=self.numeric_features,
+                categorical_columns=self.categorical_features + [self.target],
+                target=self.target,
+                sample_per_crop=sample_per_crop
+            )
+        elif use_cache:
+            print("Veritabanından veri kolonsal cache üzerinden yükleniyor...")
+            self.df = load_table(
+                'crop_dataset_v_100bin',
+                numeric_columns=self.numeric_features,
+                categorical_columns=self.categorical_features + [self.target],
+                target=self.target
+            )
+        else:
+            print("Veritabanından veri çekiliyor...")
+            self.df = load_crop_data(table_name='crop_dataset_v_100bin')
         
         if self.df is None:
             raise ValueError("Veri yüklenemedi!")
@@ -36,13 +68,23 @@ class CropRecommendationModel:
         return self.df
     
     def suppress_outliers_iqr(self, columns, lower_quantile=0.005, upper_quantile=0.995):
-        """Aykırı değerleri baskılar"""
-        df_clean = self.df.copy()
-        for col in columns:
-            q_low = self.df[col].quantile(lower_quantile)
-            q_high = self.df[col].quantile(upper_quantile)
-            df_clean[col] = np.clip(self.df[col], q_low, q_high)
-        self.df = df_clean
+        """Aykırı değerleri baskılar (tüm sütunlar tek adımda, DataFrame kopyalanmadan)"""
+        quantiles = self.df[columns].quantile([lower_quantile, upper_quantile])
+        lower, upper = quantiles.loc[lower_quantile].copy(), quantiles.loc[upper_quantile].copy()
+
+        # Tamsayı sütunlarda sınırlar içe yuvarlanır; astype kesirli sınırı aşağı kesmesin
+        integer_columns = [col for col in columns if pd.api.types.is_integer_dtype(self.df[col])]
+        if integer_columns:
+            midpoint = ((lower[integer_columns] + upper[integer_columns]) / 2).round()
+            lower[integer_columns] = np.ceil(lower[integer_columns])
+            upper[integer_columns] = np.floor(upper[integer_columns])
+            # İki sınır aynı tamsayı aralığına düştüyse ikisi de en yakın tamsayıya
+            crossed = [col for col in integer_columns if lower[col] > upper[col]]
+            lower[crossed] = upper[crossed] = midpoint[crossed]
+
+        self.df[columns] = self.df[columns].clip(lower=lower, upper=upper, axis=1).astype(
+            self.df[columns].dtypes.to_dict()
+        )
         return self.df
     
     def encode_categorical_features(self):
@@ -53,7 +95,7 @@ class CropRecommendationModel:
             self.encoders[col] = le
         return self.encoders
     
-    def train_model(self):
+    def train_model(self, n_jobs=-1):
         """Modeli eğitir"""
         X = self.df[self.numeric_features + self.categorical_features]
         y = self.df[self.target]
@@ -64,13 +106,60 @@ class CropRecommendationModel:
             max_depth=6,
             subsample=0.8,
             colsample_bytree=0.8,
-            random_state=42
+            random_state=42,
+            n_jobs=n_jobs
         )
         self.model.fit(X, y)
         self.feature_order = X.columns.tolist()
+        self.native_categorical = False
         print("Model eğitimi tamamlandı.")
         return self.model
     
+    def _as_native_categorical(self, X):
+        """Encode edilmiş kategorik sütunları sabit kategorili pandas 'category' tipine çevirir"""
+        return X.astype({
+            col: pd.CategoricalDtype(categories=range(len(self.encoders[col].classes_)))
+            for col in self.categorical_features
+        })
+    
+    def train_model_fast(self, n_jobs=-1, validation_size=0.1, early_stopping_rounds=30, max_rounds=1000):
+        """Hızlı eğitim: hist + native kategorik destek + holdout üzerinde early stopping
+        
+        Kategorik sütunlar LabelEncoder kodlarıyla 'category' tipine çevrilir; böylece kaydedilen
+        model_data paketi XGBoostCropPredictor'ın gönderdiği integer kodlarla aynen çalışır.
+        """
+        X = self._as_native_categorical(self.df[self.numeric_features + self.categorical_features])
+        y = self.df[self.target]
+        X_train, X_valid, y_train, y_valid = train_test_split(
+            X, y, test_size=validation_size, random_state=42, stratify=y
+        )
+        
+        self.model = XGBClassifier(
+            n_estimators=max_rounds,
+            learning_rate=0.1,
+            max_depth=6,
+            subsample=0.8,
+            colsample_bytree=0.8,
+            tree_method='hist',
+            enable_categorical=True,
+            max_cat_to_onehot=1,
+            eval_metric='mlogloss',
+            early_stopping_rounds=early_stopping_rounds,
+            random_state=42,
+            n_jobs=n_jobs
+        )
+        
+        started = time.perf_counter()
+        self.model.fit(X_train, y_train, eval_set=[(X_valid, y_valid)], verbose=False)
+        elapsed = time.perf_counter() - started
+        
+        self.feature_order = X.columns.tolist()
+        self.native_categorical = True
+        accuracy = float((self.model.predict(X_valid) == y_valid.to_numpy()).mean())
+        print(f"Hızlı model eğitimi tamamlandı: {elapsed:.1f} sn, "
+              f"best_iteration={self.model.best_iteration}, holdout accuracy={accuracy:.4f}")
+        return self.model
+    
     def suggest_optimal_conditions(self, target_crop, target_region):
         """Optimum koşulları önerir"""
         if self.model is None:
@@ -88,6 +177,9 @@ class CropRecommendationModel:
         def objective(x):
             values = dict(zip(self.numeric_features + ['soil_type','fertilizer_type','irrigation_method','weather_condition'], x))
             values['region'] = region_val
+            if self.native_categorical:
+                for col in ['soil_type','fertilizer_type','irrigation_method','weather_condition']:
+                    values[col] = int(round(values[col]))
             X_test = pd.DataFrame([[values[col] for col in self.feature_order]], columns=self.feature_order)
             prob = self.model.predict_proba(X_test)[0, crop_val]
             return -prob
@@ -102,6 +194,9 @@ class CropRecommendationModel:
             best_df[col] = self.encoders[col].inverse_transform(best_df[col].astype(int))
 
         values_for_prob = {**best_values, 'region': region_val}
+        if self.native_categorical:
+            for col in ['soil_type','fertilizer_type','irrigation_method','weather_condition']:
+                values_for_prob[col] = int(round(values_for_prob[col]))
         X_best = pd.DataFrame([[values_for_prob[c] for c in self.feature_order]], columns=self.feature_order)
         final_prob = self.model.predict_proba(X_best)[0, crop_val]
 
@@ -126,10 +221,11 @@ class CropRecommendationModel:
         
         print(f"Model '{file_path}' olarak kaydedildi.")
     
-    def run_pipeline(self, target_crop="wheat", target_region="Aegean"):
-        """Tam pipeline'ı çalıştırır"""
+    def run_pipeline(self, target_crop="wheat", target_region="Aegean", fast=False, csv_path=None,
+                     streaming=False, sample_per_crop=None, **train_kwargs):
+        """Tam pipeline'ı çalıştırır (fast=True: hist + early stopping eğitim)"""
         # Veri yükle
-        self.load_data()
+        self.load_data(csv_path, streaming=streaming, sample_per_crop=sample_per_crop)
         
         # Aykırı değerleri baskıla
         self.suppress_outliers_iqr(self.numeric_features)
@@ -138,7 +234,10 @@ class CropRecommendationModel:
         self.encode_categorical_features()
         
         # Modeli eğit
-        self.train_model()
+        if fast:
+            self.train_model_fast(**train_kwargs)
+        else:
+            self.train_model(**train_kwargs)
         
         # Optimum koşulları öner
         optimum_df, probability = self.suggest_optimal_conditions(target_crop, target_region)
@@ -155,4 +254,5 @@ class CropRecommendationModel:
 # Ana çalıştırma
 if __name__ == "__main__":
     model = CropRecommendationModel()
-    model.run_pipeline()
+    # Hızlı mod: python recommendation_crop.py --fast
+    model.run_pipeline(fast='--fast' in sys.argv)
@@ -14,10 +14,67 @@ import lightgbm as lgb
 import warnings
 import sys
 import os
- 
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+ 
+# Kolonsal veri cache'i (ai/dataset_cache.py) için path ekle
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_cache import load_dataset
+
 # Uyarıları gizle
 warnings.filterwarnings('ignore')
  
+# LightGBM Dataset parametreleri (binning) — eğitim parametreleriyle aynı olmalı
+DATASET_PARAMS = {'max_bin': 255, 'verbose': -1}
+ 
+ 
+def _train_target_worker(task):
+    """Tek bir hedefi ayrı bir süreçte eğitir (paylaşılan binary Dataset üzerinden)"""
+    start = time.perf_counter()
+ 
+    # Binning bir kez yapıldı; burada sadece binary dosya okunup etiket atanıyor
+    train_set = lgb.Dataset(task['train_path'], label=task['y_train'], params=DATASET_PARAMS)
+    valid_set = lgb.Dataset(task['valid_path'], label=task['y_valid'], reference=train_set,
+                            params=DATASET_PARAMS)
+ 
+    params = {
+        'objective': 'multiclass',
+        'num_class': task['num_class'],
+        'learning_rate': 0.1,
+        'max_depth': 6,
+        'num_leaves': 31,
+        'num_threads': task['num_threads'],
+        'seed': 42,
+        **DATASET_PARAMS
+    }
+    booster = lgb.train(
+        params,
+        train_set,
+        num_boost_round=task['max_rounds'],
+        valid_sets=[valid_set],
+        valid_names=['valid'],
+        callbacks=[lgb.early_stopping(task['early_stopping_rounds'], verbose=False)]
+    )
+ 
+    best_iteration = booster.best_iteration or booster.current_iteration()
+    model_str = booster.model_to_string(num_iteration=best_iteration)
+    return {
+        'target': task['target'],
+        'model_str': model_str,
+        'best_iteration': best_iteration,
+        'train_seconds': time.perf_counter() - start,
+        'model_size_bytes': len(model_str.encode('utf-8'))
+    }
+ 
+ 
+def _predict_labels(model, X):
+    """LGBMClassifier veya Booster için sınıf indekslerini döndürür"""
+    if isinstance(model, lgb.Booster):
+        return np.asarray(model.predict(X)).argmax(axis=1)
+    return model.predict(X)
+ 
+ 
 # ===============================================================
 # 1. Çevre Önerileri Modeli Sınıfı
 # ===============================================================
@@ -49,6 +106,12 @@ class EnvironmentalRecommendationModel:
             'Rüzgarlı': 'windy'
         }
  
+        # Girdi kolonları
+        self.feature_columns = [
+            'crop', 'region', 'soil_ph', 'nitrogen', 'phosphorus',
+            'potassium', 'temperature_celsius', 'moisture', 'rainfall_mm'
+        ]
+
         # Birden fazla hedefi aynı girdiden tahmin ediyoruz:
         self.target_columns = ['fertilizer_type', 'irrigation_method', 'weather_condition', 'soil_type']
  
@@ -56,8 +119,14 @@ class EnvironmentalRecommendationModel:
         self.metrics_ = {}
  
     # -----------------------------------------------------------
-    def load_data(self, csv_path="./crop_dataset_v_100bin.csv"):
-        """CSV dosyasından veri yükle (aynı klasörde beklenir)"""
+    def load_data(self, csv_path="./crop_dataset_v_100bin.csv", use_cache=True):
+        """CSV dosyasından veri yükle (aynı klasörde beklenir)
+        
+        use_cache=True: CSV bir kez kolonsal cache'e çevrilir, sonraki çalıştırmalarda yalnızca
+        gerekli kolonlar memory-mapped okunur. Bu durumda self.df yalnızca feature ve hedef
+        kolonlarını içerir; ondalıklı kolonlar float32, tekrar eden metinler 'category' tipindedir.
+        read_csv'nin float64 / object tiplerini bekleyen çağıranlar use_cache=False vermelidir.
+        """
         print(f"[INFO] Veri yükleniyor: {csv_path}")
         if not os.path.exists(csv_path):
             raise FileNotFoundError(
@@ -65,7 +134,10 @@ class EnvironmentalRecommendationModel:
                 f"Lütfen dosyayı bu script ile aynı klasöre koyun ve adı 'crop_dataset_v_100bin.csv' olsun "
                 f"ya da load_data(csv_path=...) ile doğru yolu verin."
             )
-        self.df = pd.read_csv(csv_path)
+        if use_cache:
+            self.df = load_dataset(csv_path, columns=self.feature_columns + self.target_columns)
+        else:
+            self.df = pd.read_csv(csv_path)
         print(f"[INFO] Veri yüklendi: {len(self.df)} satır, {len(self.df.columns)} sütun")
         return self.df
  
@@ -73,10 +145,7 @@ class EnvironmentalRecommendationModel:
     def prepare_data(self):
         """Veriyi hazırla - sadece gerekli kolonları kullan"""
         # Input features
-        feature_columns = [
-            'crop', 'region', 'soil_ph', 'nitrogen', 'phosphorus',
-            'potassium', 'temperature_celsius', 'moisture', 'rainfall_mm'
-        ]
+        feature_columns = self.feature_columns
         missing_cols = [c for c in feature_columns + self.target_columns if c not in self.df.columns]
         if missing_cols:
             raise KeyError(f"Verinizde aşağıdaki gerekli kolonlar eksik: {missing_cols}")
@@ -200,6 +269,90 @@ class EnvironmentalRecommendationModel:
         ].sort_values("f1_weighted", ascending=False)
         print(df_sum.to_string(float_format=lambda x: f"{x:.4f}"))
  
+    # -----------------------------------------------------------
+    def train_models_parallel(self, X_train_processed, X_test_processed, n_jobs=None,
+                              threads_per_process=None, validation_size=0.1,
+                              early_stopping_rounds=50, max_rounds=1000):
+        """Hızlı eğitim modu: binned Dataset bir kez kurulur, hedefler paralel süreçlerde
+        early stopping ile eğitilir. Her hedef için süre ve model boyutu raporlanır."""
+        print("\n[INFO] Modeller paralel eğitiliyor (hızlı mod)...")
+        self.metrics_.clear()
+        wall_start = time.perf_counter()
+ 
+        n_jobs = n_jobs or min(len(self.target_columns), os.cpu_count() or 1)
+        threads_per_process = threads_per_process or max(1, (os.cpu_count() or 1) // n_jobs)
+        print(f"[INFO] Süreç sayısı: {n_jobs} | Süreç başına thread: {threads_per_process}")
+ 
+        # Early stopping için eğitim verisinden doğrulama kümesi ayır (test kümesi dokunulmaz)
+        indices = np.arange(X_train_processed.shape[0])
+        fit_idx, valid_idx = train_test_split(indices, test_size=validation_size, random_state=42)
+ 
+        # Etiketleri hedef bazında encode et
+        encoded = {}
+        for target in self.target_columns:
+            le = LabelEncoder()
+            y_train_encoded = le.fit_transform(self.y_train[target])
+            self.label_encoders[target] = le
+            self.classes[target] = le.classes_
+            encoded[target] = (y_train_encoded, le.transform(self.y_test[target]))
+ 
+        with tempfile.TemporaryDirectory(prefix='env_model_') as tmp_dir:
+            # Binning tek sefer: Dataset kurulup binary olarak tüm süreçlerle paylaşılır
+            bin_start = time.perf_counter()
+            train_path = os.path.join(tmp_dir, 'train.bin')
+            valid_path = os.path.join(tmp_dir, 'valid.bin')
+            base_train = lgb.Dataset(X_train_processed[fit_idx], label=np.zeros(len(fit_idx)),
+                                     params=DATASET_PARAMS, free_raw_data=False).construct()
+            base_valid = lgb.Dataset(X_train_processed[valid_idx], label=np.zeros(len(valid_idx)),
+                                     reference=base_train, params=DATASET_PARAMS).construct()
+            base_train.save_binary(train_path)
+            base_valid.save_binary(valid_path)
+            print(f"[INFO] Binned Dataset hazırlandı: {time.perf_counter() - bin_start:.2f}s")
+ 
+            tasks = [{
+                'target': target,
+                'train_path': train_path,
+                'valid_path': valid_path,
+                'y_train': encoded[target][0][fit_idx],
+                'y_valid': encoded[target][0][valid_idx],
+                'num_class': len(self.classes[target]),
+                'num_threads': threads_per_process,
+                'early_stopping_rounds': early_stopping_rounds,
+                'max_rounds': max_rounds
+            } for target in self.target_columns]
+ 
+            if n_jobs == 1:
+                results = [_train_target_worker(task) for task in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                    results = list(executor.map(_train_target_worker, tasks))
+ 
+        for result in results:
+            target = result['target']
+            model = lgb.Booster(model_str=result['model_str'])
+            y_test_encoded = encoded[target][1]
+            y_pred = _predict_labels(model, X_test_processed)
+ 
+            self.models[target] = model
+            self.metrics_[target] = {
+                "accuracy": accuracy_score(y_test_encoded, y_pred),
+                "f1_weighted": f1_score(y_test_encoded, y_pred, average='weighted'),
+                "precision_weighted": precision_score(y_test_encoded, y_pred, average='weighted', zero_division=0),
+                "recall_weighted": recall_score(y_test_encoded, y_pred, average='weighted'),
+                "n_classes": len(self.classes[target]),
+                "best_iteration": result['best_iteration'],
+                "train_seconds": result['train_seconds'],
+                "model_size_kb": result['model_size_bytes'] / 1024
+            }
+ 
+        print("\n================ ÖZET METRİK TABLOSU (HIZLI MOD) ================")
+        df_sum = pd.DataFrame(self.metrics_).T[
+            ["n_classes", "accuracy", "f1_weighted", "best_iteration", "train_seconds", "model_size_kb"]
+        ].sort_values("f1_weighted", ascending=False)
+        print(df_sum.to_string(float_format=lambda x: f"{x:.4f}"))
+        print(f"\n[INFO] Toplam eğitim süresi (wall-clock): {time.perf_counter() - wall_start:.2f}s")
+        return self.metrics_
+ 
     # -----------------------------------------------------------
     def save_model(self):
         """Modeli kaydet"""
@@ -257,7 +410,7 @@ class EnvironmentalRecommendationModel:
  
         recommendations = {}
         for target in self.target_columns:
-            pred_encoded = self.models[target].predict(processed)
+            pred_encoded = _predict_labels(self.models[target], processed)
             pred_label = self.label_encoders[target].inverse_transform(pred_encoded)[0]
             recommendations[target] = pred_label
  
@@ -273,13 +426,16 @@ class EnvironmentalRecommendationModel:
         return recommendations
  
     # -----------------------------------------------------------
-    def run_pipeline(self, csv_path="./crop_dataset_v_100bin.csv"):
-        """Tam pipeline'ı çalıştır"""
+    def run_pipeline(self, csv_path="./crop_dataset_v_100bin.csv", fast=False, **train_kwargs):
+        """Tam pipeline'ı çalıştır (fast=True: paralel + early stopping eğitim)"""
         self.load_data(csv_path)
         self.prepare_data()
         self.setup_preprocessor()
         X_train_processed, X_test_processed = self.preprocess_data()
-        self.train_models(X_train_processed, X_test_processed)
+        if fast:
+            self.train_models_parallel(X_train_processed, X_test_processed, **train_kwargs)
+        else:
+            self.train_models(X_train_processed, X_test_processed)
         self.save_model()
  
         # Test amaçlı tek örnek tahmin
@@ -312,7 +468,8 @@ if __name__ == "__main__":
  
     model = EnvironmentalRecommendationModel(model_path="environmental_recommendation_model.pkl")
     # Gerekirse alternatif yol ver: model.run_pipeline(csv_path="veri.csv")
-    model.run_pipeline(csv_path="./crop_dataset_v_100bin.csv")
+    # Hızlı mod: python recommendation_environment_model.py --fast
+    model.run_pipeline(csv_path="./crop_dataset_v_100bin.csv", fast='--fast' in sys.argv)
  
     # Alternatif: Kaydedilmiş modeli yükleyip tahmin yapmak
     # model = EnvironmentalRecommendationModel().load_saved_model()
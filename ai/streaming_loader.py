@@ -0,0 +1,117 @@
+"""
+Streaming training-data loader
+load_crop_data'ya akışlı alternatif: tabloyu server-side cursor ile parça parça okur,
+her parçayı hemen float32 / 'category' tiplerine küçültür ve istenirse ürün (crop) başına
+tabakalı örnekleme yapar. Tablonun tamamının metin hali hiçbir zaman bellekte tutulmaz.
+
+PostgreSQL'de stream_results=True isimli (server-side) cursor kullanır; testler ve yerel
+çalışma için DATABASE_URL=sqlite:///... de desteklenir.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from sqlalchemy import create_engine, text
+
+DEFAULT_DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://postgres@localhost:5432/terramind_db')
+
+NUMERIC_COLUMNS = ['soil_ph', 'nitrogen', 'phosphorus', 'potassium', 'moisture',
+                   'temperature_celsius', 'rainfall_mm']
+CATEGORICAL_COLUMNS = ['region', 'soil_type', 'fertilizer_type', 'irrigation_method',
+                       'weather_condition', 'crop']
+
+_SAMPLE_KEY = '_sample_key'
+
+
+def _downcast_chunk(rows, columns, numeric_columns):
+    """Bir parça satırı tipli kolonlara çevirir (sayısal: float32, diğerleri: category)"""
+    chunk = pd.DataFrame.from_records(rows, columns=columns)
+    for col in columns:
+        if col in numeric_columns:
+            # crop tabloları TEXT kolonlarla yüklenmiş olabilir
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(np.float32)
+        else:
+            chunk[col] = chunk[col].astype('category')
+    return chunk
+
+
+def _prune_samples(chunks, target, sample_per_crop):
+    """Her crop için en küçük rastgele anahtara sahip sample_per_crop satırı tutar (bottom-k)"""
+    keys = pd.DataFrame({
+        target: np.concatenate([c[target].astype(str).to_numpy() for c in chunks]),
+        'key': np.concatenate([c[_SAMPLE_KEY].to_numpy() for c in chunks])
+    })
+    thresholds = keys.groupby(target)['key'].agg(
+        lambda s: np.partition(s.to_numpy(), sample_per_crop - 1)[sample_per_crop - 1]
+        if len(s) > sample_per_crop else np.inf
+    )
+    return [
+        c[c[_SAMPLE_KEY] <= c[target].astype(str).map(thresholds).astype(float).to_numpy()]
+        for c in chunks
+    ]
+
+
+def _concat_chunks(chunks, columns, numeric_columns):
+    """Tipli parçaları birleştirir; kategoriler union_categoricals ile birleştirilir"""
+    data = {}
+    for col in columns:
+        if col in numeric_columns:
+            data[col] = np.concatenate([c[col].to_numpy() for c in chunks])
+        else:
+            data[col] = union_categoricals([c[col] for c in chunks])
+    return pd.DataFrame(data)
+
+
+def stream_crop_data(table_name='crop_dataset_v_100bin', database_url=None, numeric_columns=None,
+                     categorical_columns=None, target='crop', chunk_size=50000,
+                     sample_per_crop=None, random_state=42):
+    """Crop veri setini parça parça okuyup küçültülmüş tiplerle DataFrame olarak döndürür
+
+    Args:
+        table_name: Okunacak tablo
+        database_url: SQLAlchemy bağlantı adresi (varsayılan: DATABASE_URL)
+        numeric_columns / categorical_columns: Okunacak kolonlar
+        target: Tabakalı örnekleme için kullanılan hedef kolon
+        chunk_size: Cursor'dan tek seferde çekilen satır sayısı
+        sample_per_crop: Verilirse her crop için en fazla bu kadar satır (rastgele, tekrarsız)
+        random_state: Örnekleme tohumu
+    """
+    numeric_columns = list(numeric_columns or NUMERIC_COLUMNS)
+    categorical_columns = list(categorical_columns or CATEGORICAL_COLUMNS)
+    columns = numeric_columns + [c for c in categorical_columns if c not in numeric_columns]
+    if sample_per_crop is not None and target not in columns:
+        raise ValueError(f"Tabakalı örnekleme için '{target}' kolonu okunmalı")
+
+    engine = create_engine(database_url or DEFAULT_DATABASE_URL)
+    column_list = ', '.join(f'"{c}"' for c in columns)
+    query = text(f'SELECT {column_list} FROM "{table_name}"')
+    rng = np.random.default_rng(random_state)
+
+    start = time.perf_counter()
+    chunks = []
+    rows_read = 0
+    try:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query)
+            for rows in result.partitions(chunk_size):
+                chunk = _downcast_chunk(rows, columns, numeric_columns)
+                rows_read += len(chunk)
+                if sample_per_crop is not None:
+                    chunk[_SAMPLE_KEY] = rng.random(len(chunk))
+                    chunks = _prune_samples(chunks + [chunk], target, sample_per_crop)
+                else:
+                    chunks.append(chunk)
+    finally:
+        engine.dispose()
+
+    if not chunks:
+        return None
+
+    df = _concat_chunks(chunks, columns, numeric_columns)
+    memory_mb = df.memory_usage(deep=True).sum() / (1024 * 1024)
+    print(f"[INFO] {table_name}: {rows_read} satır okundu, {len(df)} satır tutuldu "
+          f"({memory_mb:.1f} MB, {time.perf_counter() - start:.1f} sn)")
+    return df
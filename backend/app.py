@@ -12,6 +12,10 @@ from dotenv import load_dotenv
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token
 from utils.logger import get_logger, log_info, log_error, log_success
+from utils.tracing import (
+    start_trace, finish_trace, get_current_trace, server_timing_header, instrument_sqlalchemy,
+    query_stats_header, query_stats_warnings
+)
 
 # Load environment variables
 load_dotenv()
@@ -33,11 +37,22 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
 app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
+app.config['RECOMMENDATION_COUNTERS_ENABLED'] = os.getenv('RECOMMENDATION_COUNTERS_ENABLED', 'false').lower() in ['true', 'on', '1']
+app.config['ACTIVITY_LOG_ASYNC'] = os.getenv('ACTIVITY_LOG_ASYNC', 'false').lower() in ['true', 'on', '1']
+app.config['ACTIVITY_LOG_QUEUE_SIZE'] = int(os.getenv('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+app.config['ACTIVITY_LOG_BATCH_SIZE'] = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', 500))
+app.config['ACTIVITY_LOG_FLUSH_INTERVAL'] = float(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0))
+app.config['SOIL_MEASUREMENT_INGEST_ENABLED'] = os.getenv('SOIL_MEASUREMENT_INGEST_ENABLED', 'false').lower() in ['true', 'on', '1']
+app.config['QUERY_DEBUG_HEADER'] = os.getenv('QUERY_DEBUG_HEADER', 'false').lower() in ['true', 'on', '1']
 
 # Initialize extensions
 log_info("Initializing database connection")
 db = SQLAlchemy(app)
 
+log_info("Initializing request tracing")
+with app.app_context():
+    instrument_sqlalchemy(db.engine)
+
 log_info("Initializing database migrations")
 migrate = Migrate(app, db)
 
@@ -258,6 +273,11 @@ class Product(db.Model):
     requirements = db.relationship('ProductRequirements', backref='product', uselist=False, cascade='all, delete-orphan')
     recommendations = db.relationship('Recommendation', backref='product', lazy=True)
     
+    # Keyset pagination of active products (services.keyset_pagination, GET /api/products/?cursor=)
+    __table_args__ = (
+        db.Index('idx_products_active_created', 'is_active', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Product {self.name}>'
     
@@ -287,15 +307,10 @@ class Product(db.Model):
         return [cat[0] for cat in categories]
     
     @staticmethod
-    def search_products(query):
-        """Search products by name or description"""
-        return Product.query.filter(
-            db.or_(
-                Product.name.ilike(f'%{query}%'),
-                Product.description.ilike(f'%{query}%')
-            ),
-            Product.is_active == True
-        ).all()
+    def search_products(query, limit=20):
+        """Search products by name or description, best match first"""
+        from services.product_search import search_products
+        return search_products(db.session, Product, query, limit)
 
 # Define AverageSoilData model after db is initialized
 class AverageSoilData(db.Model):
@@ -346,34 +361,18 @@ class AverageSoilData(db.Model):
     
     @classmethod
     def get_best_match(cls, soil_type, region, fertilizer_type, irrigation_method, weather_condition):
-        """Get best matching average soil data"""
-        # Try exact match first
-        exact_match = cls.query.filter_by(
+        """Get best matching average soil data (exact -> soil+region -> region)"""
+        from services.average_soil_index import get_average_soil_index, FALLBACK_LEVELS
+        
+        index = get_average_soil_index(cls, levels=FALLBACK_LEVELS[:3])
+        match, _ = index.lookup(
             soil_type=soil_type,
             region=region,
             fertilizer_type=fertilizer_type,
             irrigation_method=irrigation_method,
             weather_condition=weather_condition
-        ).first()
-        
-        if exact_match:
-            return exact_match
-        
-        # Try partial matches
-        partial_match = cls.query.filter_by(
-            soil_type=soil_type,
-            region=region
-        ).first()
-        
-        if partial_match:
-            return partial_match
-        
-        # Try region only
-        region_match = cls.query.filter_by(region=region).first()
-        if region_match:
-            return region_match
-        
-        return None
+        )
+        return match
     
     @classmethod
     def get_default_averages(cls):
@@ -573,6 +572,40 @@ Rapor oluşturulma zamanı: {datetime.now()}
             'message': f'PDF oluşturulurken hata oluştu: {str(e)}'
         }), 500
 
+# Request tracing middleware
+@app.before_request
+def start_request_trace():
+    """Assign a request id and start a trace for the request"""
+    incoming_id = request.headers.get('X-Request-ID', '')
+    if not (0 < len(incoming_id) <= 64 and incoming_id.replace('-', '').isalnum()):
+        incoming_id = None
+    start_trace(incoming_id)
+
+@app.after_request
+def finish_request_trace(response):
+    """Export the trace, log query stats and expose request id and Server-Timing headers"""
+    trace = finish_trace()
+    if trace:
+        response.headers['X-Request-ID'] = trace.request_id
+        timing = server_timing_header(trace)
+        if timing:
+            response.headers['Server-Timing'] = timing
+        
+        db_logger = get_logger('database')
+        db_logger.debug(f"[DB] {request.method} {request.path}: {trace.queries.count} queries, "
+                        f"{trace.queries.total_ms:.1f}ms")
+        for warning in query_stats_warnings(trace):
+            db_logger.warning(f"[DB] {request.method} {request.path}: {warning}")
+        if app.config['QUERY_DEBUG_HEADER']:
+            response.headers['X-DB-Queries'] = query_stats_header(trace)
+    return response
+
+@app.teardown_request
+def discard_request_trace(error=None):
+    """Make sure no trace leaks into the next request on this worker"""
+    if get_current_trace() is not None:
+        finish_trace()
+
 # Request logging middleware
 @app.before_request
 def log_request():
@@ -927,10 +960,37 @@ with app.app_context():
         from models.product import Product, ProductRequirements
         from models.environment import Environment, EnvironmentData
         from models.recommendation import Recommendation
-        from models.model_results import ModelResult
-        from models.user_activity_log import UserActivityLog
+        from models.model_results import ModelResult, ModelUsageDaily
+        from models.user_activity_log import UserActivityLog, ActivityUsageHourly
+        from models.recommendation_counter import UserRecommendationCounter
+        from models.rollup_watermark import RollupWatermark
         
         db.create_all()
+        
+        if app.config['RECOMMENDATION_COUNTERS_ENABLED']:
+            from services.recommendation_stats import install_counter_maintenance
+            install_counter_maintenance(db.session, Recommendation)
+        
+        # Product / requirement commits mark the in-memory product indexes (recommend, search) stale
+        from services.cached_index import install_index_invalidation
+        install_index_invalidation(db.session)
+        
+        # Trigram indexes behind product search (PostgreSQL only)
+        from services.product_search import ensure_search_indexes
+        try:
+            ensure_search_indexes(db.session)
+        except Exception as e:
+            db.session.rollback()
+            log_error(f"Product search indexes could not be created, search falls back to sequential scans: {str(e)}")
+
+        # Monthly activity log partitions (PostgreSQL, once partitioned); rows outside them go to DEFAULT
+        from services.activity_retention import is_partitioned, ensure_partitions
+        try:
+            if is_partitioned(db.session):
+                ensure_partitions(db.session)
+        except Exception as e:
+            db.session.rollback()
+            log_error(f"Activity log partitions could not be created, new rows go to the default partition: {str(e)}")
         # Initialize ML service - temporarily disabled
         # init_ml_service()
         
@@ -24,6 +24,21 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     
+    # Per-user recommendation counters table (dashboard/stats read a single row)
+    RECOMMENDATION_COUNTERS_ENABLED = os.getenv('RECOMMENDATION_COUNTERS_ENABLED', 'false').lower() in ['true', 'on', '1']
+    
+    # Activity logs written in batches by a background thread instead of per request
+    ACTIVITY_LOG_ASYNC = os.getenv('ACTIVITY_LOG_ASYNC', 'false').lower() in ['true', 'on', '1']
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.getenv('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', 500))
+    ACTIVITY_LOG_FLUSH_INTERVAL = float(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0))
+    
+    # POST /average-soil-data/measurements (internal ingestion; off on public deployments)
+    SOIL_MEASUREMENT_INGEST_ENABLED = os.getenv('SOIL_MEASUREMENT_INGEST_ENABLED', 'false').lower() in ['true', 'on', '1']
+    
+    # X-DB-Queries response header (statement count, DB time, likely N+1) for debugging
+    QUERY_DEBUG_HEADER = os.getenv('QUERY_DEBUG_HEADER', 'false').lower() in ['true', 'on', '1']
+    
     # File upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
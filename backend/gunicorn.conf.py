@@ -69,4 +69,14 @@ def post_fork(server, worker):
         init_ml_service()
         server.log.info("ML Service initialized for worker (pid: %s)", worker.pid)
     except Exception as e:
-        server.log.error("Failed to initialize ML Service for worker (pid: %s): %s", worker.pid, str(e))
\ No newline at end of file
+        server.log.error("Failed to initialize ML Service for worker (pid: %s): %s", worker.pid, str(e))
+
+def worker_exit(server, worker):
+    """Called just after a worker has exited."""
+    # Write out activity logs still buffered in this worker
+    try:
+        from services.activity_writer import shutdown_activity_writer
+        shutdown_activity_writer(timeout=graceful_timeout / 2)
+        server.log.info("Activity log writer flushed for worker (pid: %s)", worker.pid)
+    except Exception as e:
+        server.log.error("Failed to flush activity log writer for worker (pid: %s): %s", worker.pid, str(e))
@@ -10,6 +10,9 @@ CREATE EXTENSION IF NOT EXISTS "pg_stat_statements";
 -- Enable unaccent for text search
 CREATE EXTENSION IF NOT EXISTS "unaccent";
 
+-- Enable pg_trgm for indexed product search (LIKE '%q%', similarity)
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
 -- Enable btree_gin for better indexing
 CREATE EXTENSION IF NOT EXISTS "btree_gin";
 
@@ -15,13 +15,17 @@
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_model_results_user_type ON model_results (user_id, model_type);
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_activity_logs_user_created ON user_activity_logs (user_id, created_at DESC);
 
+-- Keyset pagination (?cursor=) indexes, declared on the models and created by db.create_all():
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_active_created ON products (is_active, created_at, id);
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_recommendations_user_status_created ON recommendations (user_id, status, created_at, id);
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_recommendations_user_created ON recommendations (user_id, created_at, id);
+
 -- Create indexes for JSON fields (PostgreSQL 9.4+)
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_model_results_predictions_gin ON model_results USING GIN (predictions);
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_recommendations_input_gin ON recommendations USING GIN (input_parameters);
 
--- Create indexes for text search
--- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
--- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_description_trgm ON products USING GIN (description gin_trgm_ops);
+-- Indexes for text search are created at app startup by services/product_search.py
+-- (ensure_search_indexes): GIN gin_trgm_ops on product_search_fold(name) / (description)
 
 -- Create indexes for date ranges
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_model_results_created_date ON model_results (created_at DESC);
@@ -105,46 +105,24 @@ class AverageSoilData(db.Model):
         logger = get_logger('models.average_soil_data')
         
         try:
-            # Try exact match first
-            exact_match = AverageSoilData.query.filter(
-                AverageSoilData.soil_type == soil_type,
-                AverageSoilData.region == region,
-                AverageSoilData.fertilizer_type == fertilizer_type,
-                AverageSoilData.irrigation_method == irrigation_method,
-                AverageSoilData.weather_condition == weather_condition
-            ).first()
-            
-            if exact_match:
+            from services.average_soil_index import get_average_soil_index
+
+            # exact -> region+soil -> region -> soil -> any, served from the in-memory index
+            result, level = get_average_soil_index(AverageSoilData).lookup(
+                soil_type=soil_type,
+                region=region,
+                fertilizer_type=fertilizer_type,
+                irrigation_method=irrigation_method,
+                weather_condition=weather_condition
+            )
+            
+            if result is None:
+                logger.warning("No average soil data found, even with fallback")
+            elif level == 0:
                 logger.info("Found exact match for average soil data")
-                return exact_match
-            
-            # Try partial matches with priority order
-            fallback_queries = [
-                # Match by region and soil type
-                AverageSoilData.query.filter(
-                    AverageSoilData.region == region,
-                    AverageSoilData.soil_type == soil_type
-                ),
-                # Match by region only
-                AverageSoilData.query.filter(
-                    AverageSoilData.region == region
-                ),
-                # Match by soil type only
-                AverageSoilData.query.filter(
-                    AverageSoilData.soil_type == soil_type
-                ),
-                # Get any record as last resort
-                AverageSoilData.query
-            ]
-            
-            for query in fallback_queries:
-                result = query.first()
-                if result:
-                    logger.info(f"Found fallback match for average soil data: {result.region}-{result.soil_type}")
-                    return result
-            
-            logger.warning("No average soil data found, even with fallback")
-            return None
+            else:
+                logger.info(f"Found fallback match for average soil data: {result.region}-{result.soil_type}")
+            return result
             
         except Exception as e:
             logger.error(f"Error getting best match for average soil data: {e}")
@@ -210,18 +188,21 @@ class AverageSoilData(db.Model):
                     avg_potassium=row['avg_potassium'],
                     avg_moisture=row['avg_moisture'],
                     avg_temperature_celsius=row['avg_temperature_celsius'],
-                    avg_rainfall_mm=row['avg_rainfall_mm']
+                    avg_rainfall_mm=row['avg_rainfall_mm'],
+                    data_count=row.get('data_count', 1)
                 )
                 records_to_insert.append(record)
             
-            # Clear existing data first
+            # Delete and insert in one transaction so readers never see an empty table
             AverageSoilData.query.delete()
-            db.session.commit()
             
             # Insert new data
             db.session.bulk_save_objects(records_to_insert)
             db.session.commit()
             
+            from services.average_soil_index import get_average_soil_index
+            get_average_soil_index(AverageSoilData).invalidate()
+            
             logger.info(f"Successfully inserted {len(records_to_insert)} average soil data records")
             return True
             
@@ -229,3 +210,27 @@ class AverageSoilData(db.Model):
             logger.error(f"Error bulk inserting average soil data: {e}")
             db.session.rollback()
             return False
+    
+    @staticmethod
+    @log_database_operation
+    def refresh_from_crop_dataset(source_table='crop_dataset'):
+        """Recompute all averages server-side and swap them in within one transaction"""
+        from services.average_soil_refresh import refresh_average_soil_data
+        from services.average_soil_index import get_average_soil_index
+        
+        stats = refresh_average_soil_data(db.session, source_table, AverageSoilData.__tablename__)
+        get_average_soil_index(AverageSoilData).invalidate()
+        return stats
+    
+    @staticmethod
+    @log_database_operation
+    def ingest_measurements(measurements, store_raw=False):
+        """Fold new crop measurements into the matching averages (one upsert per group)"""
+        from services.average_soil_refresh import ingest_measurements
+        from services.average_soil_index import get_average_soil_index
+        
+        stats = ingest_measurements(db.session, measurements, target_table=AverageSoilData.__tablename__,
+                                    store_raw=store_raw)
+        if stats['groups_upserted']:
+            get_average_soil_index(AverageSoilData).invalidate()
+        return stats
@@ -81,6 +81,11 @@ class EnvironmentData(db.Model):
     measured_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Latest-per-environment lookups (get_latest_data / get_latest_data_for_environments)
+    __table_args__ = (
+        db.Index('idx_environment_data_env_measured', 'environment_id', 'measured_at'),
+    )
+    
     def __repr__(self):
         return f'<EnvironmentData {self.environment_id}>'
     
@@ -119,6 +124,12 @@ class EnvironmentData(db.Model):
         """Get latest environment data for an environment"""
         return EnvironmentData.query.filter_by(environment_id=environment_id).order_by(EnvironmentData.measured_at.desc()).first()
     
+    @staticmethod
+    def get_latest_data_for_environments(environment_ids):
+        """Get latest environment data for many environments with one ROW_NUMBER() query"""
+        from services.environment_snapshots import latest_environment_data
+        return latest_environment_data(db.session, EnvironmentData, environment_ids)
+    
     @staticmethod
     def get_historical_data(environment_id, days=30):
         """Get historical environment data for an environment"""
@@ -39,6 +39,11 @@ class ModelResult(db.Model):
     # Relationships
     user = db.relationship('User', backref='model_results')
     
+    # Statistics scan completed results by date range
+    __table_args__ = (
+        db.Index('idx_model_results_status_created', 'status', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<ModelResult {self.model_type} - {self.user_id}>'
     
@@ -144,41 +149,33 @@ class ModelResult(db.Model):
     @staticmethod
     @log_database_operation
     def get_model_statistics(model_type=None, days=30):
-        """Get model usage statistics"""
+        """Get model usage statistics (daily rollup + GROUP BY over the not-yet-rolled tail)"""
         logger = get_logger('models.model_results')
         logger.info(f"Getting model statistics for last {days} days")
         
-        from datetime import timedelta
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        query = ModelResult.query.filter(
-            ModelResult.created_at >= cutoff_date,
-            ModelResult.status == 'completed'
-        )
-        
-        if model_type:
-            query = query.filter_by(model_type=model_type)
-        
-        results = query.all()
-        
-        stats = {
-            'total_requests': len(results),
-            'avg_processing_time': sum(r.processing_time_ms or 0 for r in results) / len(results) if results else 0,
-            'model_types': {},
-            'algorithms': {},
-            'daily_requests': {}
-        }
-        
-        for result in results:
-            # Count by model type
-            stats['model_types'][result.model_type] = stats['model_types'].get(result.model_type, 0) + 1
-            
-            # Count by algorithm
-            stats['algorithms'][result.algorithm] = stats['algorithms'].get(result.algorithm, 0) + 1
-            
-            # Count by day
-            day = result.created_at.strftime('%Y-%m-%d')
-            stats['daily_requests'][day] = stats['daily_requests'].get(day, 0) + 1
+        from services.rollups import model_usage_statistics
+        stats = model_usage_statistics(db.session, model_type=model_type, days=days)
         
         logger.success(f"Model statistics calculated: {stats['total_requests']} total requests")
         return stats
+    
+    @staticmethod
+    def rollup_daily_usage(lookback_days=1):
+        """Fold completed days into model_usage_daily (run periodically, e.g. python -m services.rollups)"""
+        from services.rollups import rollup_model_usage
+        return rollup_model_usage(db.session, lookback_days=lookback_days)
+
+
+class ModelUsageDaily(db.Model):
+    """Daily rollup of completed model results, maintained by services.rollups"""
+    __tablename__ = 'model_usage_daily'
+    
+    day = db.Column(db.Date, primary_key=True)
+    model_type = db.Column(db.String(50), primary_key=True)
+    algorithm = db.Column(db.String(30), primary_key=True)
+    
+    request_count = db.Column(db.Integer, nullable=False, default=0)
+    processing_time_sum = db.Column(db.Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ModelUsageDaily {self.day} {self.model_type}/{self.algorithm}: {self.request_count}>'
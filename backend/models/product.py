@@ -20,6 +20,11 @@ class Product(db.Model):
     requirements = db.relationship('ProductRequirements', backref='product', uselist=False, cascade='all, delete-orphan')
     recommendations = db.relationship('Recommendation', backref='product', lazy=True)
     
+    # Keyset pagination of active products (services.keyset_pagination)
+    __table_args__ = (
+        db.Index('idx_products_active_created', 'is_active', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Product {self.name}>'
     
@@ -49,17 +54,12 @@ class Product(db.Model):
     
     @staticmethod
     @log_database_operation
-    def search_products(query):
-        """Search products by name or description"""
+    def search_products(query, limit=20):
+        """Search products by name or description, best match first (services.product_search)"""
         logger = get_logger('models.product')
         logger.info(f"Searching products with query: '{query}'")
-        products = Product.query.filter(
-            db.or_(
-                Product.name.ilike(f'%{query}%'),
-                Product.description.ilike(f'%{query}%')
-            ),
-            Product.is_active == True
-        ).all()
+        from services.product_search import search_products
+        products = search_products(db.session, Product, query, limit)
         logger.success(f"Found {len(products)} products matching '{query}'")
         return products
     
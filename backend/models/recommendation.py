@@ -48,6 +48,12 @@ class Recommendation(db.Model):
     # Relationships
     model_result = db.relationship('ModelResult', backref='recommendations')
     
+    # Keyset pagination (services.keyset_pagination): newest first per user, with or without status
+    __table_args__ = (
+        db.Index('idx_recommendations_user_status_created', 'user_id', 'status', 'created_at', 'id'),
+        db.Index('idx_recommendations_user_created', 'user_id', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Recommendation {self.title}>'
     
@@ -113,6 +119,15 @@ class Recommendation(db.Model):
             status='active'
         ).order_by(Recommendation.confidence_score.desc()).all()
     
+    @staticmethod
+    def get_user_counts(user_id):
+        """Status / favorite / type counts for a user (one grouped query or a counters-row read)"""
+        from flask import current_app
+        from services.recommendation_stats import get_user_counts
+        
+        use_counters = current_app.config.get('RECOMMENDATION_COUNTERS_ENABLED', False)
+        return get_user_counts(Recommendation, user_id, use_counters=use_counters)
+    
     def mark_as_favorite(self):
         """Mark recommendation as favorite"""
         self.is_favorite = True
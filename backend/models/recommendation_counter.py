@@ -0,0 +1,25 @@
+# db will be imported from app when needed
+from datetime import datetime
+
+class UserRecommendationCounter(db.Model):
+    """Per-user recommendation counters, updated in the same transaction as recommendations"""
+    __tablename__ = 'user_recommendation_counters'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    
+    total = db.Column(db.Integer, nullable=False, default=0)
+    favorite = db.Column(db.Integer, nullable=False, default=0)
+    
+    # By status
+    active = db.Column(db.Integer, nullable=False, default=0)
+    dismissed = db.Column(db.Integer, nullable=False, default=0)
+    implemented = db.Column(db.Integer, nullable=False, default=0)
+    
+    # By type
+    product_to_environment = db.Column(db.Integer, nullable=False, default=0)
+    environment_to_product = db.Column(db.Integer, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserRecommendationCounter {self.user_id}: {self.total}>'
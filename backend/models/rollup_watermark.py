@@ -0,0 +1,13 @@
+# db will be imported from app when needed
+from datetime import datetime
+
+class RollupWatermark(db.Model):
+    """How far each rollup table has been folded (exclusive end timestamp)"""
+    __tablename__ = 'rollup_watermarks'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    rolled_until = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RollupWatermark {self.name}: {self.rolled_until}>'
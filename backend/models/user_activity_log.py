@@ -45,6 +45,12 @@ class UserActivityLog(db.Model):
     # Relationships
     user = db.relationship('User', backref='activity_logs')
     
+    # Rollup and statistics scans go by date range
+    __table_args__ = (
+        db.Index('idx_activity_logs_created', 'created_at'),
+        db.Index('idx_activity_logs_user_created', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<UserActivityLog {self.activity_type} - {self.user_id}>'
     
@@ -83,6 +89,17 @@ class UserActivityLog(db.Model):
         logger = get_logger('models.user_activity_log')
         logger.info(f"Logging activity for user {user_id}: {activity_type}")
         
+        from flask import current_app
+        if current_app.config.get('ACTIVITY_LOG_ASYNC'):
+            return UserActivityLog._submit_activity(dict(
+                user_id=user_id, activity_type=activity_type, activity_category=activity_category,
+                description=description, details=details, request_method=request_method,
+                endpoint=endpoint, ip_address=ip_address, user_agent=user_agent, status=status,
+                status_code=status_code, error_message=error_message, response_time_ms=response_time_ms,
+                memory_usage_mb=memory_usage_mb, session_id=session_id, device_type=device_type,
+                platform=platform
+            ))
+        
         try:
             activity = UserActivityLog(
                 user_id=user_id,
@@ -115,6 +132,25 @@ class UserActivityLog(db.Model):
             db.session.rollback()
             raise
     
+    @staticmethod
+    def _submit_activity(values):
+        """Queue the row for the background writer instead of INSERT + commit in the request"""
+        from flask import current_app
+        from services.activity_writer import get_activity_writer
+        
+        config = current_app.config
+        writer = get_activity_writer(
+            db.engine, UserActivityLog.__table__,
+            max_queue=config.get('ACTIVITY_LOG_QUEUE_SIZE', 10000),
+            batch_size=config.get('ACTIVITY_LOG_BATCH_SIZE', 500),
+            flush_interval=config.get('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0)
+        )
+        
+        # id and created_at are fixed now, not when the batch is written
+        values.update(id=str(uuid.uuid4()), created_at=datetime.utcnow())
+        writer.submit(values)
+        return UserActivityLog(**values)
+    
     @staticmethod
     @log_database_operation
     def get_user_activities(user_id, activity_type=None, limit=100, days=30):
@@ -141,77 +177,22 @@ class UserActivityLog(db.Model):
     @staticmethod
     @log_database_operation
     def get_activity_statistics(user_id=None, days=30):
-        """Get activity statistics"""
+        """Get activity statistics (hourly rollup + GROUP BY over the not-yet-rolled tail)"""
         logger = get_logger('models.user_activity_log')
         logger.info(f"Getting activity statistics for last {days} days")
         
-        from datetime import timedelta
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        query = UserActivityLog.query.filter(UserActivityLog.created_at >= cutoff_date)
-        
-        if user_id:
-            query = query.filter_by(user_id=user_id)
-        
-        activities = query.all()
-        
-        stats = {
-            'total_activities': len(activities),
-            'activities_by_type': {},
-            'activities_by_category': {},
-            'success_rate': 0,
-            'avg_response_time': 0,
-            'daily_activities': {},
-            'device_breakdown': {},
-            'platform_breakdown': {}
-        }
-        
-        success_count = 0
-        total_response_time = 0
-        response_count = 0
-        
-        for activity in activities:
-            # Count by type
-            stats['activities_by_type'][activity.activity_type] = \
-                stats['activities_by_type'].get(activity.activity_type, 0) + 1
-            
-            # Count by category
-            stats['activities_by_category'][activity.activity_category] = \
-                stats['activities_by_category'].get(activity.activity_category, 0) + 1
-            
-            # Count by day
-            day = activity.created_at.strftime('%Y-%m-%d')
-            stats['daily_activities'][day] = stats['daily_activities'].get(day, 0) + 1
-            
-            # Device breakdown
-            if activity.device_type:
-                stats['device_breakdown'][activity.device_type] = \
-                    stats['device_breakdown'].get(activity.device_type, 0) + 1
-            
-            # Platform breakdown
-            if activity.platform:
-                stats['platform_breakdown'][activity.platform] = \
-                    stats['platform_breakdown'].get(activity.platform, 0) + 1
-            
-            # Success rate
-            if activity.status == 'success':
-                success_count += 1
-            
-            # Response time
-            if activity.response_time_ms:
-                total_response_time += activity.response_time_ms
-                response_count += 1
-        
-        # Calculate rates
-        if activities:
-            stats['success_rate'] = (success_count / len(activities)) * 100
-        
-        if response_count > 0:
-            stats['avg_response_time'] = total_response_time / response_count
+        from services.rollups import activity_statistics
+        stats = activity_statistics(db.session, user_id=user_id, days=days)
         
         logger.success(f"Activity statistics calculated: {stats['total_activities']} total activities")
         return stats
     
+    @staticmethod
+    def rollup_hourly_activity(lookback_hours=2):
+        """Fold completed hours into activity_usage_hourly (run periodically, e.g. python -m services.rollups)"""
+        from services.rollups import rollup_activity_usage
+        return rollup_activity_usage(db.session, lookback_hours=lookback_hours)
+    
     @staticmethod
     @log_database_operation
     def get_recommendation_requests(user_id=None, days=30):
@@ -237,21 +218,48 @@ class UserActivityLog(db.Model):
     
     @staticmethod
     @log_database_operation
-    def cleanup_old_logs(days_to_keep=90):
-        """Clean up old activity logs"""
+    def cleanup_old_logs(days_to_keep=90, batch_size=5000, pause_seconds=0.1):
+        """Clean up old activity logs (partition drop or batched DELETE, see services.activity_retention)"""
         logger = get_logger('models.user_activity_log')
         logger.info(f"Cleaning up activity logs older than {days_to_keep} days")
         
-        from datetime import timedelta
-        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
-        
-        old_logs = UserActivityLog.query.filter(UserActivityLog.created_at < cutoff_date).all()
-        count = len(old_logs)
+        from services.activity_retention import purge_expired_activity
+        result = purge_expired_activity(db.session, days_to_keep=days_to_keep,
+                                        batch_size=batch_size, pause_seconds=pause_seconds)
         
-        for log in old_logs:
-            db.session.delete(log)
-        
-        db.session.commit()
-        
-        logger.success(f"Cleaned up {count} old activity logs")
-        return count
+        logger.success(f"Cleaned up {result['rows_deleted']} old activity logs, "
+                       f"{len(result['partitions_dropped'])} partitions dropped")
+        return result['rows_deleted']
+
+
+class ActivityUsageHourly(db.Model):
+    """Hourly rollup of activity logs with a response-time histogram, maintained by services.rollups"""
+    __tablename__ = 'activity_usage_hourly'
+    
+    hour = db.Column(db.DateTime, primary_key=True)
+    user_id = db.Column(db.String(36), primary_key=True)
+    activity_type = db.Column(db.String(50), primary_key=True)
+    activity_category = db.Column(db.String(30), primary_key=True)
+    device_type = db.Column(db.String(20), primary_key=True, default='')  # '' when unknown
+    platform = db.Column(db.String(50), primary_key=True, default='')  # '' when unknown
+    
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    success_count = db.Column(db.Integer, nullable=False, default=0)
+    response_count = db.Column(db.Integer, nullable=False, default=0)  # rows with a response time
+    response_time_sum = db.Column(db.Float, nullable=False, default=0)
+    
+    # Response-time histogram (ms), see services.rollups.LATENCY_BUCKETS
+    latency_le_50 = db.Column(db.Integer, nullable=False, default=0)
+    latency_le_100 = db.Column(db.Integer, nullable=False, default=0)
+    latency_le_250 = db.Column(db.Integer, nullable=False, default=0)
+    latency_le_500 = db.Column(db.Integer, nullable=False, default=0)
+    latency_le_1000 = db.Column(db.Integer, nullable=False, default=0)
+    latency_le_2500 = db.Column(db.Integer, nullable=False, default=0)
+    latency_gt_2500 = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.Index('idx_activity_usage_hourly_user', 'user_id', 'hour'),
+    )
+    
+    def __repr__(self):
+        return f'<ActivityUsageHourly {self.hour} {self.activity_type}: {self.activity_count}>'
@@ -4,6 +4,7 @@ from fpdf import FPDF
 from dotenv import load_dotenv
 import json
 from typing import Dict, Any, List
+from utils.tracing import span
 
 
 environment_recommendation_prompt = '''
@@ -237,7 +238,8 @@ def generate_crop_recommendation_pdf(data: Dict[str, Any]) -> str:
         )
         
         # Generate content using LLM
-        response = model.generate_content(formatted_prompt)
+        with span('llm.generate_content', model='gemini-2.0-flash-exp'):
+            response = model.generate_content(formatted_prompt)
         response_text = response.text
         
         # Generate unique filename
@@ -246,7 +248,8 @@ def generate_crop_recommendation_pdf(data: Dict[str, Any]) -> str:
         filename = f"crop_recommendation_{location}_{timestamp}.pdf"
         
         # Create PDF
-        write_string_to_pdf(response_text, filename)
+        with span('pdf.render', filename=filename):
+            write_string_to_pdf(response_text, filename)
         
         return {
             'success': True,
@@ -296,7 +299,8 @@ def generate_environment_conditions_pdf(
         )
         
         # Generate content using LLM
-        response = model.generate_content(formatted_prompt)
+        with span('llm.generate_content', model='gemini-2.0-flash-exp'):
+            response = model.generate_content(formatted_prompt)
         response_text = response.text
         
         # Generate unique filename
@@ -305,7 +309,8 @@ def generate_environment_conditions_pdf(
         filename = f"environment_conditions_{crop_name}_{timestamp}.pdf"
         
         # Create PDF
-        write_string_to_pdf(response_text, filename)
+        with span('pdf.render', filename=filename):
+            write_string_to_pdf(response_text, filename)
         
         # Return the file path instead of a dictionary
         return filename
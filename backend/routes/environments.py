@@ -362,52 +362,10 @@ def recommend_for_environment(environment_id):
         
         # Import here to avoid circular imports
         from models.product import Product
+        from services.requirement_index import get_requirement_index
         
-        # Get all products
-        products = Product.query.filter_by(is_active=True).all()
-        recommendations = []
-        
-        for product in products:
-            if product.requirements:
-                # Check suitability
-                suitable, issues = product.requirements.is_suitable_for_environment(latest_data)
-                
-                # Calculate suitability score
-                score = 0.0
-                if suitable:
-                    score = 1.0
-                else:
-                    # Calculate partial score
-                    total_checks = 0
-                    passed_checks = 0
-                    
-                    if product.requirements.ph_min is not None or product.requirements.ph_max is not None:
-                        total_checks += 1
-                        if latest_data.ph and product.requirements.ph_min <= latest_data.ph <= product.requirements.ph_max:
-                            passed_checks += 1
-                    
-                    if product.requirements.temperature_min is not None or product.requirements.temperature_max is not None:
-                        total_checks += 1
-                        if latest_data.temperature and product.requirements.temperature_min <= latest_data.temperature <= product.requirements.temperature_max:
-                            passed_checks += 1
-                    
-                    if product.requirements.humidity_min is not None or product.requirements.humidity_max is not None:
-                        total_checks += 1
-                        if latest_data.humidity and product.requirements.humidity_min <= latest_data.humidity <= product.requirements.humidity_max:
-                            passed_checks += 1
-                    
-                    if total_checks > 0:
-                        score = passed_checks / total_checks
-                
-                recommendations.append({
-                    'product': product.to_dict(),
-                    'suitability_score': score,
-                    'suitable': suitable,
-                    'issues': issues
-                })
-        
-        # Sort by suitability score
-        recommendations.sort(key=lambda x: x['suitability_score'], reverse=True)
+        # Check all products against the in-memory requirement index
+        recommendations = get_requirement_index(Product).match(latest_data).ranked()
         
         return jsonify({
             'success': True,
@@ -31,6 +31,29 @@ def get_products():
                 )
             )
         
+        # Keyset pagination on (created_at, id), opt-in: ?cursor=<next_cursor> or ?pagination=cursor
+        from services.keyset_pagination import cursor_requested, keyset_page, pagination_payload, InvalidCursor
+        if cursor_requested(request.args):
+            try:
+                keyset = keyset_page(
+                    query, Product, per_page,
+                    cursor=request.args.get('cursor'),
+                    include_total=request.args.get('include_total', 'false').lower() in ['true', '1']
+                )
+            except InvalidCursor as e:
+                return jsonify({
+                    'success': False,
+                    'message': str(e)
+                }), 400
+            
+            return jsonify({
+                'success': True,
+                'data': {
+                    'products': [product.to_dict() for product in keyset['items']],
+                    'pagination': pagination_payload(keyset)
+                }
+            }), 200
+        
         # Pagination
         products = query.paginate(
             page=page, 
@@ -121,7 +144,7 @@ def search_products():
             }), 400
         
         from app import Product
-        products = Product.search_products(query)
+        products = Product.search_products(query, request.args.get('limit', 20, type=int))
         
         return jsonify({
             'success': True,
@@ -161,58 +184,10 @@ def recommend_products():
                 'message': 'Environment data is required'
             }), 400
         
-        # Get environment data from request
-        ph = data.get('ph')
-        temperature = data.get('temperature')
-        humidity = data.get('humidity')
-        rainfall = data.get('rainfall')
-        
-        # Get all products
+        # Check all products against the in-memory requirement index
         from app import Product
-        products = Product.query.filter_by(is_active=True).all()
-        recommendations = []
-        
-        for product in products:
-            if product.requirements:
-                # Check suitability
-                suitable, issues = product.requirements.is_suitable_for_environment(data)
-                
-                # Calculate suitability score
-                score = 0.0
-                if suitable:
-                    score = 1.0
-                else:
-                    # Calculate partial score based on how many requirements are met
-                    total_checks = 0
-                    passed_checks = 0
-                    
-                    if product.requirements.ph_min is not None or product.requirements.ph_max is not None:
-                        total_checks += 1
-                        if ph and product.requirements.ph_min <= ph <= product.requirements.ph_max:
-                            passed_checks += 1
-                    
-                    if product.requirements.temperature_min is not None or product.requirements.temperature_max is not None:
-                        total_checks += 1
-                        if temperature and product.requirements.temperature_min <= temperature <= product.requirements.temperature_max:
-                            passed_checks += 1
-                    
-                    if product.requirements.humidity_min is not None or product.requirements.humidity_max is not None:
-                        total_checks += 1
-                        if humidity and product.requirements.humidity_min <= humidity <= product.requirements.humidity_max:
-                            passed_checks += 1
-                    
-                    if total_checks > 0:
-                        score = passed_checks / total_checks
-                
-                recommendations.append({
-                    'product': product.to_dict(),
-                    'suitability_score': score,
-                    'suitable': suitable,
-                    'issues': issues
-                })
-        
-        # Sort by suitability score
-        recommendations.sort(key=lambda x: x['suitability_score'], reverse=True)
+        from services.requirement_index import get_requirement_index
+        recommendations = get_requirement_index(Product).match(data).ranked()
         
         return jsonify({
             'success': True,
@@ -271,6 +246,7 @@ def create_product():
             }), 400
         
         # Create product
+        from app import Product, ProductRequirements
         product = Product(
             name=name,
             category=category,
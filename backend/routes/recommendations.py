@@ -3,7 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.recommendation import Recommendation
 # User will be imported from app
 from models.product import Product
-from models.environment import Environment
+from models.environment import Environment, EnvironmentData
 from models.average_soil_data import AverageSoilData
 from flask import current_app
 from datetime import datetime
@@ -525,6 +525,29 @@ def get_user_recommendations():
         if recommendation_type:
             query = query.filter_by(recommendation_type=recommendation_type)
         
+        # Keyset pagination on (created_at, id), opt-in: ?cursor=<next_cursor> or ?pagination=cursor
+        from services.keyset_pagination import cursor_requested, keyset_page, pagination_payload, InvalidCursor
+        if cursor_requested(request.args):
+            try:
+                keyset = keyset_page(
+                    query, Recommendation, per_page,
+                    cursor=request.args.get('cursor'),
+                    include_total=request.args.get('include_total', 'false').lower() in ['true', '1']
+                )
+            except InvalidCursor as e:
+                return jsonify({
+                    'success': False,
+                    'message': str(e)
+                }), 400
+            
+            return jsonify({
+                'success': True,
+                'data': {
+                    'recommendations': [rec.to_dict() for rec in keyset['items']],
+                    'pagination': pagination_payload(keyset)
+                }
+            }), 200
+        
         # Pagination
         recommendations = query.order_by(Recommendation.created_at.desc()).paginate(
             page=page, 
@@ -760,7 +783,7 @@ def generate_recommendations():
                 'message': 'Environment ID is required for environment-to-product recommendations'
             }), 400
         
-        generated_recommendations = []
+        generated_payloads = []
         
         if recommendation_type == 'product_to_environment':
             # Generate recommendations for where to grow a specific product
@@ -771,35 +794,16 @@ def generate_recommendations():
                     'message': 'Product not found'
                 }), 404
             
-            # Get user's environments
+            # Latest data of all user environments in one query, one INSERT for all recommendations
             environments = Environment.get_user_environments(user_id)
+            latest_by_environment = EnvironmentData.get_latest_data_for_environments([e.id for e in environments])
             
-            for environment in environments:
-                latest_data = EnvironmentData.get_latest_data(environment.id)
-                if latest_data and product.requirements:
-                    suitable, issues = product.requirements.is_suitable_for_environment(latest_data)
-                    
-                    # Calculate scores
-                    suitability_score = 1.0 if suitable else 0.5
-                    confidence_score = 0.8 if suitable else 0.3
-                    
-                    # Create recommendation
-                    recommendation = Recommendation(
-                        user_id=user_id,
-                        product_id=product_id,
-                        environment_id=environment.id,
-                        recommendation_type=recommendation_type,
-                        confidence_score=confidence_score,
-                        suitability_score=suitability_score,
-                        title=f"Grow {product.name} in {environment.name}",
-                        description=f"Based on your environment data, {product.name} is {'suitable' if suitable else 'partially suitable'} for growing in {environment.name}.",
-                        benefits=f"Growing {product.name} in this environment can provide good yields with proper care.",
-                        challenges=", ".join(issues) if issues else "No major challenges identified.",
-                        suggestions=f"Ensure proper soil preparation and follow recommended growing practices for {product.name}."
-                    )
-                    
-                    current_app.extensions['sqlalchemy'].db.session.add(recommendation)
-                    generated_recommendations.append(recommendation)
+            from services.bulk_recommendations import generate_product_to_environment
+            generated_payloads = generate_product_to_environment(
+                current_app.extensions['sqlalchemy'].db.session, Recommendation, user_id, product,
+                environments, latest_by_environment,
+                maintain_counters=current_app.config.get('RECOMMENDATION_COUNTERS_ENABLED', False)
+            )
         
         elif recommendation_type == 'environment_to_product':
             # Generate recommendations for what to grow in a specific environment
@@ -822,42 +826,21 @@ def generate_recommendations():
                     'message': 'No environment data found for this environment'
                 }), 400
             
-            # Get all products
-            products = Product.query.filter_by(is_active=True).all()
-            
-            for product in products:
-                if product.requirements:
-                    suitable, issues = product.requirements.is_suitable_for_environment(latest_data)
-                    
-                    # Calculate scores
-                    suitability_score = 1.0 if suitable else 0.5
-                    confidence_score = 0.8 if suitable else 0.3
-                    
-                    # Create recommendation
-                    recommendation = Recommendation(
-                        user_id=user_id,
-                        product_id=product.id,
-                        environment_id=environment_id,
-                        recommendation_type=recommendation_type,
-                        confidence_score=confidence_score,
-                        suitability_score=suitability_score,
-                        title=f"Grow {product.name} in {environment.name}",
-                        description=f"Based on your environment data, {product.name} is {'highly suitable' if suitable else 'moderately suitable'} for growing in {environment.name}.",
-                        benefits=f"Growing {product.name} can be beneficial in this environment with proper care and attention.",
-                        challenges=", ".join(issues) if issues else "No major challenges identified.",
-                        suggestions=f"Follow recommended growing practices for {product.name} and monitor environmental conditions regularly."
-                    )
-                    
-                    current_app.extensions['sqlalchemy'].db.session.add(recommendation)
-                    generated_recommendations.append(recommendation)
+            # One query for products + requirements, one INSERT for all recommendations
+            from services.bulk_recommendations import generate_environment_to_product
+            generated_payloads = generate_environment_to_product(
+                current_app.extensions['sqlalchemy'].db.session, Product, Recommendation,
+                user_id, environment, latest_data,
+                maintain_counters=current_app.config.get('RECOMMENDATION_COUNTERS_ENABLED', False)
+            )
         
         current_app.extensions['sqlalchemy'].db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': f'Generated {len(generated_recommendations)} recommendations',
+            'message': f'Generated {len(generated_payloads)} recommendations',
             'data': {
-                'recommendations': [rec.to_dict() for rec in generated_recommendations]
+                'recommendations': generated_payloads
             }
         }), 201
         
@@ -883,37 +866,15 @@ def get_recommendation_stats():
                 'message': 'User not found'
             }), 404
         
-        # Get statistics
-        total_recommendations = Recommendation.query.filter_by(user_id=user_id).count()
-        active_recommendations = Recommendation.query.filter_by(user_id=user_id, status='active').count()
-        favorite_recommendations = Recommendation.query.filter_by(user_id=user_id, is_favorite=True).count()
-        implemented_recommendations = Recommendation.query.filter_by(user_id=user_id, status='implemented').count()
-        dismissed_recommendations = Recommendation.query.filter_by(user_id=user_id, status='dismissed').count()
-        
-        # Get recommendations by type
-        product_to_env = Recommendation.query.filter_by(
-            user_id=user_id, 
-            recommendation_type='product_to_environment'
-        ).count()
-        
-        env_to_product = Recommendation.query.filter_by(
-            user_id=user_id, 
-            recommendation_type='environment_to_product'
-        ).count()
+        # All counts from one grouped query (or the counters row when enabled)
+        from services.recommendation_stats import format_stats
+        counts = Recommendation.get_user_counts(user_id)
+        # Commit a counters row the first read backfilled
+        current_app.extensions['sqlalchemy'].db.session.commit()
         
         return jsonify({
             'success': True,
-            'data': {
-                'total_recommendations': total_recommendations,
-                'active_recommendations': active_recommendations,
-                'favorite_recommendations': favorite_recommendations,
-                'implemented_recommendations': implemented_recommendations,
-                'dismissed_recommendations': dismissed_recommendations,
-                'by_type': {
-                    'product_to_environment': product_to_env,
-                    'environment_to_product': env_to_product
-                }
-            }
+            'data': format_stats(counts)
         }), 200
         
     except Exception as e:
@@ -1314,6 +1275,50 @@ def get_all_average_soil_data():
             'error': str(e)
         }), 500
 
+@recommendations_bp.route('/average-soil-data/measurements', methods=['POST'])
+@jwt_required()
+@log_api_call
+def ingest_soil_measurements():
+    """Fold new crop measurements (single object or list) into the average soil data
+    
+    Internal endpoint: only served when SOIL_MEASUREMENT_INGEST_ENABLED is set.
+    """
+    logger = get_logger('routes.recommendations')
+    
+    if not current_app.config.get('SOIL_MEASUREMENT_INGEST_ENABLED', False):
+        return jsonify({
+            'success': False,
+            'message': 'Not found'
+        }), 404
+    
+    try:
+        data = request.get_json() or {}
+        measurements = data.get('measurements', data)
+        if isinstance(measurements, dict):
+            measurements = [measurements]
+        
+        if not measurements:
+            return jsonify({
+                'success': False,
+                'message': 'No measurements provided'
+            }), 400
+        
+        stats = AverageSoilData.ingest_measurements(measurements)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Measurements ingested successfully',
+            'data': stats
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error ingesting soil measurements: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Failed to ingest soil measurements',
+            'error': str(e)
+        }), 500
+
 @recommendations_bp.route('/average-soil-data/refresh', methods=['POST'])
 @jwt_required()
 @log_api_call
@@ -1322,60 +1327,17 @@ def refresh_average_soil_data():
     logger = get_logger('routes.recommendations')
     
     try:
-        from app import db
-        
-        # Execute the SQL query to get average data
-        sql_query = """
-        SELECT
-            soil_type,
-            region,
-            fertilizer_type,
-            irrigation_method,
-            weather_condition,
-            AVG("soil_ph"::numeric) AS avg_soil_ph,
-            AVG("nitrogen"::numeric) AS avg_nitrogen,
-            AVG("phosphorus"::numeric) AS avg_phosphorus,
-            AVG("potassium"::numeric) AS avg_potassium,
-            AVG("moisture"::numeric) AS avg_moisture,
-            AVG("temperature_celsius"::numeric) AS avg_temperature_celsius,
-            AVG("rainfall_mm"::numeric) AS avg_rainfall_mm
-        FROM
-            crop_dataset
-        GROUP BY
-            soil_type,
-            region,
-            fertilizer_type,
-            irrigation_method,
-            weather_condition
-        ORDER BY
-            region ASC,
-            soil_type ASC,
-            fertilizer_type ASC,
-            irrigation_method ASC,
-            weather_condition ASC
-        """
-        
-        result = db.session.execute(sql_query)
-        sql_results = [dict(row) for row in result]
-        
-        logger.info(f"SQL query returned {len(sql_results)} records")
-        
-        # Bulk insert the results
-        success = AverageSoilData.bulk_insert_from_sql_result(sql_results)
-        
-        if success:
-            logger.info("Successfully refreshed average soil data")
-            return jsonify({
-                'success': True,
-                'message': 'Average soil data refreshed successfully',
-                'records_updated': len(sql_results)
-            }), 200
-        else:
-            logger.error("Failed to refresh average soil data")
-            return jsonify({
-                'success': False,
-                'message': 'Failed to refresh average soil data'
-            }), 500
+        # Aggregates are computed into a staging table and swapped in atomically,
+        # readers keep seeing the previous rows until commit
+        stats = AverageSoilData.refresh_from_crop_dataset()
+        
+        logger.info("Successfully refreshed average soil data")
+        return jsonify({
+            'success': True,
+            'message': 'Average soil data refreshed successfully',
+            'records_updated': stats['rows_inserted'],
+            'data': stats
+        }), 200
             
     except Exception as e:
         logger.error(f"Error refreshing average soil data: {str(e)}")
@@ -124,23 +124,17 @@ def get_dashboard():
         environments = Environment.get_user_environments(user_id)
         
         # Get recent recommendations
-        from app import Recommendation
+        from models.recommendation import Recommendation
         recent_recommendations = Recommendation.query.filter_by(
             user_id=user_id, 
             status='active'
         ).order_by(Recommendation.created_at.desc()).limit(5).all()
         
-        # Get statistics
+        # Get statistics (one grouped query, or a primary-key read of the counters row)
+        counts = Recommendation.get_user_counts(user_id)
+        # Commit a counters row the first read backfilled
+        current_app.extensions['sqlalchemy'].db.session.commit()
         total_environments = len(environments)
-        total_recommendations = Recommendation.query.filter_by(user_id=user_id).count()
-        active_recommendations = Recommendation.query.filter_by(
-            user_id=user_id, 
-            status='active'
-        ).count()
-        favorite_recommendations = Recommendation.query.filter_by(
-            user_id=user_id, 
-            is_favorite=True
-        ).count()
         
         return jsonify({
             'success': True,
@@ -150,9 +144,9 @@ def get_dashboard():
                 'recent_recommendations': [rec.to_dict_summary() for rec in recent_recommendations],
                 'statistics': {
                     'total_environments': total_environments,
-                    'total_recommendations': total_recommendations,
-                    'active_recommendations': active_recommendations,
-                    'favorite_recommendations': favorite_recommendations
+                    'total_recommendations': counts['total'],
+                    'active_recommendations': counts['active'],
+                    'favorite_recommendations': counts['favorite']
                 }
             }
         }), 200
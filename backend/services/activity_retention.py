@@ -0,0 +1,305 @@
+"""
+Activity Log Retention
+Expires old user_activity_logs rows without loading them into the session.
+
+- PostgreSQL: the table can be converted once into monthly RANGE partitions on
+  created_at (partition_activity_logs); retention then drops whole expired
+  partitions and only batch-deletes the remainder of the boundary month.
+  A DEFAULT partition takes rows no monthly partition covers yet, so inserts
+  never fail; ensure_partitions (app startup and every retention run) moves them
+  into their month when it is created.
+- SQLite / unpartitioned tables: expired ids are selected and removed with
+  chunked DELETE ... WHERE id IN (...), one short transaction per batch, with
+  an optional pause between batches so writers are not starved.
+
+Schedule the retention run daily from the backend directory, e.g. cron:
+    15 3 * * * cd /app && python -m services.activity_retention --days-to-keep 90
+"""
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ACTIVITY_TABLE = 'user_activity_logs'
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_PAUSE_SECONDS = 0.1
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_PARTITION_SUFFIX = re.compile(r'_y(\d{4})m(\d{2})$')
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid table name: {name}")
+    return name
+
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_partitions(table: str, first: datetime, last: datetime) -> List[Tuple[str, datetime, datetime]]:
+    """(partition name, from, to) for every month from first through last"""
+    partitions = []
+    month = _month_start(first)
+    while month <= last:
+        upper = _next_month(month)
+        partitions.append((f"{table}_y{month.year:04d}m{month.month:02d}", month, upper))
+        month = upper
+    return partitions
+
+
+def default_partition_ddl(table: str) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+
+
+def month_partition_ddl(table: str, name: str, lower: datetime, upper: datetime) -> List[str]:
+    """
+    Statements adding one monthly partition next to the DEFAULT partition
+
+    Rows of the month that already landed in the DEFAULT partition are moved into the
+    new table before it is attached (ATTACH fails while DEFAULT holds rows of its range).
+    """
+    lower, upper = f"'{lower:%Y-%m-%d}'", f"'{upper:%Y-%m-%d}'"
+    return [
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)",
+        f"WITH moved AS (DELETE FROM {table}_default WHERE created_at >= {lower} AND created_at < {upper} "
+        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})",
+    ]
+
+
+def is_partitioned(session: Any, table: str = ACTIVITY_TABLE) -> bool:
+    if session.get_bind().dialect.name != 'postgresql':
+        return False
+    return bool(session.execute(text("""
+        SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :table
+    """), {'table': table}).scalar())
+
+
+def ensure_partitions(session: Any, table: str = ACTIVITY_TABLE, months_ahead: int = 2,
+                      now: Optional[datetime] = None) -> List[str]:
+    """Create the DEFAULT, current month's and months_ahead future partitions if missing"""
+    table = _identifier(table)
+    now = now or datetime.utcnow()
+    last = _month_start(now)
+    for _ in range(months_ahead):
+        last = _next_month(last)
+
+    created = []
+    try:
+        # Workers starting together: one creates, the others then see the partitions
+        session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {'table': table})
+        session.execute(text(default_partition_ddl(table)))
+        for name, lower, upper in month_partitions(table, now, last):
+            exists = session.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar()
+            if not exists:
+                for statement in month_partition_ddl(table, name, lower, upper):
+                    session.execute(text(statement))
+                created.append(name)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    if created:
+        logger.info(f"🗂️ {table}: created partitions {', '.join(created)}")
+    return created
+
+
+def partition_activity_logs(session: Any, table: str = ACTIVITY_TABLE, months_ahead: int = 2,
+                            now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    One-off migration of an existing table to monthly partitions (PostgreSQL)
+
+    Runs in a single transaction: the old table is renamed, a partitioned copy with
+    primary key (id, created_at), its monthly partitions and a DEFAULT partition are
+    created, rows are copied into their partitions and the old table is dropped. Rows without created_at get now().
+    """
+    table = _identifier(table)
+    if session.get_bind().dialect.name != 'postgresql':
+        raise ValueError("Partitioning is only supported on PostgreSQL")
+    if is_partitioned(session, table):
+        return {'table': table, 'partitioned': True, 'rows_copied': 0}
+
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    old = f"{table}_unpartitioned"
+    try:
+        first = session.execute(text(f"SELECT MIN(created_at) FROM {table}")).scalar() or now
+        # The old table keeps its primary key / index names until it is dropped
+        session.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+        session.execute(text(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+        ))
+        session.execute(text(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL"))
+
+        last = _month_start(now)
+        for _ in range(months_ahead):
+            last = _next_month(last)
+        partitions = month_partitions(table, min(first, now), last)
+        session.execute(text(default_partition_ddl(table)))
+        for name, lower, upper in partitions:
+            for statement in month_partition_ddl(table, name, lower, upper):
+                session.execute(text(statement))
+
+        session.execute(text(f"UPDATE {old} SET created_at = :now WHERE created_at IS NULL"), {'now': now})
+        rows_copied = session.execute(text(f"INSERT INTO {table} SELECT * FROM {old}")).rowcount
+        session.execute(text(f"DROP TABLE {old}"))
+
+        session.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)"))
+        session.execute(text(f"CREATE INDEX idx_activity_logs_created ON {table} (created_at)"))
+        session.execute(text(f"CREATE INDEX idx_activity_logs_user_created ON {table} (user_id, created_at)"))
+        session.execute(text(f"ALTER TABLE {table} ADD FOREIGN KEY (user_id) REFERENCES users (id)"))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"🗂️ {table}: partitioned into {len(partitions)} months, {rows_copied} rows in {duration_ms:.0f} ms")
+    return {'table': table, 'partitioned': True, 'partitions': len(partitions),
+            'rows_copied': rows_copied, 'duration_ms': round(duration_ms, 1)}
+
+
+def drop_expired_partitions(session: Any, cutoff: datetime, table: str = ACTIVITY_TABLE) -> List[str]:
+    """Drop monthly partitions whose whole range lies before cutoff"""
+    table = _identifier(table)
+    children = session.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :table
+    """), {'table': table}).scalars().all()
+
+    dropped = []
+    for name in sorted(children):
+        match = _PARTITION_SUFFIX.search(name)
+        if not match or not name.startswith(f"{table}_"):
+            continue
+        upper = _next_month(datetime(int(match.group(1)), int(match.group(2)), 1))
+        if upper <= cutoff:
+            session.execute(text(f"DROP TABLE {_identifier(name)}"))
+            session.commit()
+            dropped.append(name)
+            logger.info(f"🗑️ {table}: dropped partition {name}")
+    return dropped
+
+
+def _log_progress(progress: Dict[str, Any]):
+    total = progress['total_estimate']
+    share = f" / ~{total} ({progress['rows_deleted'] / total * 100:.0f}%)" if total else ''
+    logger.info(f"🧹 {progress['table']}: batch {progress['batches']}, "
+                f"{progress['rows_deleted']}{share} rows deleted, {progress['rows_per_second']:.0f} rows/s")
+
+
+def purge_in_batches(session: Any, cutoff: datetime, table: str = ACTIVITY_TABLE,
+                     batch_size: int = DEFAULT_BATCH_SIZE, pause_seconds: float = DEFAULT_PAUSE_SECONDS,
+                     progress: Optional[Callable[[Dict[str, Any]], None]] = _log_progress,
+                     max_batches: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Delete rows with created_at < cutoff in chunks of batch_size ids
+
+    Each batch is its own short transaction (select ids, DELETE ... WHERE id IN,
+    commit), so locks are held briefly and memory stays bounded; progress is
+    called after every batch and pause_seconds is slept between batches.
+    """
+    table = _identifier(table)
+    started = time.perf_counter()
+    total_estimate = session.execute(
+        text(f"SELECT COUNT(*) FROM {table} WHERE created_at < :cutoff"), {'cutoff': cutoff}
+    ).scalar()
+    select_ids = text(f"SELECT id FROM {table} WHERE created_at < :cutoff LIMIT :limit")
+    delete_ids = text(f"DELETE FROM {table} WHERE id IN :ids").bindparams(bindparam('ids', expanding=True))
+
+    rows_deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        try:
+            ids = session.execute(select_ids, {'cutoff': cutoff, 'limit': batch_size}).scalars().all()
+            if not ids:
+                session.commit()
+                break
+            rows_deleted += session.execute(delete_ids, {'ids': ids}).rowcount
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        batches += 1
+
+        if progress:
+            elapsed = time.perf_counter() - started
+            progress({'table': table, 'batches': batches, 'rows_deleted': rows_deleted,
+                      'total_estimate': total_estimate,
+                      'rows_per_second': rows_deleted / elapsed if elapsed else 0.0})
+        if len(ids) < batch_size:
+            break
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+    return {'rows_deleted': rows_deleted, 'batches': batches, 'total_estimate': total_estimate,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+
+def purge_expired_activity(session: Any, days_to_keep: int = 90, table: str = ACTIVITY_TABLE,
+                           batch_size: int = DEFAULT_BATCH_SIZE, pause_seconds: float = DEFAULT_PAUSE_SECONDS,
+                           progress: Optional[Callable[[Dict[str, Any]], None]] = _log_progress,
+                           now: Optional[datetime] = None, months_ahead: int = 2) -> Dict[str, Any]:
+    """
+    Retention entry point: partition drop when the table is partitioned, batched delete otherwise
+
+    On a partitioned table future partitions are also topped up, so the job that
+    expires data is the same one that keeps inserts from failing.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=days_to_keep)
+    logger.info(f"🧹 {table}: removing activity older than {cutoff:%Y-%m-%d %H:%M}")
+
+    dropped, created = [], []
+    partitioned = is_partitioned(session, table)
+    if partitioned:
+        created = ensure_partitions(session, table, months_ahead=months_ahead, now=now)
+        dropped = drop_expired_partitions(session, cutoff, table)
+
+    # Partitioned: only the boundary month is left to delete from
+    result = purge_in_batches(session, cutoff, table, batch_size=batch_size,
+                              pause_seconds=pause_seconds, progress=progress)
+    result.update({'mode': 'partitions' if partitioned else 'batches', 'cutoff': cutoff.isoformat(),
+                   'partitions_dropped': dropped, 'partitions_created': created})
+    logger.info(f"✅ {table}: {len(dropped)} partitions dropped, {result['rows_deleted']} rows deleted "
+                f"in {result['batches']} batches")
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    parser = argparse.ArgumentParser(description='Expire old user activity logs')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'sqlite:///terramind.db'))
+    parser.add_argument('--days-to-keep', type=int, default=int(os.getenv('ACTIVITY_LOG_RETENTION_DAYS', 90)))
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--pause', type=float, default=DEFAULT_PAUSE_SECONDS, help='Seconds to sleep between batches')
+    parser.add_argument('--months-ahead', type=int, default=2, help='Future monthly partitions to keep ready')
+    parser.add_argument('--partition', action='store_true',
+                        help='Convert the table to monthly partitions (PostgreSQL, one-off)')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        if args.partition:
+            result = partition_activity_logs(session, months_ahead=args.months_ahead)
+        else:
+            result = purge_expired_activity(session, args.days_to_keep, batch_size=args.batch_size,
+                                            pause_seconds=args.pause, months_ahead=args.months_ahead)
+    print(json.dumps(result, indent=2))
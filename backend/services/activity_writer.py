@@ -0,0 +1,185 @@
+"""
+Activity Writer
+Buffered background writer for user_activity_logs. Requests only put a dict on a
+bounded in-memory queue; a daemon thread drains it and writes batches with one
+executemany INSERT per batch, when batch_size records are waiting or every
+flush_interval seconds.
+
+- Backpressure: submit waits at most enqueue_timeout for room in the queue, then
+  drops the record and counts it (stats()['dropped']).
+- Fork safety: the thread is started lazily in the process that submits, so a
+  writer created before gunicorn forks (preload_app) works in every worker.
+- Shutdown: close() drains the queue; it runs from atexit and from the gunicorn
+  worker_exit hook (shutdown_activity_writer).
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+_STOP = object()
+
+
+class ActivityWriter:
+    """Bounded queue + background thread doing bulk inserts into one table"""
+
+    def __init__(self, engine: Any, table: Any, max_queue: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 enqueue_timeout: float = 0.0):
+        self.engine = engine
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """Queue one row for insertion; False if it was dropped (overload or closed)"""
+        if self._closed:
+            self._count('dropped')
+            return False
+        self._ensure_thread()
+        try:
+            if self.enqueue_timeout:
+                self._queue.put(record, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            dropped = self._count('dropped')
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"⚠️ Activity log queue full, {dropped} records dropped so far")
+            return False
+        self._count('enqueued')
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued before this call is written"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting records, drain the queue and stop the thread"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        stats = self.stats()
+        logger.info(f"📝 Activity writer closed: {stats['written']} written, "
+                    f"{stats['dropped']} dropped, {stats['failed']} failed")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, queued=self._queue.qsize())
+
+    def _count(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            self._counters[name] += amount
+            return self._counters[name]
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked child: the parent's thread and buffered items do not belong to us
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, dict):
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+            elif item is None and time.monotonic() < deadline:
+                continue
+
+            self._write(batch)
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                self._drain()
+                return
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, dict):
+                batch.append(item)
+            elif isinstance(item, threading.Event):
+                item.set()
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(self.table.insert(), batch)
+        except Exception as e:
+            self._count('failed', len(batch))
+            logger.error(f"❌ Activity log batch of {len(batch)} failed: {str(e)}")
+            return
+        self._count('written', len(batch))
+        self._count('batches')
+
+
+_writer: Optional[ActivityWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_activity_writer(engine: Any = None, table: Any = None, **settings) -> Optional[ActivityWriter]:
+    """Process-wide writer; created on the first call that passes engine and table"""
+    global _writer
+    if _writer is None and engine is not None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ActivityWriter(engine, table, **settings)
+                atexit.register(_writer.close)
+                logger.info(f"📝 Activity writer ready (queue {_writer._queue.maxsize}, "
+                            f"batch {_writer.batch_size}, every {_writer.flush_interval}s)")
+    return _writer
+
+
+def shutdown_activity_writer(timeout: float = 10.0):
+    """Flush and stop the writer (gunicorn worker_exit hook)"""
+    if _writer is not None:
+        _writer.close(timeout)
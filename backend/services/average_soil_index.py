@@ -0,0 +1,110 @@
+"""
+Average Soil Data Index
+Per-process, versioned in-memory copy of the average_soil_data table keyed by the
+get_best_match fallback levels, so a best-match lookup is a few dict probes instead
+of up to five sequential queries
+"""
+import copy
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from services.cached_index import CachedIndex
+
+CONDITION_FIELDS = ('soil_type', 'region', 'fertilizer_type', 'irrigation_method', 'weather_condition')
+
+# exact -> region+soil -> region -> soil -> any (empty tuple)
+FALLBACK_LEVELS: Tuple[Tuple[str, ...], ...] = (
+    CONDITION_FIELDS,
+    ('region', 'soil_type'),
+    ('region',),
+    ('soil_type',),
+    (),
+)
+
+
+class IndexedRecord:
+    """Read-only, session-independent snapshot of an average soil data row"""
+
+    def __init__(self, record: Any):
+        for field in CONDITION_FIELDS:
+            setattr(self, field, getattr(record, field))
+        self.id = record.id
+        self._data = record.to_dict()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._data)
+
+    def __repr__(self):
+        return f'<IndexedRecord {self.region}-{self.soil_type}>'
+
+
+class AverageSoilIndex(CachedIndex):
+    """
+    Hierarchical dict index over one AverageSoilData model
+
+    Each fallback level maps its key tuple to the first row with those values (same
+    row order as query.all(), matching query.first()). Refreshed as a CachedIndex:
+    rebuilt after local writes (invalidate) and when the count / max(created_at) /
+    max(last_updated) fingerprint changes.
+    """
+
+    label = 'Average soil index'
+
+    def __init__(self, model_cls: Any, levels: Iterable[Tuple[str, ...]] = FALLBACK_LEVELS,
+                 refresh_interval: float = 60.0):
+        super().__init__(model_cls, refresh_interval)
+        self.levels = tuple(tuple(level) for level in levels)
+        self._tables: Dict[Tuple[str, ...], Dict[tuple, IndexedRecord]] = {}
+
+    def _read_fingerprint(self):
+        from sqlalchemy import func
+        model = self.model_cls
+        # Upserts (ingest_measurements) change rows in place: only the update timestamp moves
+        updated = getattr(model, 'last_updated', None) or getattr(model, 'updated_at', None)
+        columns = [func.count(model.id), func.max(model.created_at)]
+        if updated is not None:
+            columns.append(func.max(updated))
+        return tuple(model.query.with_entities(*columns).one())
+
+    def _load_rows(self):
+        return self.model_cls.query.all()
+
+    def _swap_in(self, records: Iterable[Any]) -> int:
+        tables = {level: {} for level in self.levels}
+        count = 0
+        for record in records:
+            snapshot = IndexedRecord(record)
+            for level, table in tables.items():
+                table.setdefault(tuple(getattr(snapshot, f) for f in level), snapshot)
+            count += 1
+        self._tables = tables
+        return count
+
+    def lookup(self, **conditions) -> Tuple[Optional[IndexedRecord], Optional[int]]:
+        """
+        Best match for the given conditions
+
+        Returns:
+            (record, level): record of the first level that matches and that level's
+            position in self.levels, or (None, None)
+        """
+        self._ensure_fresh()
+        tables = self._tables
+        for position, level in enumerate(self.levels):
+            record = tables[level].get(tuple(conditions.get(f) for f in level))
+            if record is not None:
+                return record, position
+        return None, None
+
+
+_indexes: Dict[Any, AverageSoilIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def get_average_soil_index(model_cls: Any, levels: Iterable[Tuple[str, ...]] = FALLBACK_LEVELS) -> AverageSoilIndex:
+    """Process-wide index for a model class (created on first use)"""
+    index = _indexes.get(model_cls)
+    if index is None:
+        with _registry_lock:
+            index = _indexes.setdefault(model_cls, AverageSoilIndex(model_cls, levels))
+    return index
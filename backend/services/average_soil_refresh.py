@@ -0,0 +1,423 @@
+"""
+Average Soil Data Refresh
+Recomputes average_soil_data from crop_dataset entirely inside the database:
+the GROUP BY is materialized into a staging table with INSERT ... SELECT and then
+swapped into the live table within the same transaction, so readers keep seeing the
+previous rows until commit and never an empty table.
+
+New measurements are folded in incrementally with one upsert per affected group
+(running average weighted by data_count); the full recompute is then only needed
+as an occasional consistency check (see find_drift).
+
+Where there is no crop_dataset table (SQLite dev / edge deployments), the averages
+can be built out-of-core from a CSV or Parquet export (aggregate_file / load_from_file).
+"""
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Mapping
+
+import pandas as pd
+from sqlalchemy import inspect, text
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+GROUP_COLUMNS = ('soil_type', 'region', 'fertilizer_type', 'irrigation_method', 'weather_condition')
+
+# average_soil_data column -> crop_dataset column
+AVERAGE_COLUMNS = {
+    'avg_soil_ph': 'soil_ph',
+    'avg_nitrogen': 'nitrogen',
+    'avg_phosphorus': 'phosphorus',
+    'avg_potassium': 'potassium',
+    'avg_moisture': 'moisture',
+    'avg_temperature_celsius': 'temperature_celsius',
+    'avg_rainfall_mm': 'rainfall_mm',
+}
+
+# app.py's AverageSoilData stores the averages under these names
+LEGACY_COLUMNS = {
+    'avg_soil_ph': 'ph',
+    'avg_nitrogen': 'nitrogen',
+    'avg_phosphorus': 'phosphorus',
+    'avg_potassium': 'potassium',
+    'avg_moisture': 'humidity',
+    'avg_temperature_celsius': 'temperature',
+    'avg_rainfall_mm': 'rainfall',
+}
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid table name: {name}")
+    return name
+
+
+def _uuid_expression(dialect: str) -> str:
+    if dialect == 'postgresql':
+        return 'gen_random_uuid()::text'
+    # SQLite / others: 32 hex chars, fits String(36)
+    return 'lower(hex(randomblob(16)))'
+
+
+def aggregate_select(source_table: str = 'crop_dataset') -> str:
+    """GROUP BY over the source table; CAST keeps TEXT-loaded crop tables working"""
+    averages = ',\n            '.join(
+        f'AVG(CAST("{source}" AS NUMERIC)) AS {target}' for target, source in AVERAGE_COLUMNS.items()
+    )
+    group_by = ', '.join(GROUP_COLUMNS)
+    return f"""
+        SELECT
+            {group_by},
+            {averages},
+            COUNT(*) AS data_count
+        FROM {_identifier(source_table)}
+        WHERE {' AND '.join(f'{c} IS NOT NULL' for c in GROUP_COLUMNS)}
+        GROUP BY {group_by}
+    """
+
+
+def refresh_average_soil_data(session: Any, source_table: str = 'crop_dataset',
+                              target_table: str = 'average_soil_data') -> Dict[str, Any]:
+    """
+    Atomically replace target_table with fresh aggregates of source_table
+
+    Runs in one transaction on the given session: CREATE TEMP TABLE ... AS <GROUP BY>
+    (uniquely named, always addressed through the temp schema),
+    DELETE live rows, INSERT ... SELECT from staging, COMMIT. Nothing is fetched into
+    Python. On error the transaction is rolled back and the old rows stay in place.
+
+    Returns:
+        dict with rows_staged, rows_deleted, rows_inserted and per-phase durations (ms)
+    """
+    target = _identifier(target_table)
+    dialect = session.get_bind().dialect.name
+    # Unique per call: never collides with (or drops) a permanent table of the same name
+    staging = f'{target}_staging_{uuid.uuid4().hex[:12]}'
+    staging_ref = {'postgresql': f'pg_temp.{staging}', 'sqlite': f'temp.{staging}'}.get(dialect, staging)
+    columns = GROUP_COLUMNS + tuple(AVERAGE_COLUMNS) + ('data_count',)
+    column_list = ', '.join(columns)
+    now = datetime.utcnow()
+
+    started = time.perf_counter()
+    try:
+        session.execute(text(f'CREATE TEMP TABLE {staging} AS {aggregate_select(source_table)}'))
+        rows_staged = session.execute(text(f'SELECT COUNT(*) FROM {staging_ref}')).scalar()
+        aggregated = time.perf_counter()
+
+        if rows_staged == 0:
+            # Keep the current data instead of swapping in an empty table
+            raise ValueError(f"{source_table} produced no aggregate rows")
+
+        rows_deleted = session.execute(text(f'DELETE FROM {target}')).rowcount
+        rows_inserted = session.execute(text(f"""
+            INSERT INTO {target} (id, {column_list}, last_updated, created_at)
+            SELECT {_uuid_expression(dialect)}, {column_list}, :now, :now
+            FROM {staging_ref}
+            ORDER BY region, soil_type, fertilizer_type, irrigation_method, weather_condition
+        """), {'now': now}).rowcount
+        session.execute(text(f'DROP TABLE {staging_ref}'))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finished = time.perf_counter()
+
+    stats = {
+        'rows_staged': rows_staged,
+        'rows_deleted': rows_deleted,
+        'rows_inserted': rows_inserted,
+        'aggregate_ms': round((aggregated - started) * 1000, 1),
+        'swap_ms': round((finished - aggregated) * 1000, 1),
+        'duration_ms': round((finished - started) * 1000, 1),
+    }
+    logger.info(
+        f"🔄 {target} refreshed from {source_table}: {rows_deleted} -> {rows_inserted} rows "
+        f"in {stats['duration_ms']}ms (aggregate {stats['aggregate_ms']}ms, swap {stats['swap_ms']}ms)"
+    )
+    return stats
+
+
+def _aggregate_batch(measurements: Iterable[Mapping[str, Any]]):
+    """Group a batch by condition columns: {key: [count, sums...]}; incomplete rows are rejected"""
+    groups = {}
+    accepted = []
+    rejected = 0
+    for row in measurements:
+        try:
+            key = tuple(row[c] for c in GROUP_COLUMNS)
+            values = [float(row[source]) for source in AVERAGE_COLUMNS.values()]
+        except (KeyError, TypeError, ValueError):
+            rejected += 1
+            continue
+        if any(k is None for k in key):
+            rejected += 1
+            continue
+
+        totals = groups.setdefault(key, [0] + [0.0] * len(values))
+        totals[0] += 1
+        for i, value in enumerate(values, start=1):
+            totals[i] += value
+        accepted.append(row)
+    return groups, accepted, rejected
+
+
+def ingest_measurements(session: Any, measurements: Iterable[Mapping[str, Any]],
+                        source_table: str = 'crop_dataset', target_table: str = 'average_soil_data',
+                        store_raw: bool = False) -> Dict[str, Any]:
+    """
+    Fold new crop measurements into the running averages
+
+    The batch is pre-aggregated per condition group and written with one
+    INSERT ... ON CONFLICT (conditions) DO UPDATE per group (PostgreSQL / SQLite >= 3.24):
+    new_avg = (avg * data_count + batch_avg * batch_count) / (data_count + batch_count).
+    With store_raw the accepted rows are also appended to source_table in the same
+    transaction, so a later full refresh reproduces the same averages; source_table
+    must then exist (it does not on SQLite dev / edge deployments).
+
+    Returns:
+        dict with rows_accepted, rows_rejected, groups_upserted and duration_ms
+    """
+    target = _identifier(target_table)
+    dialect = session.get_bind().dialect.name
+    started = time.perf_counter()
+    if store_raw and not inspect(session.get_bind()).has_table(_identifier(source_table)):
+        raise ValueError(f"store_raw needs the {source_table} table, which does not exist")
+
+    groups, accepted, rejected = _aggregate_batch(measurements)
+    if not groups:
+        return {'rows_accepted': 0, 'rows_rejected': rejected, 'groups_upserted': 0, 'duration_ms': 0.0}
+
+    averages = tuple(AVERAGE_COLUMNS)
+    columns = GROUP_COLUMNS + averages + ('data_count',)
+    merge = ',\n                '.join(
+        f'{c} = ({target}.{c} * {target}.data_count + excluded.{c} * excluded.data_count) '
+        f'/ ({target}.data_count + excluded.data_count)'
+        for c in averages
+    )
+    upsert = text(f"""
+        INSERT INTO {target} (id, {', '.join(columns)}, last_updated, created_at)
+        VALUES ({_uuid_expression(dialect)}, {', '.join(':' + c for c in columns)}, :now, :now)
+        ON CONFLICT ({', '.join(GROUP_COLUMNS)}) DO UPDATE SET
+                {merge},
+                data_count = {target}.data_count + excluded.data_count,
+                last_updated = excluded.last_updated
+    """)
+
+    now = datetime.utcnow()
+    params = []
+    for key, (count, *sums) in groups.items():
+        row = dict(zip(GROUP_COLUMNS, key))
+        row.update({c: total / count for c, total in zip(averages, sums)})
+        row.update({'data_count': count, 'now': now})
+        params.append(row)
+
+    try:
+        if store_raw:
+            raw_columns = GROUP_COLUMNS + tuple(AVERAGE_COLUMNS.values())
+            if all('crop' in row for row in accepted):
+                raw_columns += ('crop',)
+            session.execute(
+                text(f"INSERT INTO {_identifier(source_table)} ({', '.join(raw_columns)}) "
+                     f"VALUES ({', '.join(':' + c for c in raw_columns)})"),
+                [{c: row[c] for c in raw_columns} for row in accepted]
+            )
+        session.execute(upsert, params)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    stats = {
+        'rows_accepted': len(accepted),
+        'rows_rejected': rejected,
+        'groups_upserted': len(params),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(
+        f"➕ {target}: {stats['rows_accepted']} measurements folded into {stats['groups_upserted']} groups "
+        f"({stats['rows_rejected']} rejected) in {stats['duration_ms']}ms"
+    )
+    return stats
+
+
+def find_drift(session: Any, source_table: str = 'crop_dataset', target_table: str = 'average_soil_data',
+               tolerance: float = 0.01) -> Dict[str, Any]:
+    """
+    Consistency check of the incrementally maintained rows against a full GROUP BY
+
+    Returns:
+        dict with groups (in the source), missing (no live row), drifted (count differs or
+        any average off by more than tolerance) and extra (live rows without source data)
+    """
+    target = _identifier(target_table)
+    join = ' AND '.join(f'a.{c} = t.{c}' for c in GROUP_COLUMNS)
+    differs = ' OR '.join(
+        ['a.data_count <> t.data_count'] + [f'ABS(a.{c} - t.{c}) > :tolerance' for c in AVERAGE_COLUMNS]
+    )
+    row = session.execute(text(f"""
+        SELECT
+            COUNT(*) AS groups,
+            SUM(CASE WHEN t.id IS NULL THEN 1 ELSE 0 END) AS missing,
+            SUM(CASE WHEN t.id IS NOT NULL AND ({differs}) THEN 1 ELSE 0 END) AS drifted,
+            (SELECT COUNT(*) FROM {target}) - SUM(CASE WHEN t.id IS NULL THEN 0 ELSE 1 END) AS extra
+        FROM ({aggregate_select(source_table)}) a
+        LEFT JOIN {target} t ON {join}
+    """), {'tolerance': tolerance}).one()
+
+    report = {key: int(value or 0) for key, value in row._mapping.items()}
+    logger.info(f"🔍 {target} drift check: {report}")
+    return report
+
+
+def _iter_file_chunks(path: str, columns, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Read only the needed columns of a CSV / Parquet file, chunk_size rows at a time"""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow)") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=list(columns)):
+            yield batch.to_pandas()
+    else:
+        dtypes = {c: 'category' for c in GROUP_COLUMNS}
+        yield from pd.read_csv(path, usecols=list(columns), dtype=dtypes, chunksize=chunk_size)
+
+
+def aggregate_file(path: str, chunk_size: int = 500_000) -> pd.DataFrame:
+    """
+    Per-group averages of a crop dataset file with memory bounded by chunk_size
+
+    Each chunk is reduced with a vectorized groupby to per-group sums, non-null counts and
+    row counts; the partials (at most one row per group) are merged as the file streams,
+    so AVG semantics match the SQL GROUP BY (NULLs are skipped per column).
+    """
+    sources = list(AVERAGE_COLUMNS.values())
+    partial = None
+    rows = 0
+    for chunk in _iter_file_chunks(path, GROUP_COLUMNS + tuple(sources), chunk_size):
+        rows += len(chunk)
+        chunk = chunk.dropna(subset=list(GROUP_COLUMNS))
+        chunk[sources] = chunk[sources].apply(pd.to_numeric, errors='coerce')
+        grouped = chunk.groupby(list(GROUP_COLUMNS), observed=True)
+        reduced = pd.concat([
+            grouped[sources].sum().add_prefix('sum_'),
+            grouped[sources].count().add_prefix('n_'),
+            grouped.size().rename('data_count'),
+        ], axis=1)
+        reduced.index = reduced.index.map(lambda key: tuple(str(k) for k in key))
+        partial = reduced if partial is None else partial.add(reduced, fill_value=0)
+
+    if partial is None:
+        return pd.DataFrame(columns=list(GROUP_COLUMNS) + list(AVERAGE_COLUMNS) + ['data_count'])
+
+    result = pd.DataFrame(
+        {target: partial[f'sum_{source}'] / partial[f'n_{source}'] for target, source in AVERAGE_COLUMNS.items()}
+    )
+    result['data_count'] = partial['data_count'].astype(int)
+    result.index = pd.MultiIndex.from_tuples(result.index, names=GROUP_COLUMNS)
+    result = result.dropna().reset_index().sort_values(
+        ['region', 'soil_type', 'fertilizer_type', 'irrigation_method', 'weather_condition']
+    )
+    logger.info(f"📊 {path}: {rows} rows -> {len(result)} groups")
+    return result
+
+
+def _ensure_target_table(session: Any, target: str):
+    """Return the target's column names, creating it with the models/ layout if it is missing"""
+    bind = session.get_bind()
+    if inspect(bind).has_table(target):
+        return {c['name'] for c in inspect(bind).get_columns(target)}
+
+    conditions = ', '.join(f'{c} VARCHAR(50) NOT NULL' for c in GROUP_COLUMNS)
+    averages = ', '.join(f'{c} NUMERIC NOT NULL' for c in AVERAGE_COLUMNS)
+    session.execute(text(f"""
+        CREATE TABLE {target} (
+            id VARCHAR(36) PRIMARY KEY, {conditions}, {averages},
+            data_count INTEGER, last_updated TIMESTAMP, created_at TIMESTAMP,
+            CONSTRAINT unique_environmental_conditions UNIQUE ({', '.join(GROUP_COLUMNS)})
+        )
+    """))
+    return set(GROUP_COLUMNS) | set(AVERAGE_COLUMNS) | {'id', 'data_count', 'last_updated', 'created_at'}
+
+
+def load_from_file(session: Any, path: str, target_table: str = 'average_soil_data',
+                   chunk_size: int = 500_000) -> Dict[str, Any]:
+    """
+    Build average_soil_data from a CSV / Parquet crop dataset without a crop_dataset table
+
+    The aggregates are swapped in with a DELETE + bulk INSERT in one transaction. Both the
+    models/ (avg_*) and the app.py (ph, nitrogen, ...) column layouts are supported.
+    """
+    target = _identifier(target_table)
+    started = time.perf_counter()
+    averages = aggregate_file(path, chunk_size)
+    aggregated = time.perf_counter()
+    if averages.empty:
+        raise ValueError(f"{path} produced no aggregate rows")
+
+    try:
+        existing = _ensure_target_table(session, target)
+        names = {c: c if c in existing else LEGACY_COLUMNS[c] for c in AVERAGE_COLUMNS}
+        metadata = [c for c in ('data_count', 'last_updated', 'updated_at', 'created_at') if c in existing]
+        columns = ['id', *GROUP_COLUMNS, *names.values(), *metadata]
+
+        now = datetime.utcnow()
+        records = averages.rename(columns=names).to_dict('records')
+        for record in records:
+            record['id'] = str(uuid.uuid4())
+            for c in metadata:
+                record.setdefault(c, now)
+        params = [{c: record[c] for c in columns} for record in records]
+
+        rows_deleted = session.execute(text(f'DELETE FROM {target}')).rowcount
+        session.execute(
+            text(f"INSERT INTO {target} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"),
+            params
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finished = time.perf_counter()
+
+    stats = {
+        'rows_deleted': rows_deleted,
+        'rows_inserted': len(params),
+        'source_rows': int(averages['data_count'].sum()),
+        'aggregate_ms': round((aggregated - started) * 1000, 1),
+        'swap_ms': round((finished - aggregated) * 1000, 1),
+        'duration_ms': round((finished - started) * 1000, 1),
+    }
+    logger.info(f"✅ {target} loaded from {path}: {stats}")
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    parser = argparse.ArgumentParser(description='Refresh average_soil_data from crop_dataset or a CSV/Parquet file')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'sqlite:///terramind.db'))
+    parser.add_argument('--from-file', help='Aggregate this CSV / Parquet file instead of the crop_dataset table')
+    parser.add_argument('--chunk-size', type=int, default=500_000)
+    parser.add_argument('--source-table', default='crop_dataset')
+    parser.add_argument('--check', action='store_true', help='Only report drift against a full GROUP BY')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        if args.from_file:
+            result = load_from_file(session, args.from_file, chunk_size=args.chunk_size)
+        elif args.check:
+            result = find_drift(session, args.source_table)
+        else:
+            result = refresh_average_soil_data(session, args.source_table)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,190 @@
+"""
+Bulk Recommendations
+Set-based pipeline behind POST /api/recommendations/generate: products and their
+requirements (or the latest data of all user environments) are loaded with one
+query, every pair is checked with broadcast numpy interval comparisons, all recommendations are written with
+one executemany INSERT and the response is built from the inserted rows without
+reading them back.
+
+The checks are the ones of ProductRequirements.is_suitable_for_environment
+(pH, temperature, humidity; a bound of 0 / None means "no bound").
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import contains_eager
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (EnvironmentData attribute / requirement prefix, label used in issue messages)
+SUITABILITY_CHECKS = (('ph', 'pH'), ('temperature', 'Temperature'), ('humidity', 'Humidity'))
+
+# Recommendation columns that are required but not produced by a trained model here
+RULE_MODEL = {'model_type': 'requirements_match', 'model_version': 'v1.0', 'algorithm': 'interval_check'}
+
+
+def _bound(value: Any) -> float:
+    return float(value) if value else np.nan
+
+
+def requirement_bounds(requirements: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """(mins, maxs) arrays of shape (len(requirements), len(SUITABILITY_CHECKS)); NaN = no bound"""
+    mins = np.array([[_bound(getattr(r, f'{name}_min')) for name, _ in SUITABILITY_CHECKS] for r in requirements],
+                    dtype=float).reshape(-1, len(SUITABILITY_CHECKS))
+    maxs = np.array([[_bound(getattr(r, f'{name}_max')) for name, _ in SUITABILITY_CHECKS] for r in requirements],
+                    dtype=float).reshape(-1, len(SUITABILITY_CHECKS))
+    return mins, maxs
+
+
+def environment_values(environment_data: Sequence[Any]) -> np.ndarray:
+    """Measured values, shape (len(environment_data), len(SUITABILITY_CHECKS)); NaN = not measured"""
+    return np.array([[np.nan if getattr(d, name) is None else float(getattr(d, name)) for name, _ in SUITABILITY_CHECKS]
+                     for d in environment_data], dtype=float).reshape(-1, len(SUITABILITY_CHECKS))
+
+
+def check_intervals(values: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Broadcast interval check
+
+    values / mins / maxs broadcast against each other (one environment against n
+    products, or m environments against one product). Returns (suitable, too_low,
+    too_high); NaN on either side never counts as a violation.
+    """
+    values, mins, maxs = (np.asarray(a, dtype=float) for a in (values, mins, maxs))
+    with np.errstate(invalid='ignore'):
+        too_low = values < mins
+        too_high = values > maxs
+    suitable = ~(too_low | too_high).any(axis=-1)
+    return suitable, too_low, too_high
+
+
+def describe_issues(too_low: np.ndarray, too_high: np.ndarray, values: np.ndarray,
+                    mins: np.ndarray, maxs: np.ndarray) -> List[List[str]]:
+    """Issue messages per row, in the order is_suitable_for_environment reports them"""
+    values, mins, maxs = np.broadcast_arrays(values, mins, maxs)
+    issues = [[] for _ in range(too_low.shape[0])]
+    for row in np.flatnonzero((too_low | too_high).any(axis=-1)):
+        for column, (_, label) in enumerate(SUITABILITY_CHECKS):
+            value = values[row, column].item()
+            if too_low[row, column]:
+                issues[row].append(f"{label} too low: {value} < {mins[row, column].item()}")
+            if too_high[row, column]:
+                issues[row].append(f"{label} too high: {value} > {maxs[row, column].item()}")
+    return issues
+
+
+def load_products_with_requirements(product_cls: Any) -> List[Any]:
+    """Active products that have requirements, requirements populated by the same query"""
+    return product_cls.query.join(product_cls.requirements).options(
+        contains_eager(product_cls.requirements)
+    ).filter(product_cls.is_active == True).all()
+
+
+def insert_recommendations(session: Any, recommendation_cls: Any, rows: List[Dict[str, Any]],
+                           maintain_counters: bool = False):
+    """
+    All rows with one executemany INSERT (no ORM objects, no flush per row)
+
+    The bulk INSERT bypasses before_flush, so user_recommendation_counters are
+    updated here when they are enabled.
+    """
+    if not rows:
+        return
+    session.execute(insert(recommendation_cls), rows)
+    if maintain_counters:
+        from services.recommendation_stats import apply_counter_deltas, inserted_row_deltas
+        apply_counter_deltas(session.connection(), inserted_row_deltas(rows))
+
+
+def _row(user_id: str, product_id: str, environment_id: str, recommendation_type: str,
+         suitable: bool, now: datetime, **content) -> Dict[str, Any]:
+    return dict(
+        id=str(uuid.uuid4()), user_id=user_id, product_id=product_id, environment_id=environment_id,
+        model_result_id=None, recommendation_type=recommendation_type,
+        confidence_score=0.8 if suitable else 0.3, suitability_score=1.0 if suitable else 0.5,
+        input_parameters=None, status='active', is_favorite=False, view_count=0, last_viewed_at=None,
+        created_at=now, updated_at=now, **RULE_MODEL, **content
+    )
+
+
+def recommendation_payload(row: Dict[str, Any], product: Dict[str, Any], environment: Dict[str, Any]) -> Dict[str, Any]:
+    """Same shape as Recommendation.to_dict, built from the inserted row"""
+    payload = dict(row)
+    payload['product'] = product
+    payload['environment'] = environment
+    payload['created_at'] = row['created_at'].isoformat()
+    payload['updated_at'] = row['updated_at'].isoformat()
+    return payload
+
+
+def generate_environment_to_product(session: Any, product_cls: Any, recommendation_cls: Any,
+                                    user_id: str, environment: Any, latest_data: Any,
+                                    maintain_counters: bool = False) -> List[Dict[str, Any]]:
+    """Recommend every active product with requirements for one environment"""
+    products = load_products_with_requirements(product_cls)
+    if not products:
+        return []
+
+    values = environment_values([latest_data])
+    mins, maxs = requirement_bounds([p.requirements for p in products])
+    suitable, too_low, too_high = check_intervals(values, mins, maxs)
+    issues = describe_issues(too_low, too_high, values, mins, maxs)
+
+    now = datetime.utcnow()
+    rows = []
+    for product, is_suitable, product_issues in zip(products, suitable.tolist(), issues):
+        rows.append(_row(
+            user_id, product.id, environment.id, 'environment_to_product', is_suitable, now,
+            title=f"Grow {product.name} in {environment.name}",
+            description=f"Based on your environment data, {product.name} is {'highly suitable' if is_suitable else 'moderately suitable'} for growing in {environment.name}.",
+            benefits=f"Growing {product.name} can be beneficial in this environment with proper care and attention.",
+            challenges=", ".join(product_issues) if product_issues else "No major challenges identified.",
+            suggestions=f"Follow recommended growing practices for {product.name} and monitor environmental conditions regularly."
+        ))
+    insert_recommendations(session, recommendation_cls, rows, maintain_counters)
+
+    environment_dict = environment.to_dict()
+    logger.info(f"🌱 {len(rows)} environment_to_product recommendations for environment {environment.id} "
+                f"({int(suitable.sum())} suitable)")
+    return [recommendation_payload(row, product.to_dict(), environment_dict) for row, product in zip(rows, products)]
+
+
+def generate_product_to_environment(session: Any, recommendation_cls: Any, user_id: str, product: Any,
+                                    environments: Sequence[Any], latest_by_environment: Dict[str, Any],
+                                    maintain_counters: bool = False) -> List[Dict[str, Any]]:
+    """
+    Recommend one product for each of the user's environments that has data
+
+    latest_by_environment comes from EnvironmentData.get_latest_data_for_environments
+    (one query for all environments).
+    """
+    environments = [e for e in environments if e.id in latest_by_environment]
+    if not environments or not product.requirements:
+        return []
+
+    values = environment_values([latest_by_environment[e.id] for e in environments])
+    mins, maxs = requirement_bounds([product.requirements])
+    suitable, too_low, too_high = check_intervals(values, mins, maxs)
+    issues = describe_issues(too_low, too_high, values, mins, maxs)
+
+    now = datetime.utcnow()
+    rows = []
+    for environment, is_suitable, environment_issues in zip(environments, suitable.tolist(), issues):
+        rows.append(_row(
+            user_id, product.id, environment.id, 'product_to_environment', is_suitable, now,
+            title=f"Grow {product.name} in {environment.name}",
+            description=f"Based on your environment data, {product.name} is {'suitable' if is_suitable else 'partially suitable'} for growing in {environment.name}.",
+            benefits=f"Growing {product.name} in this environment can provide good yields with proper care.",
+            challenges=", ".join(environment_issues) if environment_issues else "No major challenges identified.",
+            suggestions=f"Ensure proper soil preparation and follow recommended growing practices for {product.name}."
+        ))
+    insert_recommendations(session, recommendation_cls, rows, maintain_counters)
+
+    product_dict = product.to_dict()
+    logger.info(f"🌱 {len(rows)} product_to_environment recommendations for product {product.id} "
+                f"({int(suitable.sum())} suitable)")
+    return [recommendation_payload(row, product_dict, environment.to_dict()) for row, environment in zip(rows, environments)]
@@ -0,0 +1,134 @@
+"""
+Cached Index
+Base class for per-process, versioned in-memory copies of database tables
+(average soil data, product requirements, product search), and the session
+hooks that mark them stale when this process commits writes to their tables.
+
+An index is built lazily on first use, rebuilt on the next lookup after a local
+write (invalidate), and, for writes from other workers, when its database
+fingerprint (row count and latest timestamps) changes; the fingerprint is
+checked at most once per refresh_interval seconds.
+"""
+import threading
+import time
+from typing import Any, Iterable, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRODUCT_TABLES = ('products', 'product_requirements')
+
+
+class CachedIndex:
+    """
+    Fingerprint-refreshed in-memory index over one model
+
+    Subclasses implement _load_rows (read the table), _swap_in (build structures from
+    rows and replace the current ones, return the row count) and _read_fingerprint.
+    """
+
+    label = 'Index'
+
+    def __init__(self, model_cls: Any, refresh_interval: float = 60.0):
+        self.model_cls = model_cls
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._built = False
+        self._stale = False
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load_rows(self) -> Iterable[Any]:
+        raise NotImplementedError
+
+    def _swap_in(self, rows: Iterable[Any]) -> int:
+        raise NotImplementedError
+
+    def _read_fingerprint(self) -> Tuple:
+        raise NotImplementedError
+
+    def _build_details(self) -> str:
+        return ''
+
+    def build(self, rows: Optional[Iterable[Any]] = None) -> int:
+        """Load the table (or the given rows) into fresh structures and swap them in"""
+        with self._lock:
+            if rows is None:
+                rows = self._load_rows()
+                fingerprint = tuple(self._read_fingerprint())
+            else:
+                # Given rows: no fingerprint, so only invalidate() triggers a rebuild
+                fingerprint = None
+
+            count = self._swap_in(rows)
+            self._fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+            self._built = True
+            self._stale = False
+            self.version += 1
+
+        logger.info(f"🗂️ {self.label} v{self.version} built: {count} rows{self._build_details()}")
+        return count
+
+    def invalidate(self):
+        """Mark for rebuild on the next lookup (after a local write commit)"""
+        self._stale = True
+
+    def _ensure_fresh(self):
+        if not self._built or self._stale:
+            self.build()
+            return
+        if self._fingerprint is None or time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+
+        self._checked_at = time.monotonic()
+        if tuple(self._read_fingerprint()) != self._fingerprint:
+            logger.info(f"🔄 {self.label}: table changed in another process, rebuilding")
+            self.build()
+
+
+# (tables, index) pairs that install_index_invalidation marks stale after commits
+_registered: List[Tuple[frozenset, Any]] = []
+
+
+def register_index(index: Any, tables: Iterable[str]) -> Any:
+    """Invalidate index after commits of this process that wrote any of tables"""
+    _registered.append((frozenset(tables), index))
+    return index
+
+
+def register_product_index(index: Any) -> Any:
+    """Invalidate index after product / product requirement commits"""
+    return register_index(index, PRODUCT_TABLES)
+
+
+def install_index_invalidation(session: Any):
+    """Invalidate the registered indexes whose tables a committed flush wrote"""
+    from sqlalchemy import event
+
+    def _touched_tables(flush_session):
+        return {getattr(obj, '__tablename__', None)
+                for obj in list(flush_session.new) + list(flush_session.dirty) + list(flush_session.deleted)}
+
+    @event.listens_for(session, 'before_flush')
+    def _remember_table_writes(flush_session, flush_context, instances):
+        touched = _touched_tables(flush_session) - {None}
+        if touched:
+            flush_session.info.setdefault('cached_index_tables', set()).update(touched)
+
+    @event.listens_for(session, 'after_commit')
+    def _invalidate_indexes(commit_session):
+        touched = commit_session.info.pop('cached_index_tables', None)
+        if touched:
+            for tables, index in list(_registered):
+                if tables & touched:
+                    index.invalidate()
+
+    @event.listens_for(session, 'after_rollback')
+    def _forget_table_writes(rollback_session):
+        rollback_session.info.pop('cached_index_tables', None)
+
+    logger.info("🗂️ Cached index invalidation installed")
+    return _remember_table_writes, _invalidate_indexes, _forget_table_writes
@@ -0,0 +1,35 @@
+"""
+Environment Snapshots
+Latest environment_data row for many environments in one query:
+
+    SELECT * FROM (
+        SELECT environment_data.*, ROW_NUMBER() OVER (
+            PARTITION BY environment_id ORDER BY measured_at DESC, id DESC) AS rn
+        FROM environment_data WHERE environment_id IN (...)
+    ) WHERE rn = 1
+
+served by the (environment_id, measured_at) index on environment_data.
+"""
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+
+def latest_environment_data(session: Any, data_cls: Any, environment_ids: Iterable[str]) -> Dict[str, Any]:
+    """{environment_id: latest data row}; environments without data are absent"""
+    environment_ids = list(dict.fromkeys(environment_ids))
+    if not environment_ids:
+        return {}
+
+    ranked = select(
+        data_cls,
+        func.row_number().over(
+            partition_by=data_cls.environment_id,
+            order_by=(data_cls.measured_at.desc(), data_cls.id.desc())
+        ).label('rn')
+    ).where(data_cls.environment_id.in_(environment_ids)).subquery()
+    latest = aliased(data_cls, ranked)
+
+    rows = session.execute(select(latest).where(ranked.c.rn == 1)).scalars().all()
+    return {row.environment_id: row for row in rows}
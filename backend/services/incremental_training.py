@@ -0,0 +1,319 @@
+"""
+Incremental Model Training
+Continues training the existing boosters with labelled feedback rows
+(implemented recommendations + stored ModelResult.input_data) instead of full retrains
+"""
+import copy
+import os
+import pickle
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Same defaults MLService.initialize_models uses
+MODEL_PATHS = {
+    'crop_recommendation': 'ai/models/crop_model.pkl',            # XGBoost model_data bundle (pickle)
+    'environment_recommendation': 'ai/models/environment_model.pkl'  # LightGBM per-target bundle (joblib)
+}
+
+
+def _feedback_row(model_type: str, input_data: Dict[str, Any], predictions: Dict[str, Any]) -> Dict[str, Any]:
+    """Build one training row from a stored model result"""
+    row = dict(input_data or {})
+    predictions = predictions or {}
+    if model_type == 'crop_recommendation':
+        # Implemented crop recommendation -> the predicted crop is the label
+        row['crop'] = predictions.get('predicted_crop', row.get('crop'))
+    else:
+        # Implemented environment recommendation -> the suggested conditions are the labels
+        row.update(predictions.get('optimal_conditions') or {})
+        row.setdefault('crop', predictions.get('crop'))
+        row.setdefault('region', predictions.get('region'))
+    return row
+
+
+def collect_feedback_rows(model_type: str, since: Optional[datetime] = None) -> Tuple[pd.DataFrame, Optional[datetime]]:
+    """
+    Collect labelled rows from implemented recommendations
+
+    Returns:
+        (rows, trained_until) - trained_until is the newest recommendation update seen
+    """
+    from app import db
+    from models.recommendation import Recommendation
+    from models.model_results import ModelResult
+
+    query = db.session.query(
+        ModelResult.input_data, ModelResult.predictions, Recommendation.updated_at
+    ).join(
+        Recommendation, Recommendation.model_result_id == ModelResult.id
+    ).filter(
+        Recommendation.status == 'implemented',
+        ModelResult.model_type == model_type,
+        ModelResult.status == 'completed'
+    )
+    if since is not None:
+        query = query.filter(Recommendation.updated_at > since)
+
+    rows = []
+    trained_until = since
+    for input_data, predictions, updated_at in query.yield_per(1000):
+        rows.append(_feedback_row(model_type, input_data, predictions))
+        if updated_at and (trained_until is None or updated_at > trained_until):
+            trained_until = updated_at
+
+    logger.info(f"📥 Collected {len(rows)} feedback rows for {model_type}")
+    return pd.DataFrame(rows), trained_until
+
+
+def _encode_known(df: pd.DataFrame, encoders: Dict[str, Any], columns) -> pd.DataFrame:
+    """Label-encode columns, dropping rows with values the encoders have never seen"""
+    df = df.dropna(subset=list(columns))
+    known = np.ones(len(df), dtype=bool)
+    for col in columns:
+        known &= df[col].astype(str).isin(encoders[col].classes_).to_numpy()
+    df = df[known].copy()
+    for col in columns:
+        df[col] = encoders[col].transform(df[col].astype(str))
+    return df
+
+
+def prepare_xgboost_rows(model_data: Dict[str, Any], rows: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Encode raw rows into the (X, y) the XGBoost crop bundle was trained on"""
+    encoders = model_data['encoders']
+    categorical = model_data['categorical_features']
+    target = model_data['target']
+
+    df = rows.copy()
+    for col in model_data['numeric_features'] + categorical:
+        if col not in df.columns:
+            df[col] = np.nan
+    for col in model_data['numeric_features']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = _encode_known(df.dropna(subset=model_data['numeric_features']), encoders, categorical + [target])
+
+    X = df[model_data['feature_order']]
+    if getattr(model_data['model'], 'enable_categorical', False):
+        X = X.astype({
+            col: pd.CategoricalDtype(categories=range(len(encoders[col].classes_))) for col in categorical
+        })
+    return X, df[target].to_numpy()
+
+
+def prepare_lightgbm_rows(bundle: Dict[str, Any], rows: pd.DataFrame) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Preprocess raw rows for the per-target LightGBM bundle; returns (X, encoded targets)"""
+    targets = bundle['target_columns']
+    df = rows.copy()
+    for col in list(bundle['preprocessor'].feature_names_in_) + targets:
+        if col not in df.columns:
+            df[col] = np.nan
+    if bundle.get('weather_mapping') and 'weather_condition' in df.columns:
+        df['weather_condition'] = df['weather_condition'].replace(bundle['weather_mapping'])
+    df = _encode_known(df, bundle['label_encoders'], targets)
+    if df.empty:
+        return np.empty((0, 0)), df[targets]
+    return bundle['preprocessor'].transform(df), df[targets]
+
+
+def _xgboost_time_budget(max_seconds: float):
+    """XGBoost callback stopping training once the time budget is spent"""
+    import xgboost as xgb
+
+    class TimeBudget(xgb.callback.TrainingCallback):
+        def __init__(self):
+            super().__init__()
+            self.deadline = time.perf_counter() + max_seconds
+
+        def after_iteration(self, model, epoch, evals_log):
+            return time.perf_counter() > self.deadline
+
+    return TimeBudget()
+
+
+def _lightgbm_time_budget(max_seconds: float):
+    """LightGBM callback stopping training once the time budget is spent"""
+    import lightgbm as lgb
+
+    deadline = time.perf_counter() + max_seconds
+
+    def _callback(env):
+        if time.perf_counter() > deadline:
+            raise lgb.callback.EarlyStopException(env.iteration, env.evaluation_result_list)
+
+    return _callback
+
+
+def continue_xgboost_bundle(model_data: Dict[str, Any], rows: pd.DataFrame, num_boost_round: int = 50,
+                            n_jobs: int = -1, max_seconds: Optional[float] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Continue training the XGBoost crop model (xgb_model=) on new rows
+
+    The returned bundle keeps the model_data layout XGBoostCropPredictor loads.
+    """
+    import xgboost as xgb
+
+    X, y = prepare_xgboost_rows(model_data, rows)
+    if len(X) == 0:
+        return model_data, 0
+
+    old_model = model_data['model']
+    # Early-stopped models only use trees up to best_iteration at predict time
+    base = old_model.get_booster()
+    try:
+        base = base[: old_model.best_iteration + 1]
+    except AttributeError:
+        pass
+
+    params = {k: v for k, v in old_model.get_xgb_params().items() if v is not None}
+    params.pop('early_stopping_rounds', None)
+    params.update(num_class=len(model_data['encoders'][model_data['target']].classes_), n_jobs=n_jobs)
+
+    dtrain = xgb.DMatrix(X, label=y, enable_categorical=True)
+    callbacks = [_xgboost_time_budget(max_seconds)] if max_seconds else None
+    booster = xgb.train(params, dtrain, num_boost_round=num_boost_round, xgb_model=base, callbacks=callbacks)
+
+    model = copy.deepcopy(old_model)
+    model._Booster = booster
+    model.n_estimators = booster.num_boosted_rounds()
+    added = booster.num_boosted_rounds() - base.num_boosted_rounds()
+    return {**model_data, 'model': model}, added
+
+
+def continue_lightgbm_bundle(bundle: Dict[str, Any], rows: pd.DataFrame, num_boost_round: int = 50,
+                             n_jobs: int = -1, max_seconds: Optional[float] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Continue training every per-target LightGBM model (init_model=) on new rows
+
+    The returned bundle keeps the EnvironmentalRecommendationModel layout.
+    """
+    import lightgbm as lgb
+
+    targets = bundle['target_columns']
+    X, labels = prepare_lightgbm_rows(bundle, rows)
+    if len(labels) == 0:
+        return bundle, 0
+
+    models = {}
+    added = 0
+    for target in targets:
+        old_model = bundle['models'][target]
+        base = old_model if isinstance(old_model, lgb.Booster) else old_model.booster_
+        params = {k: v for k, v in base.params.items() if k not in ('num_iterations', 'metric')}
+        params.update(num_threads=n_jobs if n_jobs > 0 else 0, verbose=-1)
+
+        before = base.current_iteration()
+        # The time budget is split evenly across targets
+        callbacks = [_lightgbm_time_budget(max_seconds / len(targets))] if max_seconds else None
+        booster = lgb.train(
+            params, lgb.Dataset(X, label=labels[target].to_numpy()),
+            num_boost_round=num_boost_round, init_model=base, callbacks=callbacks
+        )
+        added = max(added, booster.current_iteration() - before)
+
+        if isinstance(old_model, lgb.Booster):
+            models[target] = booster
+        else:
+            model = copy.deepcopy(old_model)
+            model._Booster = booster
+            model.n_estimators = booster.current_iteration()
+            models[target] = model
+
+    return {**bundle, 'models': models}, added
+
+
+def load_bundle(model_type: str, model_path: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+    """Load the bundle for a model type (pickle for XGBoost, joblib for LightGBM)"""
+    if model_type not in MODEL_PATHS:
+        raise ValueError(f"Unknown model type: {model_type}")
+    model_path = model_path or MODEL_PATHS[model_type]
+    if model_type == 'environment_recommendation':
+        return joblib.load(model_path), model_path
+    with open(model_path, 'rb') as f:
+        return pickle.load(f), model_path
+
+
+def write_versioned_bundle(bundle: Dict[str, Any], model_path: str, version: str,
+                           use_joblib: bool = False, promote: bool = False) -> str:
+    """Write <stem>.<version><ext> next to the live bundle; optionally promote it atomically"""
+    stem, ext = os.path.splitext(model_path)
+    versioned_path = f"{stem}.{version}{ext}"
+    if use_joblib:
+        joblib.dump(bundle, versioned_path)
+    else:
+        with open(versioned_path, 'wb') as f:
+            pickle.dump(bundle, f)
+
+    if promote:
+        tmp_path = f"{model_path}.tmp-{os.getpid()}"
+        with open(versioned_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            dst.write(src.read())
+        os.replace(tmp_path, model_path)
+    return versioned_path
+
+
+def run_incremental_training(model_type: str = 'crop_recommendation', model_path: Optional[str] = None,
+                             num_boost_round: int = 50, n_jobs: int = -1, max_seconds: Optional[float] = None,
+                             min_rows: int = 50, promote: bool = False) -> Dict[str, Any]:
+    """
+    Nightly job: collect feedback since the last run and continue training the current bundle
+
+    Must run inside an application context.
+    """
+    started = time.perf_counter()
+    bundle, model_path = load_bundle(model_type, model_path)
+    use_joblib = model_type == 'environment_recommendation'
+
+    history = bundle.get('training_history', [])
+    since = datetime.fromisoformat(history[-1]['trained_until']) if history and history[-1].get('trained_until') else None
+    rows, trained_until = collect_feedback_rows(model_type, since)
+    if len(rows) < min_rows:
+        logger.info(f"⏭️ Skipping incremental training: {len(rows)} rows < min_rows={min_rows}")
+        return {'success': True, 'trained': False, 'rows': len(rows)}
+
+    continue_fn = continue_lightgbm_bundle if use_joblib else continue_xgboost_bundle
+    new_bundle, added_rounds = continue_fn(bundle, rows, num_boost_round, n_jobs, max_seconds)
+    if added_rounds == 0:
+        logger.info("⏭️ No usable rows or no rounds added, bundle left unchanged")
+        return {'success': True, 'trained': False, 'rows': len(rows)}
+
+    version = datetime.utcnow().strftime('v%Y%m%d%H%M%S')
+    new_bundle['training_history'] = history + [{
+        'version': version,
+        'base': history[-1]['version'] if history else os.path.basename(model_path),
+        'rows': len(rows),
+        'rounds_added': added_rounds,
+        'trained_until': trained_until.isoformat() if trained_until else None,
+        'train_seconds': round(time.perf_counter() - started, 2)
+    }]
+    path = write_versioned_bundle(new_bundle, model_path, version, use_joblib=use_joblib, promote=promote)
+
+    logger.info(f"✅ Incremental training finished: {path} (+{added_rounds} rounds, {len(rows)} rows)")
+    return {'success': True, 'trained': True, 'path': path, **new_bundle['training_history'][-1]}
+
+
+if __name__ == '__main__':
+    import argparse
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Continue training the current model bundle with feedback rows')
+    parser.add_argument('--model-type', default='crop_recommendation', choices=sorted(MODEL_PATHS))
+    parser.add_argument('--model-path')
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--max-seconds', type=float)
+    parser.add_argument('--min-rows', type=int, default=50)
+    parser.add_argument('--promote', action='store_true')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(run_incremental_training(
+            args.model_type, args.model_path, args.rounds, args.n_jobs,
+            args.max_seconds, args.min_rows, args.promote
+        ))
@@ -0,0 +1,86 @@
+"""
+Keyset Pagination
+Cursor-based pages ordered by (created_at DESC, id DESC):
+
+    WHERE <filters> AND (created_at, id) < (:cursor_created_at, :cursor_id)
+    ORDER BY created_at DESC, id DESC LIMIT :per_page + 1
+
+Every page is one range scan on a (<filters>, created_at, id) index, however
+deep, instead of OFFSET scanning all rows before it. The extra row tells whether
+there is a next page, so COUNT(*) only runs when the client asks for a total.
+
+The cursor is opaque to clients: urlsafe base64 of the last row's created_at and id.
+Clients opt in with ?pagination=cursor (first page) or ?cursor=<next_cursor>; other
+requests keep the page-number response.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    """Cursor that was not produced by encode_cursor"""
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def cursor_requested(args: Mapping[str, Any]) -> bool:
+    """Keyset pages are opt-in so the legacy page-number response stays the default"""
+    return 'cursor' in args or args.get('pagination') == 'cursor'
+
+
+def clamp_per_page(per_page: Optional[int]) -> int:
+    return max(1, min(int(per_page or DEFAULT_PER_PAGE), MAX_PER_PAGE))
+
+
+def keyset_page(query: Any, model_cls: Any, per_page: Optional[int] = DEFAULT_PER_PAGE,
+                cursor: Optional[str] = None, include_total: bool = False) -> Dict[str, Any]:
+    """
+    One page of query, newest first
+
+    Returns {'items', 'per_page', 'has_next', 'next_cursor', 'total'}; total is
+    None unless include_total (one COUNT over the filtered query, without the cursor).
+    """
+    per_page = clamp_per_page(per_page)
+    total = query.order_by(None).count() if include_total else None
+
+    key = tuple_(model_cls.created_at, model_cls.id)
+    if cursor:
+        query = query.filter(key < tuple_(*decode_cursor(cursor)))
+    rows: List[Any] = query.order_by(model_cls.created_at.desc(), model_cls.id.desc()).limit(per_page + 1).all()
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    return {
+        'items': items,
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': encode_cursor(items[-1].created_at, items[-1].id) if has_next else None,
+        'total': total
+    }
+
+
+def pagination_payload(page: Dict[str, Any]) -> Dict[str, Any]:
+    """The 'pagination' object of list responses"""
+    payload = {'per_page': page['per_page'], 'has_next': page['has_next'], 'next_cursor': page['next_cursor']}
+    if page['total'] is not None:
+        payload['total'] = page['total']
+    return payload
@@ -6,6 +6,7 @@ from typing import Dict, Any, Optional
 from scipy.optimize import differential_evolution
 from .base_predictor import BasePredictor
 from utils.logger import get_logger
+from utils.tracing import span
 
 logger = get_logger(__name__)
 
@@ -114,14 +115,16 @@ class LightGBMCropPredictor(BasePredictor):
                     df[col] = df[col].astype(str)
             
             # Apply preprocessing pipeline (includes feature engineering)
-            X_processed = self.preprocessor.transform(df)
+            with span('lightgbm.preprocess'):
+                X_processed = self.preprocessor.transform(df)
             
-            # Get prediction
-            prediction_encoded = self.model.predict(X_processed)[0]
-            predicted_crop = self.label_encoder.inverse_transform([prediction_encoded])[0]
-            
-            # Get probabilities
-            probabilities = self.model.predict_proba(X_processed)[0]
+            with span('lightgbm.predict'):
+                # Get prediction
+                prediction_encoded = self.model.predict(X_processed)[0]
+                predicted_crop = self.label_encoder.inverse_transform([prediction_encoded])[0]
+                
+                # Get probabilities
+                probabilities = self.model.predict_proba(X_processed)[0]
             
             # Get top 3
             top_indices = np.argsort(probabilities)[::-1][:3]
@@ -236,14 +239,15 @@ class LightGBMCropPredictor(BasePredictor):
             
             # Run optimization
             logger.info("   Running differential evolution optimization...")
-            result = differential_evolution(
-                objective,
-                extended_bounds,
-                maxiter=80,
-                seed=42,
-                workers=1,
-                polish=True
-            )
+            with span('lightgbm.optimize', crop=crop, region=region):
+                result = differential_evolution(
+                    objective,
+                    extended_bounds,
+                    maxiter=80,
+                    seed=42,
+                    workers=1,
+                    polish=True
+                )
             
             # Extract optimal values
             best_x = result.x
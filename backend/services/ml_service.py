@@ -7,6 +7,7 @@ from .base_predictor import BasePredictor, PredictionDirection
 from .xgboost_predictor import XGBoostCropPredictor
 from .lightgbm_predictor import LightGBMCropPredictor
 from utils.logger import get_logger
+from utils.tracing import span
 
 logger = get_logger(__name__)
 
@@ -118,7 +119,8 @@ class MLService:
                 }
             
             logger.info(f"🌾 Predicting crop from environment using {model_type or self.default_predictor}")
-            result = predictor.predict_crop_from_environment(environment_data)
+            with span('ml.predict_crop', model=model_type or self.default_predictor):
+                result = predictor.predict_crop_from_environment(environment_data)
             
             # Add metadata
             if result.get('success'):
@@ -160,7 +162,8 @@ class MLService:
                 }
             
             logger.info(f"🔍 Optimizing environment for crop '{crop}' using {model_type or self.default_predictor}")
-            result = predictor.predict_environment_from_crop(crop, region)
+            with span('ml.optimize_environment', model=model_type or self.default_predictor, crop=crop):
+                result = predictor.predict_environment_from_crop(crop, region)
             
             # Add metadata
             if result.get('success'):
@@ -0,0 +1,218 @@
+"""
+Model Compaction
+Truncates trained boosters to the smallest iteration count whose holdout accuracy /
+log-loss stays within a budget and writes a slim bundle the predictors load unchanged
+"""
+import copy
+import pickle
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import log_loss
+from utils.logger import get_logger
+from .incremental_training import (
+    load_bundle, prepare_lightgbm_rows, prepare_xgboost_rows, write_versioned_bundle
+)
+
+logger = get_logger(__name__)
+
+
+def _as_proba(raw: np.ndarray) -> np.ndarray:
+    """Binary objectives return P(class 1) only"""
+    return np.column_stack([1 - raw, raw]) if raw.ndim == 1 else raw
+
+
+def _metrics(proba: np.ndarray, y: np.ndarray) -> Dict[str, float]:
+    return {
+        'accuracy': float((proba.argmax(axis=1) == y).mean()),
+        'log_loss': float(log_loss(y, proba, labels=list(range(proba.shape[1]))))
+    }
+
+
+def smallest_iteration_count(predict_proba: Callable[[int], np.ndarray], total: int, y: np.ndarray,
+                             max_accuracy_drop: float = 0.002,
+                             max_logloss_increase: Optional[float] = 0.02) -> Tuple[int, Dict, Dict]:
+    """
+    Find the smallest k whose holdout metrics stay within the budget of the full model
+
+    The log-loss budget is on by default: predictors expose predict_proba as confidence,
+    so a truncated model must stay calibrated, not just accurate (None disables it).
+
+    Candidates are scanned on a coarse grid, then refined one iteration at a time
+    below the first grid point that fits the budget.
+
+    Returns:
+        (k, full_metrics, compact_metrics)
+    """
+    full = _metrics(predict_proba(total), y)
+
+    def within_budget(m):
+        if full['accuracy'] - m['accuracy'] > max_accuracy_drop:
+            return False
+        return max_logloss_increase is None or m['log_loss'] - full['log_loss'] <= max_logloss_increase
+
+    step = max(1, total // 50)
+    previous = 0
+    for k in list(range(step, total, step)) + [total]:
+        metrics = _metrics(predict_proba(k), y)
+        if within_budget(metrics):
+            for j in range(previous + 1, k):
+                refined = _metrics(predict_proba(j), y)
+                if within_budget(refined):
+                    return j, full, refined
+            return k, full, metrics
+        previous = k
+    return total, full, full
+
+
+def _measure(model: Any, X: Any) -> Dict[str, float]:
+    """Batch/single-row latency and serialized size of a model"""
+    # Raw LightGBM boosters return probabilities from predict
+    predict = getattr(model, 'predict_proba', model.predict)
+    started = time.perf_counter()
+    predict(X)
+    batch_ms = (time.perf_counter() - started) * 1000
+
+    row = X.iloc[:1] if isinstance(X, pd.DataFrame) else X[:1]
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        predict(row)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'batch_ms': round(batch_ms, 2),
+        'single_row_ms': round(float(np.median(timings)), 3),
+        'size_kb': round(len(pickle.dumps(model)) / 1024, 1)
+    }
+
+
+def _report(name: str, total: int, k: int, full: Dict, compact: Dict, before: Dict, after: Dict) -> Dict[str, Any]:
+    report = {
+        'model': name,
+        'iterations_before': total,
+        'iterations_after': k,
+        'accuracy_before': round(full['accuracy'], 5),
+        'accuracy_after': round(compact['accuracy'], 5),
+        'log_loss_before': round(full['log_loss'], 5),
+        'log_loss_after': round(compact['log_loss'], 5),
+        'before': before,
+        'after': after,
+        'speedup': round(before['batch_ms'] / after['batch_ms'], 2) if after['batch_ms'] else None
+    }
+    logger.info(
+        f"🗜️ {name}: {total} -> {k} iterations, accuracy {report['accuracy_before']} -> "
+        f"{report['accuracy_after']}, size {before['size_kb']}KB -> {after['size_kb']}KB, "
+        f"batch {before['batch_ms']}ms -> {after['batch_ms']}ms"
+    )
+    return report
+
+
+def compact_xgboost_bundle(model_data: Dict[str, Any], holdout: pd.DataFrame,
+                           **budget) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Truncate the XGBoost crop model; the model_data layout is kept"""
+    import xgboost as xgb
+
+    X, y = prepare_xgboost_rows(model_data, holdout)
+    if len(X) == 0:
+        raise ValueError("Holdout set has no usable rows")
+
+    model = model_data['model']
+    booster = model.get_booster()
+    try:
+        total = model.best_iteration + 1
+    except AttributeError:
+        total = booster.num_boosted_rounds()
+
+    dmatrix = xgb.DMatrix(X, enable_categorical=True)
+    k, full, compact = smallest_iteration_count(
+        lambda n: _as_proba(booster.predict(dmatrix, iteration_range=(0, n))), total, y, **budget
+    )
+
+    slim = copy.deepcopy(model)
+    slim._Booster = booster[:k]
+    slim.n_estimators = k
+
+    report = _report('crop', total, k, full, compact, _measure(model, X), _measure(slim, X))
+    return {**model_data, 'model': slim}, {'crop': report}
+
+
+def compact_lightgbm_bundle(bundle: Dict[str, Any], holdout: pd.DataFrame,
+                            **budget) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Truncate every per-target LightGBM model with its own iteration count"""
+    import lightgbm as lgb
+
+    X, labels = prepare_lightgbm_rows(bundle, holdout)
+    if len(labels) == 0:
+        raise ValueError("Holdout set has no usable rows")
+
+    models = {}
+    reports = {}
+    for target in bundle['target_columns']:
+        model = bundle['models'][target]
+        booster = model if isinstance(model, lgb.Booster) else model.booster_
+        total = booster.best_iteration or booster.current_iteration()
+
+        k, full, compact = smallest_iteration_count(
+            lambda n: _as_proba(booster.predict(X, num_iteration=n)), total,
+            labels[target].to_numpy(), **budget
+        )
+
+        slim_booster = lgb.Booster(model_str=booster.model_to_string(num_iteration=k))
+        if isinstance(model, lgb.Booster):
+            slim = slim_booster
+        else:
+            slim = copy.deepcopy(model)
+            slim._Booster = slim_booster
+            slim.n_estimators = k
+        models[target] = slim
+        reports[target] = _report(target, total, k, full, compact, _measure(model, X), _measure(slim, X))
+
+    return {**bundle, 'models': models}, reports
+
+
+def run_compaction(model_type: str, holdout_path: str, model_path: Optional[str] = None,
+                   max_accuracy_drop: float = 0.002, max_logloss_increase: Optional[float] = 0.02,
+                   promote: bool = False) -> Dict[str, Any]:
+    """Compact the current bundle against a holdout CSV and write a versioned slim bundle"""
+    bundle, model_path = load_bundle(model_type, model_path)
+    holdout = pd.read_csv(holdout_path)
+    budget = {'max_accuracy_drop': max_accuracy_drop, 'max_logloss_increase': max_logloss_increase}
+
+    if model_type == 'environment_recommendation':
+        slim, reports = compact_lightgbm_bundle(bundle, holdout, **budget)
+    else:
+        slim, reports = compact_xgboost_bundle(bundle, holdout, **budget)
+
+    version = datetime.utcnow().strftime('v%Y%m%d%H%M%S') + '-slim'
+    slim['compaction'] = {'version': version, 'budget': budget, 'reports': reports}
+    path = write_versioned_bundle(
+        slim, model_path, version, use_joblib=model_type == 'environment_recommendation', promote=promote
+    )
+    logger.info(f"✅ Slim bundle written: {path}")
+    return {'success': True, 'path': path, 'reports': reports}
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Shrink a model bundle within an accuracy budget')
+    parser.add_argument('--model-type', default='crop_recommendation',
+                        choices=['crop_recommendation', 'environment_recommendation'])
+    parser.add_argument('--holdout', required=True, help='Holdout CSV with raw feature and label columns')
+    parser.add_argument('--model-path')
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.002)
+    parser.add_argument('--max-logloss-increase', type=float, default=0.02,
+                        help='Use a negative value to disable the log-loss budget')
+    parser.add_argument('--promote', action='store_true')
+    args = parser.parse_args()
+
+    result = run_compaction(
+        args.model_type, args.holdout, args.model_path, args.max_accuracy_drop,
+        args.max_logloss_increase if args.max_logloss_increase >= 0 else None, args.promote
+    )
+    print(json.dumps(result, indent=2))
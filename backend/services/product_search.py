@@ -0,0 +1,215 @@
+"""
+Product Search
+Ranked substring search over product name and description that does not scan
+the products table on every keystroke:
+
+- PostgreSQL: GIN pg_trgm expression indexes on product_search_fold(name) and
+  product_search_fold(description), which serve LIKE '%q%'; results ordered by
+  match tier and similarity().
+- Other databases (SQLite): a per-process, versioned n-gram index, posting
+  bitsets (Python ints, bit i = product i) per 1-, 2- and 3-gram, intersected
+  for the query's grams; only the candidates are verified and ranked.
+
+Both sides fold text the same way: Turkish İ/I/ı/i all become "i" and ç ş ğ ö ü
+â î û lose their marks, so "ISPANAK", "ıspanak" and "Ispanak" find "Ispanak" and
+"cay" finds "Çay". Matching keeps the old ilike semantics (the folded query is
+a substring of the folded name or description).
+"""
+import heapq
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, literal, or_, text
+from utils.logger import get_logger
+from services.cached_index import CachedIndex, register_product_index
+
+logger = get_logger(__name__)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+GRAM = 3
+
+# Characters folded before lowercasing; kept identical in product_search_fold()
+FOLD_FROM = 'İIıÇŞĞÖÜÂÎÛçşğöüâîû'
+FOLD_TO = 'iiicsgouaiucsgouaiu'
+_FOLD_TABLE = str.maketrans(FOLD_FROM, FOLD_TO)
+
+SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""CREATE OR REPLACE FUNCTION product_search_fold(value text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT lower(translate(coalesce(value, ''), '{FOLD_FROM}', '{FOLD_TO}')) $$""",
+    "CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products "
+    "USING GIN (product_search_fold(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_products_description_trgm ON products "
+    "USING GIN (product_search_fold(description) gin_trgm_ops)",
+)
+
+
+def fold(value: Optional[str]) -> str:
+    """Turkish-aware, accent-insensitive lower case"""
+    return (value or '').translate(_FOLD_TABLE).lower()
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    return max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+
+
+def _grams(value: str, size: int) -> set:
+    return {value[i:i + size] for i in range(len(value) - size + 1)}
+
+
+def _similarity(query: str, name: str) -> float:
+    """Share of common trigrams (pg_trgm similarity, without its word padding)"""
+    query_grams, name_grams = _grams(query, GRAM) or {query}, _grams(name, GRAM) or {name}
+    return len(query_grams & name_grams) / len(query_grams | name_grams)
+
+
+def _tier(query: str, name: str) -> int:
+    """0 exact name, 1 name prefix, 2 word prefix in name, 3 inside name, 4 description only"""
+    if name == query:
+        return 0
+    if name.startswith(query):
+        return 1
+    if any(word.startswith(query) for word in name.split()):
+        return 2
+    return 3 if query in name else 4
+
+
+def ensure_search_indexes(session: Any) -> bool:
+    """Create pg_trgm, product_search_fold() and the trigram indexes (PostgreSQL only)"""
+    if session.get_bind().dialect.name != 'postgresql':
+        return False
+    for statement in SEARCH_DDL:
+        session.execute(text(statement))
+    session.commit()
+    logger.info("🔎 Product search trigram indexes ensured")
+    return True
+
+
+def _like_escape(query: str) -> str:
+    return query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_postgres(product_cls: Any, query: str, limit: int) -> List[Any]:
+    name = func.product_search_fold(product_cls.name)
+    description = func.product_search_fold(product_cls.description)
+    escaped = _like_escape(query)
+    pattern, prefix, word_prefix = f'%{escaped}%', f'{escaped}%', f'% {escaped}%'
+    tier = case(
+        (name == query, 0),
+        (name.like(prefix, escape='\\'), 1),
+        (name.like(word_prefix, escape='\\'), 2),
+        (name.like(pattern, escape='\\'), 3),
+        else_=4
+    )
+    return product_cls.query.filter(
+        product_cls.is_active == True,
+        or_(name.like(pattern, escape='\\'), description.like(pattern, escape='\\'))
+    ).order_by(tier, func.similarity(name, literal(query)).desc(), product_cls.name).limit(limit).all()
+
+
+class ProductSearchIndex(CachedIndex):
+    """
+    N-gram index over the folded name and description of active products
+
+    Refreshed as a CachedIndex: rebuilt after product commits in this process
+    (register_product_index) and when the count / max(updated_at) fingerprint changes.
+    """
+
+    label = 'Product search index'
+
+    def __init__(self, product_cls: Any, refresh_interval: float = 60.0):
+        super().__init__(product_cls, refresh_interval)
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._texts: List[str] = []
+        self._postings: Dict[str, int] = {}
+
+    def _read_fingerprint(self):
+        product = self.model_cls
+        return product.query.with_entities(func.count(product.id), func.max(product.updated_at)).one()
+
+    def _load_rows(self):
+        product = self.model_cls
+        return product.query.with_entities(product.id, product.name, product.description).filter(
+            product.is_active == True
+        ).all()
+
+    def _swap_in(self, rows) -> int:
+        ids, names, texts, postings = [], [], [], {}
+        for position, (product_id, name, description) in enumerate(rows):
+            folded_name = fold(name)
+            searchable = f'{folded_name}\n{fold(description)}'
+            ids.append(product_id)
+            names.append(folded_name)
+            texts.append(searchable)
+            bit = 1 << position
+            for size in range(1, GRAM + 1):
+                for gram in _grams(searchable, size):
+                    postings[gram] = postings.get(gram, 0) | bit
+
+        self._ids, self._names, self._texts, self._postings = ids, names, texts, postings
+        return len(ids)
+
+    def _build_details(self) -> str:
+        return f', {len(self._postings)} grams'
+
+    def _candidates(self, query: str) -> int:
+        if len(query) <= GRAM:
+            return self._postings.get(query, 0)
+        bits = -1
+        for gram in _grams(query, GRAM):
+            bits &= self._postings.get(gram, 0)
+            if not bits:
+                break
+        return bits
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Tuple[str, int, float]]:
+        """[(product_id, tier, similarity)] best first; query must already be folded"""
+        self._ensure_fresh()
+        ranked = []
+        bits = self._candidates(query)
+        while bits:
+            low = bits & -bits
+            position = low.bit_length() - 1
+            bits ^= low
+            # Grams only narrow the candidates; the substring decides
+            if query not in self._texts[position]:
+                continue
+            name = self._names[position]
+            tier, similarity = _tier(query, name), _similarity(query, name)
+            ranked.append((tier, -similarity, name, self._ids[position]))
+        return [(product_id, tier, -negative) for tier, negative, _, product_id in heapq.nsmallest(limit, ranked)]
+
+
+_indexes: Dict[Any, ProductSearchIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def get_search_index(product_cls: Any) -> ProductSearchIndex:
+    """Process-wide search index for a Product model class (created on first use)"""
+    index = _indexes.get(product_cls)
+    if index is None:
+        with _registry_lock:
+            if product_cls not in _indexes:
+                _indexes[product_cls] = register_product_index(ProductSearchIndex(product_cls))
+            index = _indexes[product_cls]
+    return index
+
+
+def search_products(session: Any, product_cls: Any, query: str, limit: Optional[int] = DEFAULT_LIMIT) -> List[Any]:
+    """Active products matching query, best match first, at most limit"""
+    folded = fold(query).strip()
+    limit = clamp_limit(limit)
+    if not folded:
+        return []
+
+    if session.get_bind().dialect.name == 'postgresql':
+        return _search_postgres(product_cls, folded, limit)
+
+    ranked_ids = [product_id for product_id, _, _ in get_search_index(product_cls).search(folded, limit)]
+    if not ranked_ids:
+        return []
+    products = {p.id: p for p in product_cls.query.filter(product_cls.id.in_(ranked_ids)).all()}
+    return [products[product_id] for product_id in ranked_ids if product_id in products]
@@ -0,0 +1,225 @@
+"""
+Recommendation Statistics
+Per-user recommendation counts from one GROUP BY (status, is_favorite, recommendation_type)
+query, and an optional user_recommendation_counters table kept in sync inside the same
+transaction as every recommendation insert / status change, so the dashboard can read
+its numbers with a primary-key lookup
+
+Counter updates and the first-read backfill of a user both lock that user's row in
+users first. A backfill therefore waits for any transaction that is adding to the
+user's recommendations, and then (READ COMMITTED) aggregates its committed rows.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Tuple
+
+from sqlalchemy import event, func, inspect, text
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+COUNTER_TABLE = 'user_recommendation_counters'
+USER_TABLE = 'users'
+STATUSES = ('active', 'dismissed', 'implemented')
+TYPES = ('product_to_environment', 'environment_to_product')
+COUNTER_COLUMNS = ('total', 'favorite') + STATUSES + TYPES
+
+
+def summarize_counts(rows: Iterable[Tuple[str, bool, str, int]]) -> Dict[str, int]:
+    """Fold (status, is_favorite, recommendation_type, count) groups into counter columns"""
+    counts = dict.fromkeys(COUNTER_COLUMNS, 0)
+    for status, is_favorite, recommendation_type, count in rows:
+        counts['total'] += count
+        if is_favorite:
+            counts['favorite'] += count
+        if status in STATUSES:
+            counts[status] += count
+        if recommendation_type in TYPES:
+            counts[recommendation_type] += count
+    return counts
+
+
+def format_stats(counts: Dict[str, int]) -> Dict[str, Any]:
+    """Response shape of GET /api/recommendations/stats"""
+    return {
+        'total_recommendations': counts['total'],
+        'active_recommendations': counts['active'],
+        'favorite_recommendations': counts['favorite'],
+        'implemented_recommendations': counts['implemented'],
+        'dismissed_recommendations': counts['dismissed'],
+        'by_type': {t: counts[t] for t in TYPES}
+    }
+
+
+def aggregate_user_counts(recommendation_cls: Any, user_id: str) -> Dict[str, int]:
+    """All counters for one user with a single grouped query"""
+    model = recommendation_cls
+    rows = model.query.with_entities(
+        model.status, model.is_favorite, model.recommendation_type, func.count(model.id)
+    ).filter(model.user_id == user_id).group_by(
+        model.status, model.is_favorite, model.recommendation_type
+    ).all()
+    return summarize_counts(rows)
+
+
+def _counter_expressions() -> Dict[str, str]:
+    """SQL aggregate per counter column, same rules as summarize_counts"""
+    expressions = {'total': 'COUNT(*)',
+                   'favorite': 'COALESCE(SUM(CASE WHEN is_favorite THEN 1 ELSE 0 END), 0)'}
+    for status in STATUSES:
+        expressions[status] = f"COALESCE(SUM(CASE WHEN status = '{status}' THEN 1 ELSE 0 END), 0)"
+    for recommendation_type in TYPES:
+        expressions[recommendation_type] = (
+            f"COALESCE(SUM(CASE WHEN recommendation_type = '{recommendation_type}' THEN 1 ELSE 0 END), 0)"
+        )
+    return expressions
+
+
+def _read_counters(session: Any, user_id: str):
+    return session.execute(
+        text(f"SELECT {', '.join(COUNTER_COLUMNS)} FROM {COUNTER_TABLE} WHERE user_id = :user_id"),
+        {'user_id': user_id}
+    ).first()
+
+
+def lock_user(connection: Any, user_id: str):
+    """Row-lock the user until the transaction ends (SQLite already allows a single writer)"""
+    if connection.dialect.name == 'sqlite':
+        return
+    connection.execute(text(f"SELECT id FROM {USER_TABLE} WHERE id = :user_id FOR UPDATE"),
+                       {'user_id': user_id})
+
+
+def backfill_user_counters(session: Any, recommendation_cls: Any, user_id: str):
+    """
+    Create the user's counters row from the recommendations table
+
+    Takes the user lock first: a transaction that inserted recommendations but has not
+    committed holds it (apply_counter_deltas), so the INSERT ... SELECT runs after its
+    commit and counts its rows. If another worker backfilled first, its row is kept.
+    The row is written in the caller's transaction; the caller commits.
+    """
+    lock_user(session.connection(), user_id)
+    expressions = _counter_expressions()
+    session.execute(text(f"""
+        INSERT INTO {COUNTER_TABLE} (user_id, {', '.join(COUNTER_COLUMNS)}, updated_at)
+        SELECT :user_id, {', '.join(expressions[c] for c in COUNTER_COLUMNS)}, :now
+        FROM {recommendation_cls.__table__.name}
+        WHERE user_id = :user_id
+        ON CONFLICT (user_id) DO NOTHING
+    """), {'user_id': user_id, 'now': datetime.utcnow()})
+    logger.info(f"📇 Recommendation counters backfilled for user {user_id}")
+
+
+def get_user_counts(recommendation_cls: Any, user_id: str, use_counters: bool = False) -> Dict[str, int]:
+    """
+    Counters for one user
+
+    With use_counters the counters row is read by primary key; a missing row is
+    backfilled from the recommendations table (first read after enabling the table)
+    without committing, so the request commits it with its own work.
+    """
+    if not use_counters:
+        return aggregate_user_counts(recommendation_cls, user_id)
+
+    session = recommendation_cls.query.session
+    row = _read_counters(session, user_id)
+    if row is None:
+        backfill_user_counters(session, recommendation_cls, user_id)
+        row = _read_counters(session, user_id)
+    return dict(row._mapping)
+
+
+def _contribution(values: Dict[str, Any]) -> Dict[str, int]:
+    delta = {'total': 1}
+    if values['is_favorite']:
+        delta['favorite'] = 1
+    if values['status'] in STATUSES:
+        delta[values['status']] = 1
+    if values['recommendation_type'] in TYPES:
+        delta[values['recommendation_type']] = 1
+    return delta
+
+
+def _values(obj: Any, committed: bool) -> Dict[str, Any]:
+    """Current or last-committed counter-relevant attributes (column defaults for pending rows)"""
+    state = inspect(obj)
+    values = {}
+    for attr in ('user_id', 'status', 'is_favorite', 'recommendation_type'):
+        history = state.attrs[attr].history
+        if committed and history.deleted:
+            values[attr] = history.deleted[0]
+        else:
+            values[attr] = getattr(obj, attr)
+    values['status'] = values['status'] or 'active'
+    values['is_favorite'] = bool(values['is_favorite'])
+    return values
+
+
+def counter_deltas(session: Any, recommendation_cls: Any) -> Dict[str, Dict[str, int]]:
+    """Per-user counter changes implied by the session's pending inserts, updates and deletes"""
+    deltas = defaultdict(lambda: defaultdict(int))
+
+    def apply(values, sign):
+        for column, amount in _contribution(values).items():
+            deltas[values['user_id']][column] += sign * amount
+
+    for obj in session.new:
+        if isinstance(obj, recommendation_cls):
+            apply(_values(obj, committed=False), 1)
+    for obj in session.deleted:
+        if isinstance(obj, recommendation_cls):
+            apply(_values(obj, committed=True), -1)
+    for obj in session.dirty:
+        if isinstance(obj, recommendation_cls) and session.is_modified(obj):
+            before, after = _values(obj, committed=True), _values(obj, committed=False)
+            if before != after:
+                apply(before, -1)
+                apply(after, 1)
+
+    return {
+        user_id: {c: n for c, n in columns.items() if n}
+        for user_id, columns in deltas.items()
+        if any(columns.values())
+    }
+
+
+def inserted_row_deltas(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Per-user counter changes for rows inserted outside the ORM (bulk INSERT)"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        values = {'user_id': row['user_id'], 'recommendation_type': row['recommendation_type'],
+                  'status': row.get('status') or 'active', 'is_favorite': bool(row.get('is_favorite'))}
+        for column, amount in _contribution(values).items():
+            deltas[values['user_id']][column] += amount
+    return {user_id: dict(columns) for user_id, columns in deltas.items()}
+
+
+def apply_counter_deltas(connection: Any, deltas: Dict[str, Dict[str, int]]):
+    """
+    Add deltas to the users' counters rows; rows that do not exist yet are backfilled on first read
+
+    Each user is locked before its UPDATE (in user id order, so two writers cannot
+    deadlock), which keeps a concurrent backfill from missing this transaction's rows.
+    """
+    now = datetime.utcnow()
+    for user_id, columns in sorted(deltas.items()):
+        lock_user(connection, user_id)
+        assignments = ', '.join(f'{c} = {c} + :{c}' for c in columns)
+        connection.execute(
+            text(f"UPDATE {COUNTER_TABLE} SET {assignments}, updated_at = :now WHERE user_id = :user_id"),
+            {'user_id': user_id, 'now': now, **columns}
+        )
+
+
+def install_counter_maintenance(session: Any, recommendation_cls: Any):
+    """Keep user_recommendation_counters in step with every flush of the given session"""
+
+    @event.listens_for(session, 'before_flush')
+    def _maintain_counters(flush_session, flush_context, instances):
+        deltas = counter_deltas(flush_session, recommendation_cls)
+        if deltas:
+            apply_counter_deltas(flush_session.connection(), deltas)
+
+    logger.info("📇 Recommendation counter maintenance installed")
+    return _maintain_counters
@@ -0,0 +1,217 @@
+"""
+Requirement Index
+Per-process, versioned in-memory interval index over the requirement ranges of all
+active products, answering "which products fit this environment and which
+constraints fail" without testing every product in Python.
+
+For every feature the index keeps the products' min bounds and max bounds sorted,
+plus suffix bitsets (Python ints, bit i = product i) at every BLOCK-th position.
+The set of products whose min lies above a value is one bisect, one precomputed
+suffix bitset and at most BLOCK single-bit ORs; the same for max bounds below the
+value. Per-feature violation bitsets are OR-ed, and products that fit are
+all_products & ~violations. Only failing products are expanded into messages.
+
+Semantics follow ProductRequirements.is_suitable_for_environment: a bound of 0 /
+None is "no bound", and a feature the environment does not report is not checked.
+"""
+import bisect
+import copy
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from services.bulk_recommendations import SUITABILITY_CHECKS, load_products_with_requirements
+from services.cached_index import CachedIndex, register_product_index
+
+# Sorted entries between two precomputed suffix bitsets
+BLOCK = 64
+
+
+def _bits(bits: int) -> Iterable[int]:
+    """Positions of the set bits, lowest first"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class _SortedBounds:
+    """Sorted keys with block suffix bitsets: above(x) = positions whose key > x"""
+
+    def __init__(self, entries: List[Tuple[float, int]]):
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.positions = [position for _, position in entries]
+        blocks = -(-len(entries) // BLOCK)
+        self.suffix = [0] * (blocks + 1)
+        bits = 0
+        for index in range(len(entries) - 1, -1, -1):
+            bits |= 1 << self.positions[index]
+            if index % BLOCK == 0:
+                self.suffix[index // BLOCK] = bits
+
+    def above(self, value: float) -> int:
+        start = bisect.bisect_right(self.keys, value)
+        block = -(-start // BLOCK)
+        bits = self.suffix[block]
+        for index in range(start, min(block * BLOCK, len(self.keys))):
+            bits |= 1 << self.positions[index]
+        return bits
+
+
+class IndexedProduct:
+    """Read-only, session-independent snapshot of a product and its requirement bounds"""
+
+    def __init__(self, product: Any, features: Sequence[Tuple[str, str]]):
+        requirements = product.requirements
+        self.id = product.id
+        self.name = product.name
+        self.bounds = {name: (getattr(requirements, f'{name}_min'), getattr(requirements, f'{name}_max'))
+                       for name, _ in features}
+        self._data = product.to_dict()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._data)
+
+    def __repr__(self):
+        return f'<IndexedProduct {self.name}>'
+
+
+class RequirementMatch:
+    """Result of one lookup; bitsets over the index's product positions"""
+
+    def __init__(self, index: 'RequirementIndex', values: Dict[str, Any], too_low: Dict[str, int],
+                 too_high: Dict[str, int], version: int):
+        self.index = index
+        self.values = values
+        self.too_low = too_low
+        self.too_high = too_high
+        self.version = version
+        self.failing = 0
+        for bits in list(too_low.values()) + list(too_high.values()):
+            self.failing |= bits
+        self.fitting = index._all & ~self.failing
+
+    def suitable_products(self) -> List[IndexedProduct]:
+        return [self.index.products[position] for position in _bits(self.fitting)]
+
+    def issues(self, position: int) -> List[str]:
+        """Failed constraints of one product, in is_suitable_for_environment order"""
+        product = self.index.products[position]
+        issues = []
+        for name, label in self.index.features:
+            low, high = product.bounds[name]
+            if self.too_low.get(name, 0) >> position & 1:
+                issues.append(f"{label} too low: {self.values[name]} < {low}")
+            if self.too_high.get(name, 0) >> position & 1:
+                issues.append(f"{label} too high: {self.values[name]} > {high}")
+        return issues
+
+    def failures(self) -> Dict[str, List[str]]:
+        """{product_id: issues} for the products that do not fit"""
+        return {self.index.products[position].id: self.issues(position) for position in _bits(self.failing)}
+
+    def score(self, position: int) -> float:
+        """1.0 when suitable, else share of bounded, reported features that pass (the routes' partial score)"""
+        if not self.failing >> position & 1:
+            return 1.0
+        checks = [name for name, _ in self.index.features if self.index._bounded[name] >> position & 1]
+        if not checks:
+            return 0.0
+        passed = sum(1 for name in checks if self.values.get(name)
+                     and not (self.too_low.get(name, 0) | self.too_high.get(name, 0)) >> position & 1)
+        return passed / len(checks)
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        """Every product as the /recommend endpoints return it, best score first"""
+        results = [{
+            'product': product.to_dict(),
+            'suitability_score': self.score(position),
+            'suitable': not self.failing >> position & 1,
+            'issues': self.issues(position)
+        } for position, product in enumerate(self.index.products)]
+        results.sort(key=lambda result: result['suitability_score'], reverse=True)
+        return results
+
+
+class RequirementIndex(CachedIndex):
+    """
+    Interval index over the requirements of one Product model
+
+    Refreshed as a CachedIndex: rebuilt after product / requirement commits in this
+    process (register_product_index) and when the count / max(updated_at)
+    fingerprint of products and requirements changes.
+    """
+
+    label = 'Requirement index'
+
+    def __init__(self, product_cls: Any, features: Sequence[Tuple[str, str]] = SUITABILITY_CHECKS,
+                 refresh_interval: float = 60.0):
+        super().__init__(product_cls, refresh_interval)
+        self.features = tuple(features)
+        self.products: List[IndexedProduct] = []
+        self._all = 0
+        self._bounded: Dict[str, int] = {}
+        self._mins: Dict[str, _SortedBounds] = {}
+        self._maxs: Dict[str, _SortedBounds] = {}
+
+    def _read_fingerprint(self):
+        from sqlalchemy import func
+        product = self.model_cls
+        requirements = product.requirements.property.mapper.class_
+        return product.query.outerjoin(product.requirements).with_entities(
+            func.count(product.id), func.max(product.updated_at), func.max(requirements.updated_at)
+        ).one()
+
+    def _load_rows(self):
+        return load_products_with_requirements(self.model_cls)
+
+    def _swap_in(self, products: Iterable[Any]) -> int:
+        snapshots = [IndexedProduct(p, self.features) for p in products if p.requirements]
+        mins, maxs, bounded = {}, {}, {}
+        for name, _ in self.features:
+            low_entries, high_entries, bounded_bits = [], [], 0
+            for position, snapshot in enumerate(snapshots):
+                low, high = snapshot.bounds[name]
+                if low:
+                    low_entries.append((float(low), position))
+                if high:
+                    # max < value  <=>  -max > -value
+                    high_entries.append((-float(high), position))
+                if low is not None or high is not None:
+                    bounded_bits |= 1 << position
+            mins[name] = _SortedBounds(low_entries)
+            maxs[name] = _SortedBounds(high_entries)
+            bounded[name] = bounded_bits
+
+        self.products = snapshots
+        self._all = (1 << len(snapshots)) - 1
+        self._mins, self._maxs, self._bounded = mins, maxs, bounded
+        return len(snapshots)
+
+    def match(self, environment: Any) -> RequirementMatch:
+        """Check all products against an EnvironmentData row or a {'ph': ..., ...} mapping"""
+        self._ensure_fresh()
+        values, too_low, too_high = {}, {}, {}
+        for name, _ in self.features:
+            value = environment.get(name) if isinstance(environment, Mapping) else getattr(environment, name, None)
+            values[name] = value
+            if value is None:
+                continue
+            too_low[name] = self._mins[name].above(float(value))
+            too_high[name] = self._maxs[name].above(-float(value))
+        return RequirementMatch(self, values, too_low, too_high, self.version)
+
+
+_indexes: Dict[Any, RequirementIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def get_requirement_index(product_cls: Any) -> RequirementIndex:
+    """Process-wide index for a Product model class (created on first use)"""
+    index = _indexes.get(product_cls)
+    if index is None:
+        with _registry_lock:
+            if product_cls not in _indexes:
+                _indexes[product_cls] = register_product_index(RequirementIndex(product_cls))
+            index = _indexes[product_cls]
+    return index
@@ -0,0 +1,318 @@
+"""
+Rollups
+Pre-aggregated rollup tables for the statistics endpoints. A background step
+(python -m services.rollups, e.g. from cron) folds closed periods of the raw
+transaction tables into small rollup tables and advances a per-rollup watermark;
+readers combine the rollup rows with a GROUP BY over the not-yet-rolled tail, so
+results are exact while the raw scan stays bounded to roughly one period.
+
+- model_usage_daily: completed model results per day / model_type / algorithm
+- activity_usage_hourly: activity log counts, sums and a response-time histogram
+  per hour / user / type / category / device / platform
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WATERMARK_TABLE = 'rollup_watermarks'
+MODEL_USAGE_TABLE = 'model_usage_daily'
+MODEL_USAGE = 'model_usage_daily'
+ACTIVITY_USAGE_TABLE = 'activity_usage_hourly'
+ACTIVITY_USAGE = 'activity_usage_hourly'
+
+# Upper bounds (ms) of the response-time histogram buckets; one more bucket holds the rest
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500)
+LATENCY_COLUMNS = tuple(f'latency_le_{b}' for b in LATENCY_BUCKETS) + (f'latency_gt_{LATENCY_BUCKETS[-1]}',)
+LATENCY_LABELS = tuple(f'<={b}' for b in LATENCY_BUCKETS) + (f'>{LATENCY_BUCKETS[-1]}',)
+
+ACTIVITY_DIMENSIONS = ('user_id', 'activity_type', 'activity_category', 'device_type', 'platform')
+ACTIVITY_MEASURES = ('activity_count', 'success_count', 'response_count', 'response_time_sum') + LATENCY_COLUMNS
+
+# Hour bucket of created_at per dialect (colons escaped for text())
+HOUR_EXPRESSIONS = {
+    'postgresql': "date_trunc('hour', created_at)",
+    'sqlite': r"strftime('%Y-%m-%d %H\:00\:00', created_at)",
+}
+
+
+def get_watermark(session: Any, name: str) -> Optional[datetime]:
+    """End (exclusive) of the span already folded into rollup `name`, or None"""
+    value = session.execute(
+        text(f"SELECT rolled_until FROM {WATERMARK_TABLE} WHERE name = :name"), {'name': name}
+    ).scalar()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value
+
+
+def _set_watermark(session: Any, name: str, rolled_until: datetime):
+    session.execute(text(f"""
+        INSERT INTO {WATERMARK_TABLE} (name, rolled_until, updated_at) VALUES (:name, :until, :now)
+        ON CONFLICT (name) DO UPDATE SET rolled_until = excluded.rolled_until, updated_at = excluded.updated_at
+    """), {'name': name, 'until': rolled_until, 'now': datetime.utcnow()})
+
+
+def _day_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _day(value: Any) -> str:
+    """date / datetime / 'YYYY-MM-DD...' -> 'YYYY-MM-DD' (SQLite returns strings)"""
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)[:10]
+
+
+def _hour_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day, moment.hour)
+
+
+def _split_window(cutoff: datetime, now: datetime, watermark: Optional[datetime],
+                  period_start: Callable[[datetime], datetime], period: timedelta):
+    """
+    Split [cutoff, now) into raw spans and one span answerable from the rollup
+
+    Returns (raw_spans, rolled_span): whole periods between the cutoff and the
+    watermark are rolled; the partial first period and the tail are raw.
+    """
+    if watermark is None or watermark <= cutoff:
+        return [(cutoff, now)], None
+    first_full = cutoff if period_start(cutoff) == cutoff else period_start(cutoff) + period
+    if first_full >= watermark:
+        return [(cutoff, now)], None
+    return [(cutoff, first_full), (watermark, now)], (first_full, watermark)
+
+
+def _fold(session: Any, name: str, target_table: str, period_column: str, insert_sql: str,
+          since: Optional[datetime], until: datetime) -> int:
+    """Replace [since, until) of a rollup with insert_sql and advance its watermark, in one transaction"""
+    try:
+        if since is not None:
+            session.execute(text(f"DELETE FROM {target_table} WHERE {period_column} >= :since"),
+                            {'since': since.date() if period_column == 'day' else since})
+        rows_written = session.execute(text(insert_sql), {'since': since, 'until': until}).rowcount
+        _set_watermark(session, name, until)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    logger.info(f"📅 {target_table}: {rows_written} rows rolled up to {until}")
+    return rows_written
+
+
+def rollup_model_usage(session: Any, now: Optional[datetime] = None, lookback_days: int = 1,
+                       source_table: str = 'model_results') -> Dict[str, Any]:
+    """
+    Fold completed days of model_results into model_usage_daily
+
+    Days from (watermark - lookback_days) up to, but excluding, today are recomputed
+    with one DELETE + INSERT ... SELECT GROUP BY in a single transaction, so rows that
+    finished late are picked up and re-running the step is idempotent.
+    """
+    now = now or datetime.utcnow()
+    until = _day_start(now)
+    watermark = get_watermark(session, MODEL_USAGE)
+    since = watermark - timedelta(days=lookback_days) if watermark else None
+    if since is not None and since >= until:
+        return {'rollup': MODEL_USAGE, 'days_from': None, 'rows_written': 0}
+
+    since_filter = 'AND created_at >= :since' if since is not None else ''
+    rows_written = _fold(session, MODEL_USAGE, MODEL_USAGE_TABLE, 'day', f"""
+        INSERT INTO {MODEL_USAGE_TABLE} (day, model_type, algorithm, request_count, processing_time_sum)
+        SELECT DATE(created_at), model_type, algorithm, COUNT(*), SUM(COALESCE(processing_time_ms, 0))
+        FROM {source_table}
+        WHERE status = 'completed' AND created_at < :until {since_filter}
+        GROUP BY DATE(created_at), model_type, algorithm
+    """, since, until)
+
+    return {'rollup': MODEL_USAGE, 'days_from': since.date().isoformat() if since else None,
+            'rolled_until': until.isoformat(), 'rows_written': rows_written}
+
+
+def _raw_model_usage(session: Any, start: datetime, end: datetime, model_type: Optional[str],
+                     source_table: str) -> List[Tuple]:
+    if start >= end:
+        return []
+    type_filter = 'AND model_type = :model_type' if model_type else ''
+    return session.execute(text(f"""
+        SELECT DATE(created_at), model_type, algorithm, COUNT(*), SUM(COALESCE(processing_time_ms, 0))
+        FROM {source_table}
+        WHERE status = 'completed' AND created_at >= :start AND created_at < :end {type_filter}
+        GROUP BY DATE(created_at), model_type, algorithm
+    """), {'start': start, 'end': end, 'model_type': model_type}).all()
+
+
+def model_usage_statistics(session: Any, model_type: Optional[str] = None, days: int = 30,
+                           now: Optional[datetime] = None, source_table: str = 'model_results') -> Dict[str, Any]:
+    """
+    Same result as the former ModelResult.get_model_statistics loop
+
+    Whole days between the cutoff and the watermark come from model_usage_daily;
+    the partial first day and everything after the watermark come from a GROUP BY
+    over model_results.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=days)
+    watermark = get_watermark(session, MODEL_USAGE)
+
+    raw_spans, rolled_span = _split_window(cutoff, now, watermark, _day_start, timedelta(days=1))
+
+    rows = []
+    for start, end in raw_spans:
+        rows += _raw_model_usage(session, start, end, model_type, source_table)
+    if rolled_span:
+        type_filter = 'AND model_type = :model_type' if model_type else ''
+        rows += session.execute(text(f"""
+            SELECT day, model_type, algorithm, request_count, processing_time_sum
+            FROM {MODEL_USAGE_TABLE}
+            WHERE day >= :start AND day < :end {type_filter}
+        """), {'start': rolled_span[0].date(), 'end': rolled_span[1].date(), 'model_type': model_type}).all()
+
+    total = 0
+    processing_sum = 0.0
+    by_type, by_algorithm, by_day = defaultdict(int), defaultdict(int), defaultdict(int)
+    for day, row_type, algorithm, count, time_sum in rows:
+        total += count
+        processing_sum += float(time_sum or 0)
+        by_type[row_type] += count
+        by_algorithm[algorithm] += count
+        by_day[_day(day)] += count
+
+    return {
+        'total_requests': total,
+        'avg_processing_time': processing_sum / total if total else 0,
+        'model_types': dict(by_type),
+        'algorithms': dict(by_algorithm),
+        'daily_requests': dict(sorted(by_day.items()))
+    }
+
+
+def _activity_measures_sql() -> str:
+    """Counts, sums and histogram columns, in ACTIVITY_MEASURES order"""
+    timed = 'response_time_ms IS NOT NULL AND response_time_ms <> 0'
+    columns = [
+        'COUNT(*)',
+        "SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END)",
+        f'SUM(CASE WHEN {timed} THEN 1 ELSE 0 END)',
+        f'SUM(CASE WHEN {timed} THEN response_time_ms ELSE 0 END)',
+    ]
+    lower = None
+    for upper in LATENCY_BUCKETS:
+        above = f' AND response_time_ms > {lower}' if lower is not None else ''
+        columns.append(f'SUM(CASE WHEN {timed}{above} AND response_time_ms <= {upper} THEN 1 ELSE 0 END)')
+        lower = upper
+    columns.append(f'SUM(CASE WHEN {timed} AND response_time_ms > {lower} THEN 1 ELSE 0 END)')
+    return ', '.join(columns)
+
+
+_ACTIVITY_KEYS = ("user_id, activity_type, activity_category, "
+                  "COALESCE(device_type, ''), COALESCE(platform, '')")
+
+
+def rollup_activity_usage(session: Any, now: Optional[datetime] = None, lookback_hours: int = 2,
+                          source_table: str = 'user_activity_logs') -> Dict[str, Any]:
+    """
+    Fold completed hours of user_activity_logs into activity_usage_hourly
+
+    Same scheme as rollup_model_usage with hourly periods: the lookback window is
+    recomputed on every run, everything before it is never scanned again.
+    """
+    now = now or datetime.utcnow()
+    until = _hour_start(now)
+    watermark = get_watermark(session, ACTIVITY_USAGE)
+    since = watermark - timedelta(hours=lookback_hours) if watermark else None
+    if since is not None and since >= until:
+        return {'rollup': ACTIVITY_USAGE, 'hours_from': None, 'rows_written': 0}
+
+    hour = HOUR_EXPRESSIONS.get(session.get_bind().dialect.name, HOUR_EXPRESSIONS['postgresql'])
+    since_filter = 'AND created_at >= :since' if since is not None else ''
+    rows_written = _fold(session, ACTIVITY_USAGE, ACTIVITY_USAGE_TABLE, 'hour', f"""
+        INSERT INTO {ACTIVITY_USAGE_TABLE} (hour, {', '.join(ACTIVITY_DIMENSIONS)}, {', '.join(ACTIVITY_MEASURES)})
+        SELECT {hour}, {_ACTIVITY_KEYS}, {_activity_measures_sql()}
+        FROM {source_table}
+        WHERE created_at < :until {since_filter}
+        GROUP BY {hour}, {_ACTIVITY_KEYS}
+    """, since, until)
+
+    return {'rollup': ACTIVITY_USAGE, 'hours_from': since.isoformat() if since else None,
+            'rolled_until': until.isoformat(), 'rows_written': rows_written}
+
+
+def activity_statistics(session: Any, user_id: Optional[str] = None, days: int = 30,
+                        now: Optional[datetime] = None, source_table: str = 'user_activity_logs') -> Dict[str, Any]:
+    """
+    Same result as the former UserActivityLog.get_activity_statistics loop, plus
+    a response-time histogram
+
+    Whole hours up to the watermark come from activity_usage_hourly; the partial
+    first hour and the tail are grouped per day over user_activity_logs.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=days)
+    watermark = get_watermark(session, ACTIVITY_USAGE)
+    raw_spans, rolled_span = _split_window(cutoff, now, watermark, _hour_start, timedelta(hours=1))
+    user_filter = 'AND user_id = :user_id' if user_id else ''
+    keys = 'activity_type, activity_category, device_type, platform'
+
+    rows = []
+    for start, end in raw_spans:
+        if start < end:
+            rows += session.execute(text(f"""
+                SELECT DATE(created_at), {keys}, {_activity_measures_sql()}
+                FROM {source_table}
+                WHERE created_at >= :start AND created_at < :end {user_filter}
+                GROUP BY DATE(created_at), {keys}
+            """), {'start': start, 'end': end, 'user_id': user_id}).all()
+    if rolled_span:
+        rows += session.execute(text(f"""
+            SELECT hour, {keys}, {', '.join(ACTIVITY_MEASURES)}
+            FROM {ACTIVITY_USAGE_TABLE}
+            WHERE hour >= :start AND hour < :end {user_filter}
+        """), {'start': rolled_span[0], 'end': rolled_span[1], 'user_id': user_id}).all()
+
+    by_type, by_category, by_day = defaultdict(int), defaultdict(int), defaultdict(int)
+    by_device, by_platform = defaultdict(int), defaultdict(int)
+    totals = dict.fromkeys(ACTIVITY_MEASURES, 0)
+    for period, activity_type, category, device, platform, *measures in rows:
+        count = measures[0]
+        by_type[activity_type] += count
+        by_category[category] += count
+        by_day[_day(period)] += count
+        if device:
+            by_device[device] += count
+        if platform:
+            by_platform[platform] += count
+        for column, value in zip(ACTIVITY_MEASURES, measures):
+            totals[column] += value or 0
+
+    total = totals['activity_count']
+    return {
+        'total_activities': total,
+        'activities_by_type': dict(by_type),
+        'activities_by_category': dict(by_category),
+        'success_rate': totals['success_count'] / total * 100 if total else 0,
+        'avg_response_time': totals['response_time_sum'] / totals['response_count'] if totals['response_count'] else 0,
+        'daily_activities': dict(sorted(by_day.items())),
+        'device_breakdown': dict(by_device),
+        'platform_breakdown': dict(by_platform),
+        'response_time_histogram': {label: totals[c] for label, c in zip(LATENCY_LABELS, LATENCY_COLUMNS)}
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from app import app, db
+
+    parser = argparse.ArgumentParser(description='Fold closed periods into the statistics rollup tables')
+    parser.add_argument('--lookback-days', type=int, default=1, help='model_usage_daily days to recompute')
+    parser.add_argument('--lookback-hours', type=int, default=2, help='activity_usage_hourly hours to recompute')
+    args = parser.parse_args()
+
+    with app.app_context():
+        results = [rollup_model_usage(db.session, lookback_days=args.lookback_days),
+                   rollup_activity_usage(db.session, lookback_hours=args.lookback_hours)]
+        print(json.dumps(results, indent=2))
@@ -6,6 +6,7 @@ from typing import Dict, Any, Optional
 from scipy.optimize import differential_evolution
 from .base_predictor import BasePredictor
 from utils.logger import get_logger
+from utils.tracing import span
 
 logger = get_logger(__name__)
 
@@ -98,34 +99,36 @@ class XGBoostCropPredictor(BasePredictor):
                     'error': f'Missing required features: {", ".join(missing_features)}'
                 }
             
-            # Create DataFrame
-            df = pd.DataFrame([environment_data])
+            with span('xgboost.preprocess'):
+                # Create DataFrame
+                df = pd.DataFrame([environment_data])
+                
+                # Encode categorical features
+                for col in self.categorical_features:
+                    if col in df.columns and col in self.encoders:
+                        try:
+                            df[col] = self.encoders[col].transform(df[col].astype(str))
+                        except ValueError as e:
+                            logger.warning(f"Unknown category in '{col}': {df[col].iloc[0]}")
+                            # Use first class as fallback
+                            df[col] = 0
+                
+                # Ensure numeric types
+                for col in self.numeric_features:
+                    if col in df.columns:
+                        df[col] = pd.to_numeric(df[col], errors='coerce')
+                
+                # Order features correctly
+                X = df[self.feature_order]
             
-            # Encode categorical features
-            for col in self.categorical_features:
-                if col in df.columns and col in self.encoders:
-                    try:
-                        df[col] = self.encoders[col].transform(df[col].astype(str))
-                    except ValueError as e:
-                        logger.warning(f"Unknown category in '{col}': {df[col].iloc[0]}")
-                        # Use first class as fallback
-                        df[col] = 0
-            
-            # Ensure numeric types
-            for col in self.numeric_features:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Order features correctly
-            X = df[self.feature_order]
-            
-            # Get prediction
-            prediction_encoded = self.model.predict(X)[0]
-            predicted_crop = self.encoders['crop'].inverse_transform([prediction_encoded])[0]
-            
-            # Get probabilities
-            probabilities = self.model.predict_proba(X)[0]
-            crops = self.encoders['crop'].classes_
+            with span('xgboost.predict'):
+                # Get prediction
+                prediction_encoded = self.model.predict(X)[0]
+                predicted_crop = self.encoders['crop'].inverse_transform([prediction_encoded])[0]
+                
+                # Get probabilities
+                probabilities = self.model.predict_proba(X)[0]
+                crops = self.encoders['crop'].classes_
             
             # Get top 3
             top_indices = np.argsort(probabilities)[::-1][:3]
@@ -222,14 +225,15 @@ class XGBoostCropPredictor(BasePredictor):
             
             # Run optimization
             logger.info("   Running differential evolution optimization...")
-            result = differential_evolution(
-                objective,
-                bounds,
-                maxiter=60,
-                seed=42,
-                workers=1,
-                polish=True
-            )
+            with span('xgboost.optimize', crop=crop, region=region):
+                result = differential_evolution(
+                    objective,
+                    bounds,
+                    maxiter=60,
+                    seed=42,
+                    workers=1,
+                    polish=True
+                )
             
             # Extract optimal values
             best_x = result.x
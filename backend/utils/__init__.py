@@ -15,6 +15,18 @@ from .logger import (
     log_success,
     log_performance
 )
+from .tracing import (
+    span,
+    traced,
+    start_trace,
+    finish_trace,
+    get_request_id,
+    server_timing_header,
+    query_stats_header,
+    query_stats_warnings,
+    instrument_sqlalchemy,
+    count_queries
+)
 
 __all__ = [
     'get_logger',
@@ -27,5 +39,15 @@ __all__ = [
     'log_error',
     'log_debug',
     'log_success',
-    'log_performance'
+    'log_performance',
+    'span',
+    'traced',
+    'start_trace',
+    'finish_trace',
+    'get_request_id',
+    'server_timing_header',
+    'query_stats_header',
+    'query_stats_warnings',
+    'instrument_sqlalchemy',
+    'count_queries'
 ]
@@ -10,6 +10,7 @@ from datetime import datetime
 from functools import wraps
 import time
 from typing import Any, Callable, Dict, Optional
+from .tracing import RequestIdFilter
 
 class ColoredFormatter(logging.Formatter):
     """Custom formatter with colors for different log levels"""
@@ -85,7 +86,7 @@ class TerramindLogger:
         file_handler.setLevel(logging.DEBUG)
         
         file_formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)-8s | %(name)-20s | %(funcName)-15s:%(lineno)-4d | %(message)s'
+            '%(asctime)s | %(levelname)-8s | %(name)-20s | %(request_id)-32s | %(funcName)-15s:%(lineno)-4d | %(message)s'
         )
         file_handler.setFormatter(file_formatter)
         
@@ -98,6 +99,11 @@ class TerramindLogger:
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(file_formatter)
         
+        # Tag every record with the current request id
+        request_id_filter = RequestIdFilter()
+        for handler in (console_handler, file_handler, error_handler):
+            handler.addFilter(request_id_filter)
+        
         # Add handlers to logger
         self.logger.addHandler(console_handler)
         self.logger.addHandler(file_handler)
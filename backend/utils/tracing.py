@@ -0,0 +1,418 @@
+"""
+Lightweight request tracing for Terramind Backend API
+Assigns a request id per request, records nested timed spans and exports
+sampled traces to a rotating JSONL file and a Server-Timing header.
+Every request (sampled or not) also counts its SQL statements: total time,
+slowest statements and statement shapes repeated often enough to be an N+1.
+"""
+
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Per-request trace state (works for threads and greenlets alike)
+_current_trace: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('terramind_trace', default=None)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class Span:
+    """A single timed unit of work inside a trace"""
+
+    __slots__ = ('span_id', 'parent_id', 'name', 'attributes', 'start_time', '_start', 'duration_ms', 'error')
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self, request_id: str) -> Dict[str, Any]:
+        return {
+            'request_id': request_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start_time,
+            'duration_ms': round(self.duration_ms or 0.0, 3),
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+# Bind parameters of any paramstyle, then lists of them: IN (?, ?, ?) and multi-row VALUES
+_BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with whitespace, bind parameters and parameter lists normalized"""
+    shape = _BIND_PARAMETER.sub('?', ' '.join(statement.split()))
+    shape = _PARAMETER_LIST.sub('(?)', shape)
+    return _REPEATED_LIST.sub('(?)', shape)
+
+
+class QueryStats:
+    """SQL statements executed during one request (or one assert_max_queries block)"""
+
+    def __init__(self, slowest: int = 5):
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Dict[str, int] = {}
+        self._slowest_size = slowest
+        self._slowest: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        entry = (duration_ms, next(self._sequence), statement[:500])
+        if len(self._slowest) < self._slowest_size:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and duration_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self) -> List[Tuple[float, str]]:
+        """[(duration_ms, statement)] slowest first"""
+        return [(duration, statement) for duration, _, statement in sorted(self._slowest, reverse=True)]
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed more than threshold times (likely N+1), most frequent first"""
+        return sorted(((shape, count) for shape, count in self.shapes.items() if count > threshold),
+                      key=lambda item: item[1], reverse=True)
+
+
+class Trace:
+    """Spans and SQL statement stats collected for one request"""
+
+    def __init__(self, request_id: str, sampled: bool, slowest_queries: int = 5):
+        self.request_id = request_id
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self._stack: List[Span] = []
+        self.queries = QueryStats(slowest_queries)
+
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent_id = self._stack[-1].span_id if self._stack else None
+        span = Span(name, parent_id, attributes)
+        self._stack.append(span)
+        return span
+
+    def end_span(self, span: Span):
+        span.finish()
+        if self._stack and self._stack[-1] is span:
+            self._stack.pop()
+        elif span in self._stack:
+            self._stack.remove(span)
+        self.spans.append(span)
+
+
+class Tracer:
+    """Centralized tracing configuration (singleton, like TerramindLogger)"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.sample_rate = min(max(_env_float('TRACE_SAMPLE_RATE', 0.05), 0.0), 1.0)
+            self.trace_file = os.getenv(
+                'TRACE_FILE',
+                os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'traces.jsonl')
+            )
+            self._exporter: Optional[logging.Logger] = None
+            # Same statement shape more often than this in one request is reported as a likely N+1
+            self.n_plus_one_threshold = int(_env_float('QUERY_N_PLUS_ONE_THRESHOLD', 10))
+            self.slow_query_ms = _env_float('SLOW_QUERY_MS', 200.0)
+            self.slowest_queries = int(_env_float('QUERY_SLOWEST_COUNT', 5))
+            Tracer._initialized = True
+
+    def _get_exporter(self) -> logging.Logger:
+        """Create the rotating JSONL exporter on first use"""
+        if self._exporter is None:
+            os.makedirs(os.path.dirname(self.trace_file), exist_ok=True)
+            exporter = logging.getLogger('terramind_trace_export')
+            exporter.setLevel(logging.INFO)
+            exporter.handlers.clear()
+            handler = logging.handlers.RotatingFileHandler(
+                self.trace_file,
+                maxBytes=int(_env_float('TRACE_FILE_MAX_BYTES', 20 * 1024 * 1024)),  # 20MB
+                backupCount=5
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            exporter.addHandler(handler)
+            exporter.propagate = False
+            self._exporter = exporter
+        return self._exporter
+
+    def should_sample(self) -> bool:
+        if self.sample_rate <= 0:
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def start_trace(self, request_id: Optional[str] = None, sampled: Optional[bool] = None,
+                    root_name: str = 'request') -> Trace:
+        """Start a trace (with an open root span when sampled) for the current context"""
+        trace = Trace(
+            request_id=request_id or uuid.uuid4().hex,
+            sampled=self.should_sample() if sampled is None else sampled,
+            slowest_queries=self.slowest_queries
+        )
+        if trace.sampled:
+            trace.start_span(root_name, {})
+        _current_trace.set(trace)
+        return trace
+
+    def finish_trace(self) -> Optional[Trace]:
+        """Detach the current trace and export it if it was sampled"""
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        _current_trace.set(None)
+
+        # Close the root span and any span left open by an exception path
+        while trace._stack:
+            trace.end_span(trace._stack[-1])
+
+        if trace.sampled and trace.spans:
+            self.export(trace)
+        return trace
+
+    def export(self, trace: Trace):
+        """Write one JSON line per span"""
+        try:
+            exporter = self._get_exporter()
+            for span in trace.spans:
+                exporter.info(json.dumps(span.to_dict(trace.request_id), default=str))
+        except Exception:
+            # Tracing must never break a request
+            pass
+
+
+# Global tracer instance
+tracer = Tracer()
+
+
+def get_current_trace() -> Optional[Trace]:
+    """Get the trace attached to the current context"""
+    return _current_trace.get()
+
+
+def get_request_id() -> Optional[str]:
+    """Get the request id of the current context, if any"""
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+def start_trace(request_id: Optional[str] = None, sampled: Optional[bool] = None,
+                root_name: str = 'request') -> Trace:
+    """Start a trace for the current context"""
+    return tracer.start_trace(request_id, sampled, root_name)
+
+
+def finish_trace() -> Optional[Trace]:
+    """Finish and export the current trace"""
+    return tracer.finish_trace()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a timed span; a no-op when the current request is not sampled"""
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        yield None
+        return
+
+    current = trace.start_span(name, attributes)
+    try:
+        yield current
+    except Exception as e:
+        current.error = str(e)
+        raise
+    finally:
+        trace.end_span(current)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator recording a span around a function call"""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def server_timing_header(trace: Optional[Trace]) -> Optional[str]:
+    """Build a Server-Timing header value: the root span as 'total', other spans summed by name"""
+    if trace is None or not trace.spans:
+        return None
+
+    total = None
+    totals: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for recorded in trace.spans:
+        if recorded.parent_id is None:
+            total = (total or 0.0) + (recorded.duration_ms or 0.0)
+            continue
+        totals[recorded.name] = totals.get(recorded.name, 0.0) + (recorded.duration_ms or 0.0)
+        counts[recorded.name] = counts.get(recorded.name, 0) + 1
+
+    metrics = []
+    for metric_name, duration in totals.items():
+        token = ''.join(c if c.isalnum() or c in '._-' else '_' for c in metric_name)
+        metric = f"{token};dur={duration:.1f}"
+        if counts[metric_name] > 1:
+            metric += f';desc="x{counts[metric_name]}"'
+        metrics.append(metric)
+    if total is not None:
+        metrics.append(f"total;dur={total:.1f}")
+    return ', '.join(metrics) or None
+
+
+def query_stats_header(trace: Optional[Trace]) -> Optional[str]:
+    """Debug header value: statement count, total DB time and likely N+1 shapes"""
+    if trace is None:
+        return None
+    queries = trace.queries
+    header = f"count={queries.count};dur={queries.total_ms:.1f}"
+    repeated = queries.repeated(tracer.n_plus_one_threshold)
+    if repeated:
+        header += f";n_plus_one={len(repeated)};max_repeat={repeated[0][1]}"
+    return header
+
+
+def query_stats_warnings(trace: Optional[Trace]) -> List[str]:
+    """Log lines for likely N+1 statement shapes and statements slower than SLOW_QUERY_MS"""
+    if trace is None:
+        return []
+    warnings = [f"Likely N+1: {count}x {shape[:300]}"
+                for shape, count in trace.queries.repeated(tracer.n_plus_one_threshold)]
+    warnings.extend(f"Slow query {duration:.1f}ms: {statement[:300]}"
+                    for duration, statement in trace.queries.slowest() if duration >= tracer.slow_query_ms)
+    return warnings
+
+
+def _record_query_start(conn):
+    conn.info.setdefault('terramind_query_start', []).append(time.perf_counter())
+
+
+def _record_query_end(conn, stats: QueryStats, statement: str):
+    starts = conn.info.get('terramind_query_start')
+    if starts:
+        stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+def instrument_sqlalchemy(engine):
+    """Count and time every statement of the current request; record a 'db.query' span when sampled"""
+    from sqlalchemy import event
+
+    if getattr(engine, '_terramind_tracing', False):
+        return
+    engine._terramind_tracing = True
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        _record_query_start(conn)
+        if not trace.sampled:
+            return
+        conn.info.setdefault('terramind_spans', []).append(
+            trace.start_span('db.query', {'statement': statement[:200], 'executemany': executemany})
+        )
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        _record_query_end(conn, trace.queries, statement)
+        stack = conn.info.get('terramind_spans')
+        if not stack:
+            return
+        trace.end_span(stack.pop())
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(exception_context):
+        trace = _current_trace.get()
+        conn = exception_context.connection
+        if trace is None or conn is None:
+            return
+        _record_query_end(conn, trace.queries, exception_context.statement or '')
+        stack = conn.info.get('terramind_spans')
+        if not stack:
+            return
+        failed = stack.pop()
+        failed.error = str(exception_context.original_exception)
+        trace.end_span(failed)
+
+
+@contextmanager
+def count_queries(engine, slowest: int = 5) -> Iterator[QueryStats]:
+    """Collect QueryStats for every statement run on engine inside the block (tests, scripts)"""
+    from sqlalchemy import event
+
+    stats = QueryStats(slowest)
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('terramind_count_start', []).append(time.perf_counter())
+
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('terramind_count_start')
+        if starts:
+            stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+    event.listen(engine, 'before_cursor_execute', _before)
+    event.listen(engine, 'after_cursor_execute', _after)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before)
+        event.remove(engine, 'after_cursor_execute', _after)
+
+
+class RequestIdFilter(logging.Filter):
+    """Inject the current request id into log records for correlation"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = get_request_id() or '-'
+        return True
@@ -1,69 +1,218 @@
-import pandas as pd
+"""
+Data Preprocessing
+Crop_recommendation, crop_yield ve data_core veri setlerini ortak kolon isimleriyle birleştirir,
+eksik soil_type / rainfall_mm değerlerini en yakın komşularla doldurur.
+
+Doldurma satır satır değil grup bazında yapılır: her grup (crop, eksik kolon deseni) için
+tek bir NearestNeighbors modeli kurulur ve o gruptaki tüm eksik satırlar tek seferde sorgulanır.
+
+Kullanım:
+    python DataPreprocessing.py --source-dir csv_doc --output real_data.csv
+    python DataPreprocessing.py --data-core /veri/data_core.csv --chunk-size 50000 --report
+"""
+
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
 import numpy as np
+import pandas as pd
 from sklearn.neighbors import NearestNeighbors
-from sklearn.impute import KNNImputer
 
-crop_recommendation = pd.read_csv(r"/home/nur/Desktop/GYK-Final-Project/csv_doc/Crop_recommendation.csv")
-print(crop_recommendation.head())
+SOURCE_FILES = {
+    'crop_recommendation': 'Crop_recommendation.csv',
+    'crop_yield': 'crop_yield.csv',
+    'data_core': 'data_core.csv',
+}
 
+# kolon isimlerini benzer olacak şekilde değiştir
+COLUMN_RENAMES = {
+    'crop_recommendation': {'N': 'Nitrogen', 'P': 'Phosphorus', 'K': 'Potassium', 'rainfall': 'rainfall_mm',
+                            'temperature': 'temperature_celsius', 'label': 'crop'},
+    'crop_yield': {},
+    'data_core': {'Phosphorous': 'Phosphorus', 'Temparature': 'temperature_celsius', 'Crop Type': 'crop'},
+}
 
-crop_yield = pd.read_csv(r"/home/nur/Desktop/GYK-Final-Project/csv_doc/crop_yield.csv")
-print(crop_yield.head())
+VALUE_REPLACEMENTS = {
+    'crop': {'ground nuts': 'peanut', 'paddy': 'rice'},
+    'soil_type': {'loamy': 'loam', 'clayey': 'clay'},
+}
 
+SOIL_FEATURES = ['nitrogen', 'phosphorus', 'potassium', 'temperature_celsius', 'humidity']
+RAINFALL_FEATURES = ['temperature_celsius', 'humidity', 'soil_type', 'crop', 'nitrogen']
+SOIL_NEIGHBORS = 4
+RAINFALL_NEIGHBORS = 3
 
-data_core = pd.read_csv(r"/home/nur/Desktop/GYK-Final-Project/csv_doc/data_core.csv")
-print(data_core.head())
 
-print(f"crop_recommendation", crop_recommendation.columns)
-print(f"crop_yield", crop_yield.columns)
-print(f"data_core", data_core.columns)
+class StageTimer:
+    """Aşama sürelerini toplar ve her aşama bitince yazdırır"""
 
+    def __init__(self, verbose=True):
+        self.timings = {}
+        self.verbose = verbose
 
-#kolon isimlerini benzer olacak şekilde değiştir
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.timings[name] = round(time.perf_counter() - start, 3)
+        if self.verbose:
+            print(f"[INFO] {name}: {self.timings[name]:.2f} sn")
 
-crop_recommendation = crop_recommendation.rename(
-    columns={
-        "N": "Nitrogen",
-        "P": "Phosphorus",
-        "K": "Potassium"
-    }
-)
 
-data_core = data_core.rename(columns={"Phosphorous": "Phosphorus", "Temparature": "temperature_celsius","Crop Type":"crop"})
-crop_recommendation = crop_recommendation.rename(columns={"rainfall": "rainfall_mm",
-                                                           "temperature": "temperature_celsius", "label":"crop"})
+def _normalize_columns(df, renames):
+    df = df.rename(columns=renames)
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    return df
 
-crop_recommendation.columns = crop_recommendation.columns.str.strip().str.lower().str.replace(" ", "_")
-crop_yield.columns = crop_yield.columns.str.strip().str.lower().str.replace(" ", "_")
-data_core.columns = data_core.columns.str.strip().str.lower().str.replace(" ", "_")
 
+def load_sources(paths):
+    """Kaynak CSV'leri okur, kolon isimlerini eşitler ve tek DataFrame'de birleştirir
 
+    Args:
+        paths: {'crop_recommendation': ..., 'crop_yield': ..., 'data_core': ...}; eksik anahtarlar atlanır
+    """
+    frames = [
+        _normalize_columns(pd.read_csv(path), COLUMN_RENAMES.get(name, {}))
+        for name, path in paths.items()
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def normalize_values(df):
+    """Metin gözlemleri küçük harfe çevirir ve eş anlamlı crop / soil_type isimlerini birleştirir"""
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        is_text = values.map(type).eq(str)
+        df[col] = values.where(~is_text, values.str.lower())
+    for col, mapping in VALUE_REPLACEMENTS.items():
+        if col in df.columns:
+            df[col] = df[col].replace(mapping)
+    return df
+
+
+def _iter_chunks(array, chunk_size):
+    if not chunk_size:
+        yield array
+        return
+    for start in range(0, len(array), chunk_size):
+        yield array[start:start + chunk_size]
+
+
+def _neighbor_indices(candidates, queries, n_neighbors, chunk_size=None):
+    """Her sorgu satırı için en yakın komşuların candidates içindeki konumları"""
+    nn = NearestNeighbors(n_neighbors=min(n_neighbors, len(candidates)), metric='euclidean')
+    nn.fit(candidates)
+    return np.vstack([nn.kneighbors(chunk, return_distance=False) for chunk in _iter_chunks(queries, chunk_size)])
+
+
+def _neighbor_mode(query_index, neighbor_labels):
+    """Komşu etiketlerinin satır bazında en sık değeri (eşitlikte alfabetik ilk, Series.mode gibi)"""
+    votes = pd.DataFrame({
+        'row': np.repeat(query_index, neighbor_labels.shape[1]),
+        'label': neighbor_labels.ravel()
+    })
+    counts = votes.groupby(['row', 'label']).size().rename('count').reset_index()
+    counts = counts.sort_values(['row', 'count', 'label'], ascending=[True, False, True])
+    return counts.drop_duplicates('row').set_index('row')['label']
+
+
+def impute_soil_type(df, by_crop=True, n_neighbors=SOIL_NEIGHBORS, chunk_size=None):
+    """Eksik soil_type değerlerini SOIL_FEATURES üzerinde en yakın komşuların en sık değeriyle doldurur
+
+    by_crop=True iken yalnızca aynı crop'a sahip satırlar komşu adayıdır; False iken tüm dolu satırlar.
+    Komşu adayları aşama başında bir kez belirlenir (aşama içinde doldurulanlar aday olmaz).
+    """
+    complete = df.dropna(subset=['soil_type'] + SOIL_FEATURES)
+    missing = df[df['soil_type'].isna()].dropna(subset=SOIL_FEATURES)
+    if missing.empty or complete.empty:
+        return df
+
+    if by_crop:
+        groups = [
+            (complete[complete['crop'] == crop], rows)
+            for crop, rows in missing.groupby('crop')
+            if (complete['crop'] == crop).any()
+        ]
+    else:
+        groups = [(complete, missing)]
+
+    filled = []
+    for candidates, rows in groups:
+        idx = _neighbor_indices(candidates[SOIL_FEATURES].to_numpy(), rows[SOIL_FEATURES].to_numpy(),
+                                n_neighbors, chunk_size)
+        filled.append(_neighbor_mode(rows.index.to_numpy(), candidates['soil_type'].to_numpy()[idx]))
 
-print(f"crop_recommendation", crop_recommendation.columns)
-print(f"crop_yield", crop_yield.columns)
-print(f"data_core", data_core.columns)
+    if filled:
+        fills = pd.concat(filled)
+        df.loc[fills.index, 'soil_type'] = fills
+    return df
 
-#print(crop_yield.fertilizer_used)
-#print(data_core.fertilizer_name.unique())
 
-#GÖREV
-#fertilizer_name sadece data_core da var. df ler birleştikten sonra boş kalan yerleri kmeans ile doldurabilirsin.
-#fertilizer_used değişkeni sadece crop_yield da var incele, önemsiz ise sil.
+def impute_rainfall(df, features=RAINFALL_FEATURES, n_neighbors=RAINFALL_NEIGHBORS, chunk_size=None):
+    """Eksik rainfall_mm değerlerini en yakın komşuların ortalamasıyla doldurur
+
+    Satırlar dolu olan özellik desenine göre gruplanır; her desen yalnızca o özelliklerle
+    (kategorikler one-hot) ve o özellikleri dolu olan adaylarla eşleştirilir. Adaylar
+    aşama başındaki dolu satırlardır; doldurulan değerler sonraki satırlara komşu olmaz.
+    """
+    missing = df[df['rainfall_mm'].isna()]
+    if missing.empty:
+        return df
+
+    available = missing[features].notna()
+    known = df[df['rainfall_mm'].notna()]
 
+    for pattern, rows in missing.groupby([available[f] for f in features]):
+        cols = [f for f, present in zip(features, pattern) if present]
+        if not cols:
+            continue
+        candidates = known.dropna(subset=cols)
+        if candidates.empty:
+            continue
 
-print(crop_recommendation.head())
-print(crop_yield.head())
-print(data_core.head())
+        encoded = pd.get_dummies(pd.concat([candidates[cols], rows[cols]]), dtype=float)
+        candidate_features = encoded.iloc[:len(candidates)].to_numpy()
+        row_features = encoded.iloc[len(candidates):].to_numpy()
 
+        idx = _neighbor_indices(candidate_features, row_features, n_neighbors, chunk_size)
+        df.loc[rows.index, 'rainfall_mm'] = candidates['rainfall_mm'].to_numpy()[idx].mean(axis=1)
+    return df
 
-#veri setlerini birleştirelim
 
-df = pd.concat([crop_recommendation, crop_yield, data_core], ignore_index=True)
+def preprocess(paths, chunk_size=None, verbose=True):
+    """Kaynakları okuyup birleştirir ve eksik değerleri doldurur
 
-print(df.head())
-print(df.columns)
+    chunk_size yalnızca komşu sorgularını parçalar; doldurma tüm veri üzerinde yapıldığı için
+    kaynaklar tek seferde okunur.
 
-#eksik verileri inceleyelim
+    Returns:
+        (df, timings): işlenmiş veri ve aşama süreleri (sn)
+    """
+    timer = StageTimer(verbose)
+    with timer.stage('load'):
+        df = load_sources(paths)
+    with timer.stage('normalize'):
+        df = normalize_values(df)
+    if verbose:
+        print(f"[INFO] Birleştirilmiş veri: {df.shape}, eksik soil_type: {df['soil_type'].isna().sum()}, "
+              f"eksik rainfall_mm: {df['rainfall_mm'].isna().sum()}")
+
+    # toprak tipi iki adımda doldurulur: önce aynı crop içinde, sonra crop'u önemsemeden
+    with timer.stage('impute_soil_type_by_crop'):
+        df = impute_soil_type(df, by_crop=True, chunk_size=chunk_size)
+    with timer.stage('impute_soil_type_global'):
+        df = impute_soil_type(df, by_crop=False, chunk_size=chunk_size)
+    with timer.stage('impute_rainfall'):
+        df = impute_rainfall(df, chunk_size=chunk_size)
+
+    if verbose:
+        print(f"[INFO] Kalan eksikler:\n{df.isna().sum()}")
+    return df, timer.timings
+
+
+# eksik verileri inceleyelim
 def check_df(dataframe, head=5):
     print("##################### Shape #####################")
     print(dataframe.shape)
@@ -79,12 +228,8 @@ def check_df(dataframe, head=5):
     print(dataframe.describe([0, 0.05, 0.50, 0.95, 0.99, 1]).T)
 
 
-check_df(df)
-
-#boşlukları doldurmak için chat e sor
-
-#sayısal kategorik değişken analizi
-def grab_col_names(dataframe, cat_th=10,  car_th=20):
+# sayısal kategorik değişken analizi
+def grab_col_names(dataframe, cat_th=10, car_th=20):
     """
     Veri setindeki kategorik, numerik ve kategorik fakat kardinal değişkenlerin isimlerini verir.
 
@@ -112,18 +257,18 @@ def grab_col_names(dataframe, cat_th=10,  car_th=20):
     num_but_cat cat_cols'un içerisinde.
 
     """
-    # cat_cols, cat_but_car
-    cat_cols = [col for col in df.columns if str(df[col].dtypes) in ["category", "object", "bool"]]
+    cat_cols = [col for col in dataframe.columns if str(dataframe[col].dtypes) in ["category", "object", "bool"]]
 
-    num_but_cat = [col for col in df.columns if df[col].nunique() < 10 and df[col].dtypes in ["int", "float"]]
+    num_but_cat = [col for col in dataframe.columns if dataframe[col].nunique() < cat_th and
+                   dataframe[col].dtypes in ["int", "float"]]
 
-    cat_but_car = [col for col in df.columns if
-                   df[col].nunique() > 20 and str(df[col].dtypes) in ["category", "object"]]
+    cat_but_car = [col for col in dataframe.columns if
+                   dataframe[col].nunique() > car_th and str(dataframe[col].dtypes) in ["category", "object"]]
 
     cat_cols = cat_cols + num_but_cat
     cat_cols = [col for col in cat_cols if col not in cat_but_car]
 
-    num_cols = [col for col in df.columns if df[col].dtypes in ["int", "float"]]
+    num_cols = [col for col in dataframe.columns if dataframe[col].dtypes in ["int", "float"]]
     num_cols = [col for col in num_cols if col not in cat_cols]
 
     print(f"Observations: {dataframe.shape[0]}")
@@ -135,228 +280,65 @@ def grab_col_names(dataframe, cat_th=10,  car_th=20):
 
     return cat_cols, num_cols, cat_but_car
 
-cat_cols, num_cols, cat_but_car = grab_col_names(df)
-
-print(f"cat cols", cat_cols)
-print(f"num cols", num_cols)
-print(f"cat but car", cat_but_car) 
 
-def cat_summary(dataframe, col_name, plot=False):
+def cat_summary(dataframe, col_name):
     print(pd.DataFrame({col_name: dataframe[col_name].value_counts(),
                         "Ratio": 100 * dataframe[col_name].value_counts() / len(dataframe)}))
     print("##########################################")
 
-    if plot:
-        sns.countplot(x=dataframe[col_name], data=dataframe)
-        plt.show(block=True)
-
-for i in cat_cols:
-    cat_summary(df, i)
-
-cat_summary(df, "crop")
-
-# gözlemlerin isimlerini düzenleyelim
-df = df.apply(lambda x: x.apply(lambda v: v.lower() if isinstance(v, str) else v) 
-              if x.dtype in ["object", "string"] else x)
-
-df['crop'] = df['crop'].replace({
-    'ground nuts': 'peanut',
-    'paddy': 'rice'
-})
-
-df['soil_type'] = df['soil_type'].replace({
-    'loamy': 'loam',
-    'clayey': 'clay'
-})
-
-print(f"İLK BOŞLUKLU DF",df.isna().sum())
-
-
-#toprak tipi olmayan değişkenleri knn ile dolduralım. iki kez doldurma işlemi yapacağız.
-# ilkinde crop değişkeni aynı olanlar arasında, ikincisinde crop u önemsemeden dolduracağız.
-
-#birinci soil_type doldurma adımı
-# Belirtilen sütunlarda hiç boşluk olmayan satırları filtrele
-cols_for_nn = ['soil_type', 'nitrogen', 'phosphorus', 'potassium', 'temperature_celsius', 'humidity']
-df_complete = df.dropna(subset=cols_for_nn)
-
-# Soil_type değeri NaN olan satırları belirle
-df_missing_soil = df[df['soil_type'].isna()]
-
-# NaN değerleri doldurmak için döngü
-for index, row in df_missing_soil.iterrows():
-    current_crop = row['crop']
-    
-    # Mevcut satırın crop değerine birebir uyan, soil_type'ı dolu olan satırları filtrele
-    df_neighbors_candidate = df_complete[df_complete['crop'] == current_crop]
-    
-    if not df_neighbors_candidate.empty:
-        # Komşuluk için kullanılacak özellikler
-        features = ['nitrogen', 'phosphorus', 'potassium', 'temperature_celsius', 'humidity']
-        
-        # NaN olan satırın özellik vektörü
-        current_features = row[features].values.reshape(1, -1)
-        
-        # Komşu adaylarının özellik vektörleri
-        neighbor_features = df_neighbors_candidate[features].values
-        
-        # En yakın 4 komşuyu bulmak için NearestNeighbors modelini kullan
-        # n_neighbors, veri boyutuna göre ayarlanabilir. Burada min(4, len(df_neighbors_candidate)) kullanılıyor.
-        n_neighbors_to_find = min(4, len(df_neighbors_candidate))
-        
-        if n_neighbors_to_find > 0:
-            nn = NearestNeighbors(n_neighbors=n_neighbors_to_find, metric='euclidean')
-            nn.fit(neighbor_features)
-            
-            distances, indices = nn.kneighbors(current_features)
-            
-            # En yakın komşuların soil_type değerlerini al
-            closest_soil_types = df_neighbors_candidate.iloc[indices[0]]['soil_type'].values
-            
-            # En sık kullanılan soil_type değerini bul ve atama yap
-            if len(closest_soil_types) > 0:
-                most_frequent_soil_type = pd.Series(closest_soil_types).mode()[0]
-                df.loc[index, 'soil_type'] = most_frequent_soil_type
-            else:
-                # Hiç komşu bulunamazsa veya uygun soil_type yoksa boş bırak (veya başka bir strateji uygulanabilir)
-                pass
-        else:
-            pass # Uygun komşu adayı yok
-    else:
-        pass # Mevcut crop değerine sahip soil_type'ı dolu satır yok
-
-print("\nDoldurulmuş DataFrame 1.adım:")
-print(df)
-
-print(f"TOPRAK TİPİ DOLDURULMUŞ 1.adım ",df.isna().sum())
-
-
-#ikinci soil_type doldurma adımı
-from sklearn.neighbors import NearestNeighbors
-import pandas as pd
-
-# Soil_type ve diğer kolonlarda boşluğu olmayan satırlar
-cols_for_nn = ['soil_type', 'nitrogen', 'phosphorus', 'potassium', 'temperature_celsius', 'humidity']
-df_complete = df.dropna(subset=cols_for_nn)
-
-# Soil_type değeri NaN olan satırları al
-df_missing_soil = df[df['soil_type'].isna()]
-
-# Eksik değerleri doldurma
-for index, row in df_missing_soil.iterrows():
-    # Komşuluk için kullanılacak özellikler
-    features = ['nitrogen', 'phosphorus', 'potassium', 'temperature_celsius', 'humidity']
 
-    # NaN olan satırın özellik vektörü
-    current_features = row[features].values.reshape(1, -1)
-
-    # Komşu adaylarının özellik vektörleri (artık crop filtre yok!)
-    neighbor_features = df_complete[features].values
-
-    # En yakın komşu sayısı
-    n_neighbors_to_find = min(4, len(df_complete))
-
-    if n_neighbors_to_find > 0:
-        nn = NearestNeighbors(n_neighbors=n_neighbors_to_find, metric='euclidean')
-        nn.fit(neighbor_features)
-
-        distances, indices = nn.kneighbors(current_features)
-
-        # Komşuların soil_type değerlerini al
-        closest_soil_types = df_complete.iloc[indices[0]]['soil_type'].values
-
-        # En sık geçen soil_type değerini bul ve ata
-        if len(closest_soil_types) > 0:
-            most_frequent_soil_type = pd.Series(closest_soil_types).mode()[0]
-            df.loc[index, 'soil_type'] = most_frequent_soil_type
-
-print("\n✅ Doldurulmuş DataFrame 2.adım:")
-print(df)
-
-print(f"TOPRAK TİPİ DOLDURULMUŞ 2.adım ",df.isna().sum())
-##########
-for i in cat_cols:
-    cat_summary(df, i)
-
-cat_summary(df, "crop")
-
-#crop değişkeninin numerik değişkenler ile analizi
+# crop değişkeninin numerik değişkenler ile analizi
 def target_summary_with_num(dataframe, target, numerical_col):
     print(dataframe.groupby(target).agg({numerical_col: "mean"}), end="\n\n\n")
 
 
-for col in num_cols:
-    target_summary_with_num(df, "crop", col)
-
-#crop değişkeninin kategorik değişkenlerile analizi
+# crop değişkeninin kategorik değişkenlerile analizi
 def target_summary_with_cat(dataframe, target, categorical_col):
     summary = pd.crosstab(dataframe[categorical_col], dataframe[target], normalize="index") * 100
     summary = round(summary, 2)  # yüzde formatında
     print(summary, end="\n\n\n")
 
-for col in cat_cols:
-    target_summary_with_cat(df,"crop",col)
-
-
-# ['rainfall_mm'] boşluğu diğerlerine göre daha az önce onu doldur. ['temperature_celsius', 'humidity', 'soil_type', 'crop','nitrogen',] benzerliklerine göre
-#hata verdi, incele
-# Kullanılacak özellikler
-features = ['temperature_celsius', 'humidity', 'soil_type', 'crop', 'nitrogen']
-
-# Kategorik kolonları sayısal hale getirelim (One-Hot Encoding)
-df_features = pd.get_dummies(df[features])
 
-# Eksik değerleri bul
-df_missing = df[df['rainfall_mm'].isna()]
-
-for index, row in df_missing.iterrows():
-    # Mevcut satırda dolu olan özellikleri seç
-    mask = ~row[features].isna()
-    available_features = [f for f in features if mask[f]]
-
-    if not available_features:
-        continue
-    
-    df_candidates = df[df['rainfall_mm'].notna()].dropna(subset=available_features)
-
-    if df_candidates.empty:
-        continue
-    
-    candidate_features = pd.get_dummies(df_candidates[available_features]).reindex(columns=df_features.columns, fill_value=0).values
-
-    row_df = pd.DataFrame(row).T
-    row_features = pd.get_dummies(row_df[available_features]).reindex(columns=df_features.columns, fill_value=0).values
-
-
-    # eski versiyon -hatalı kod (düzeltttik :)))
-    # # Sayısal ve one-hot özellikler
-    # row_features = pd.get_dummies(row[available_features]).reindex(columns=df_features.columns,
-    #                                                                fill_value=0).values.reshape(1, -1)
-
-    # # NaN olmayan satırlar
-    # df_candidates = df[df['rainfall_mm'].notna()].dropna(subset=features)
-    # candidate_features = pd.get_dummies(df_candidates[available_features]).reindex(columns=df_features.columns,
-    #                                                                                fill_value=0).values
-
-    # En yakın 3 komşu
-    n_neighbors_to_find = min(3, len(df_candidates))
-
-    nn = NearestNeighbors(n_neighbors=n_neighbors_to_find, metric='euclidean')
-    nn.fit(candidate_features)
-    distances, idx = nn.kneighbors(row_features)
-
-    # Eksik değeri en yakın 3 komşunun ortalaması ile doldur
-    nearest_rainfalls = df_candidates.iloc[idx[0]]['rainfall_mm'].values
-    df.loc[index, 'rainfall_mm'] = nearest_rainfalls.mean()
-
-print("\n✅rainfall_mm Doldurulmuş DataFrame:")
-print(df)
-
-print(f"rainfall_mm doldurulmuş df ",df.isna().sum())
+def report(df, target='crop'):
+    """Doldurma sonrası keşifsel özetleri yazdırır"""
+    check_df(df)
+    cat_cols, num_cols, _ = grab_col_names(df)
+    for col in cat_cols:
+        cat_summary(df, col)
+    for col in num_cols:
+        target_summary_with_num(df, target, col)
+    for col in cat_cols:
+        target_summary_with_cat(df, target, col)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Crop veri setlerini birleştirip eksik değerleri doldurur')
+    parser.add_argument('--source-dir', default=os.getenv('CSV_DOC_DIR', 'csv_doc'),
+                        help='Kaynak CSV klasörü (varsayılan: $CSV_DOC_DIR veya csv_doc)')
+    for name, filename in SOURCE_FILES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name,
+                            help=f'{filename} yolu (varsayılan: <source-dir>/{filename})')
+    parser.add_argument('--output', default='real_data.csv')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Komşu sorguları için parça boyutu')
+    parser.add_argument('--report', action='store_true', help='Keşifsel özetleri yazdır')
+    args = parser.parse_args(argv)
+
+    paths = {
+        name: getattr(args, name) or os.path.join(args.source_dir, filename)
+        for name, filename in SOURCE_FILES.items()
+    }
+    df, timings = preprocess(paths, chunk_size=args.chunk_size)
+    if args.report:
+        report(df)
 
+    timer = StageTimer()
+    with timer.stage('write'):
+        df.to_csv(args.output, index=False)
+    total = sum(timings.values()) + timer.timings['write']
+    print(f"[INFO] {len(df)} satır yazıldı: {args.output} (toplam {total:.2f} sn)")
+    return df
 
-# toprak tipinden sonra ['nitrogen', 'phosphorus', 'potassium', 'humidity', 'ph'] değişkenleri doldur
-nan_cols_list = ['nitrogen', 'phosphorus', 'potassium', 'temperature_celsius', 'humidity']
 
-df.to_csv("real_data.csv", index=False)
-#['soil_type', 'crop', 'temperature_celsius','rainfall_mm'] değerlerine bakarak nan_cols_list teki boşlukları sırasıyla(tek tek) doldur.
+if __name__ == '__main__':
+    main()
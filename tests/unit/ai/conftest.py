@@ -0,0 +1,31 @@
+"""
+Pytest configuration for ai/ unit tests
+
+ai/ modülleri birbirini düz isimle import eder (ai/models/*.py gibi); testler de
+aynı şekilde import edebilsin diye ai/ klasörü sys.path'e eklenir. Eğitilen paketlerin
+backend predictor'larıyla yüklenebildiği de test edildiği için backend/ sona eklenir
+(ai/models, backend/models'i gölgelemeye devam eder).
+
+database_config (load_crop_data) repoda değil, çalışma ortamında ai/ yanına konur;
+yoksa testler veritabanına gitmediği için yerine çağrıldığında hata veren bir modül konur.
+"""
+
+import os
+import sys
+import types
+
+AI_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'ai'))
+BACKEND_DIR = os.path.abspath(os.path.join(AI_DIR, '..', 'backend'))
+if AI_DIR not in sys.path:
+    sys.path.insert(0, AI_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+try:
+    import database_config  # noqa: F401
+except ImportError:
+    def _load_crop_data(*args, **kwargs):
+        raise RuntimeError('database_config is not available in unit tests')
+
+    sys.modules['database_config'] = types.ModuleType('database_config')
+    sys.modules['database_config'].load_crop_data = _load_crop_data
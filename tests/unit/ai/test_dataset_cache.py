@@ -0,0 +1,149 @@
+"""
+Unit tests for the columnar dataset cache
+
+Bu test dosyası CSV kaynaklarını kolonsal cache'e çeviren dataset_cache
+modülü için birim testlerini içerir.
+"""
+
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+import dataset_cache
+from dataset_cache import build_cache, load_dataset, load_table
+
+
+def _write_csv(path, rows=50, offset=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame({
+        'soil_ph': np.linspace(5, 8, rows) + offset,
+        'nitrogen': np.arange(rows) + offset,
+        'crop': ['wheat', 'rice'] * (rows // 2),
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def _cache_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(('.arrow', '.npcols')))
+
+
+def _crop_table(url, rows):
+    pd.DataFrame({
+        'soil_ph': [str(5 + i % 30 / 10) for i in range(rows)],
+        'crop': ['wheat' if i % 2 else 'rice' for i in range(rows)],
+    }).to_sql('crops', create_engine(url), index=False, if_exists='replace')
+
+
+class TestDatasetCache:
+    """Dataset cache test sınıfı."""
+
+    @pytest.mark.unit
+    def test_round_trip_with_downcast_types(self, tmp_path):
+        """Test that selected columns come back with float32 / small int / category types."""
+        source = _write_csv(tmp_path / 'data' / 'crops.csv')
+
+        df = load_dataset(source, columns=['soil_ph', 'nitrogen', 'crop', 'missing'], cache_dir=str(tmp_path / 'cache'))
+
+        assert list(df.columns) == ['soil_ph', 'nitrogen', 'crop']
+        assert df['soil_ph'].dtype == np.float32
+        assert df['nitrogen'].dtype == np.int8
+        assert isinstance(df['crop'].dtype, pd.CategoricalDtype)
+        assert df['crop'].tolist()[:2] == ['wheat', 'rice']
+        assert build_cache(source, str(tmp_path / 'cache')) == build_cache(source, str(tmp_path / 'cache'))
+
+    @pytest.mark.unit
+    def test_same_file_name_in_two_directories(self, tmp_path):
+        """Test that sources sharing a file name keep separate caches and do not delete each other."""
+        cache_dir = str(tmp_path / 'cache')
+        first = _write_csv(tmp_path / 'a' / 'crops.csv')
+        second = _write_csv(tmp_path / 'b' / 'crops.csv', offset=100)
+
+        first_path, second_path = build_cache(first, cache_dir), build_cache(second, cache_dir)
+
+        assert first_path != second_path
+        assert os.path.exists(first_path) and os.path.exists(second_path)
+        assert load_dataset(first, ['nitrogen'], cache_dir)['nitrogen'].max() == 49
+        assert load_dataset(second, ['nitrogen'], cache_dir)['nitrogen'].max() == 149
+
+    @pytest.mark.unit
+    def test_changed_source_replaces_its_old_cache(self, tmp_path):
+        """Test that rebuilding after a content change removes only that source's previous cache."""
+        cache_dir = str(tmp_path / 'cache')
+        source = _write_csv(tmp_path / 'a' / 'crops.csv')
+        other = _write_csv(tmp_path / 'b' / 'crops.csv')
+        old_path, other_path = build_cache(source, cache_dir), build_cache(other, cache_dir)
+
+        _write_csv(tmp_path / 'a' / 'crops.csv', rows=60)
+        new_path = build_cache(source, cache_dir)
+
+        assert new_path != old_path and not os.path.exists(old_path)
+        assert _cache_files(cache_dir) == sorted(os.path.basename(p) for p in (new_path, other_path))
+
+    @pytest.mark.unit
+    def test_parallel_index_updates_keep_every_entry(self, tmp_path, monkeypatch):
+        """Test that concurrent hash index writes do not lose each other's entries."""
+        cache_dir = str(tmp_path / 'cache')
+        os.makedirs(cache_dir)
+        sources = [_write_csv(tmp_path / f's{i}' / 'crops.csv', rows=4) for i in range(16)]
+        barrier = threading.Barrier(len(sources))
+        original_hash = dataset_cache.source_hash
+
+        def slow_hash(path, *args):
+            barrier.wait()
+            return original_hash(path, *args)
+
+        monkeypatch.setattr(dataset_cache, 'source_hash', slow_hash)
+        threads = [threading.Thread(target=dataset_cache._cached_source_hash, args=(s, cache_dir)) for s in sources]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(os.path.join(cache_dir, 'index.json'), encoding='utf-8') as f:
+            index = json.load(f)
+        assert sorted(index) == sorted(os.path.abspath(s) for s in sources)
+
+    @pytest.mark.unit
+    def test_numeric_columns_are_not_copied(self, tmp_path):
+        """Test that loaded numeric columns are read-only views of the cache file, not copies."""
+        source = _write_csv(tmp_path / 'data' / 'crops.csv')
+
+        df = load_dataset(source, columns=['soil_ph', 'nitrogen'], cache_dir=str(tmp_path / 'cache'))
+
+        assert not df['soil_ph'].to_numpy().flags.writeable
+        assert not df['nitrogen'].to_numpy().flags.writeable
+
+    @pytest.mark.unit
+    def test_table_extract_cached_until_row_count_changes(self, tmp_path, monkeypatch):
+        """Test that a table is read once, reused while its row count holds and re-read after inserts."""
+        url = f"sqlite:///{tmp_path / 'crops.db'}"
+        cache_dir = str(tmp_path / 'cache')
+        _crop_table(url, 40)
+        reads = []
+        original_stream = dataset_cache.stream_crop_data
+
+        def counting_stream(**kwargs):
+            reads.append(kwargs['table_name'])
+            return original_stream(**kwargs)
+
+        monkeypatch.setattr(dataset_cache, 'stream_crop_data', counting_stream)
+
+        def load():
+            return load_table('crops', ['soil_ph'], ['crop'], database_url=url, cache_dir=cache_dir)
+
+        first, second = load(), load()
+        assert reads == ['crops']
+        assert len(first) == len(second) == 40
+        assert first['soil_ph'].dtype == np.float32 and isinstance(first['crop'].dtype, pd.CategoricalDtype)
+
+        _crop_table(url, 41)
+        assert len(load()) == 41
+        assert reads == ['crops', 'crops']
+        assert len(_cache_files(cache_dir)) == 1
+
+        with create_engine(url).begin() as conn:
+            conn.execute(text('DELETE FROM crops'))
+        assert load() is None
@@ -0,0 +1,97 @@
+"""
+Unit tests for the crop recommendation model
+
+Bu test dosyası CropRecommendationModel'in aykırı değer baskılama ve hızlı
+(native kategorik) eğitim adımları için birim testlerini içerir.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from models.recommendation_crop import CropRecommendationModel
+from services.xgboost_predictor import XGBoostCropPredictor
+
+CATEGORIES = {
+    'region': ['Aegean', 'Marmara'],
+    'soil_type': ['clay', 'sand', 'loam'],
+    'fertilizer_type': ['npk', 'urea'],
+    'irrigation_method': ['drip', 'flood'],
+    'weather_condition': ['sunny', 'rainy'],
+}
+
+
+def _model(df):
+    model = CropRecommendationModel()
+    model.df = df
+    return model
+
+
+def _crop_frame(rows=300):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'soil_ph': rng.uniform(5, 8, rows),
+        'nitrogen': rng.integers(0, 150, rows),
+        'phosphorus': rng.uniform(0, 100, rows),
+        'potassium': rng.uniform(0, 200, rows),
+        'moisture': rng.uniform(20, 90, rows),
+        'temperature_celsius': rng.uniform(5, 40, rows),
+        'rainfall_mm': rng.uniform(100, 2000, rows),
+    })
+    for col, labels in CATEGORIES.items():
+        df[col] = rng.choice(labels, rows)
+    df['crop'] = np.array(['rice', 'maize', 'wheat'])[
+        (df['nitrogen'] > 75).astype(int) + (df['soil_type'] == 'clay').astype(int)
+    ]
+    return df
+
+
+class TestCropRecommendationModel:
+    """CropRecommendationModel test sınıfı."""
+
+    @pytest.mark.unit
+    def test_integer_and_float_columns_clipped_in_one_call(self):
+        """Test that floats clip to the exact quantiles and integers keep their dtype with inward-rounded bounds."""
+        floats = np.linspace(0, 1, 1000)
+        model = _model(pd.DataFrame({'count': np.arange(1000, dtype=np.int64), 'ratio': floats}))
+
+        df = model.suppress_outliers_iqr(['count', 'ratio'])
+
+        assert df['count'].dtype == np.int64 and df['ratio'].dtype == np.float64
+        # 0.005 / 0.995 quantiles of 0..999 are 4.995 / 994.005
+        assert (df['count'].min(), df['count'].max()) == (5, 994)
+        assert df['count'].iloc[500] == 500
+        low, high = np.quantile(floats, [0.005, 0.995])
+        np.testing.assert_array_equal(df['ratio'].to_numpy(), np.clip(floats, low, high))
+
+    @pytest.mark.unit
+    def test_crossed_integer_bounds_use_the_midpoint(self):
+        """Test that integer bounds rounded past each other collapse to the rounded midpoint."""
+        model = _model(pd.DataFrame({'count': [5, 6], 'ratio': [0.0, 10.0]}))
+
+        # Quantiles 5.3 / 5.4 round inward to 6 / 5; the midpoint 5.35 rounds to 5
+        df = model.suppress_outliers_iqr(['count', 'ratio'], lower_quantile=0.3, upper_quantile=0.4)
+
+        assert df['count'].tolist() == [5, 5] and df['count'].dtype == np.int64
+        assert df['ratio'].tolist() == pytest.approx([3.0, 4.0])
+
+    @pytest.mark.unit
+    @pytest.mark.ml
+    def test_fast_bundle_predicts_in_xgboost_predictor(self, tmp_path):
+        """Test that the native-categorical bundle loads in XGBoostCropPredictor and predicts from int codes."""
+        model = _model(_crop_frame())
+        model.suppress_outliers_iqr(model.numeric_features)
+        model.encode_categorical_features()
+        model.train_model_fast(n_jobs=1, early_stopping_rounds=5, max_rounds=20)
+        bundle = str(tmp_path / 'crop_model.pkl')
+        model.save_model(bundle)
+
+        predictor = XGBoostCropPredictor(model_path=bundle)
+        environment = {'soil_ph': 6.5, 'nitrogen': 140, 'phosphorus': 40, 'potassium': 60, 'moisture': 50,
+                       'temperature_celsius': 20, 'rainfall_mm': 600, 'region': 'Aegean', 'soil_type': 'clay',
+                       'fertilizer_type': 'npk', 'irrigation_method': 'drip', 'weather_condition': 'sunny'}
+        result = predictor.predict_crop_from_environment(environment)
+
+        assert result['success'] and result['predicted_crop'] == 'wheat'
+        codes = {col: model.encoders[col].transform([environment[col]])[0] for col in model.categorical_features}
+        X = model._as_native_categorical(pd.DataFrame([{**environment, **codes}])[model.feature_order])
+        assert result['confidence'] == pytest.approx(float(model.model.predict_proba(X)[0].max()))
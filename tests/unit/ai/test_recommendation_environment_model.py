@@ -0,0 +1,96 @@
+"""
+Unit tests for the environment recommendation model
+
+Bu test dosyası EnvironmentalRecommendationModel'in hızlı (paralel, early
+stopping) eğitim modu için birim testlerini içerir.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import lightgbm as lgb
+import dataset_cache
+from models.recommendation_environment_model import EnvironmentalRecommendationModel
+
+TARGETS = {
+    'fertilizer_type': ['npk', 'urea', 'compost'],
+    'irrigation_method': ['drip', 'flood'],
+    'weather_condition': ['sunny', 'cloudy', 'rainy'],
+    'soil_type': ['clay', 'sand', 'loam'],
+}
+
+
+@pytest.fixture
+def environment_csv(tmp_path, monkeypatch):
+    """600-row CSV whose targets follow the numeric columns, with the column cache in tmp_path."""
+    monkeypatch.setattr(dataset_cache, 'DEFAULT_CACHE_DIR', str(tmp_path / 'cache'))
+    rng = np.random.default_rng(0)
+    rows = 600
+    df = pd.DataFrame({
+        'crop': rng.choice(['wheat', 'rice', 'maize'], rows),
+        'region': rng.choice(['Aegean', 'Marmara'], rows),
+        'soil_ph': rng.uniform(5, 8, rows),
+        'nitrogen': rng.uniform(0, 150, rows),
+        'phosphorus': rng.uniform(0, 100, rows),
+        'potassium': rng.uniform(0, 200, rows),
+        'temperature_celsius': rng.uniform(5, 40, rows),
+        'moisture': rng.uniform(20, 90, rows),
+        'rainfall_mm': rng.uniform(100, 2000, rows),
+    })
+    for i, (target, labels) in enumerate(TARGETS.items()):
+        column = ['nitrogen', 'moisture', 'temperature_celsius', 'soil_ph'][i]
+        df[target] = np.array(labels)[pd.qcut(df[column], len(labels), labels=False)]
+    path = tmp_path / 'crop_dataset.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _train_fast(csv_path, use_cache, n_jobs):
+    model = EnvironmentalRecommendationModel(model_path='unused.pkl')
+    model.load_data(csv_path, use_cache=use_cache)
+    model.prepare_data()
+    model.setup_preprocessor()
+    X_train, X_test = model.preprocess_data()
+    model.train_models_parallel(X_train, X_test, n_jobs=n_jobs, threads_per_process=1,
+                                early_stopping_rounds=5, max_rounds=20)
+    return model
+
+
+class TestEnvironmentalRecommendationModel:
+    """EnvironmentalRecommendationModel test sınıfı."""
+
+    @pytest.mark.unit
+    @pytest.mark.ml
+    def test_parallel_training_from_cached_load(self, environment_csv):
+        """Test that the cached float32 / category load trains one Booster per target in worker processes."""
+        model = _train_fast(environment_csv, use_cache=True, n_jobs=2)
+
+        assert model.df['soil_ph'].dtype == np.float32
+        assert isinstance(model.df['crop'].dtype, pd.CategoricalDtype)
+        assert set(model.models) == set(TARGETS)
+        for target, labels in TARGETS.items():
+            assert isinstance(model.models[target], lgb.Booster)
+            metrics = model.metrics_[target]
+            assert 1 <= metrics['best_iteration'] <= 20
+            assert metrics['model_size_kb'] > 0
+            assert metrics['n_classes'] == len(labels)
+
+        recommendations = model.predict_recommendations('wheat', 'Aegean', nitrogen=140, moisture=25)
+        for target, labels in TARGETS.items():
+            assert recommendations[target] in labels
+        assert recommendations['fertilizer_type'] == 'compost'
+        assert recommendations['irrigation_method'] == 'drip'
+
+    @pytest.mark.unit
+    @pytest.mark.ml
+    def test_parallel_training_from_uncached_load(self, environment_csv):
+        """Test that the plain read_csv load trains and predicts the same way in a single process."""
+        model = _train_fast(environment_csv, use_cache=False, n_jobs=1)
+
+        assert model.df['soil_ph'].dtype == np.float64
+        assert all(isinstance(model.models[target], lgb.Booster) for target in TARGETS)
+        assert all('best_iteration' in model.metrics_[target] for target in TARGETS)
+
+        recommendations = model.predict_recommendations('rice', 'Marmara', nitrogen=5, moisture=85)
+        assert recommendations['fertilizer_type'] == 'npk'
+        assert recommendations['irrigation_method'] == 'flood'
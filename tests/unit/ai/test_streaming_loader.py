@@ -0,0 +1,72 @@
+"""
+Unit tests for the streaming training-data loader
+
+Bu test dosyası crop tablosunu parça parça okuyan stream_crop_data
+fonksiyonu için birim testlerini içerir.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from streaming_loader import stream_crop_data
+
+CROPS = ['wheat', 'rice', 'maize']
+
+
+@pytest.fixture
+def crop_db(tmp_path):
+    """SQLite database with 300 crop rows stored as TEXT, like the CSV-loaded tables."""
+    url = f"sqlite:///{tmp_path / 'crops.db'}"
+    rows = 300
+    pd.DataFrame({
+        'soil_ph': [str(5 + i % 30 / 10) for i in range(rows)],
+        'nitrogen': [str(i) for i in range(rows)],
+        'region': ['Aegean' if i % 2 else 'Marmara' for i in range(rows)],
+        'crop': [CROPS[i % 3] for i in range(rows)],
+    }).to_sql('crop_dataset_v_100bin', create_engine(url), index=False)
+    return url
+
+
+def _stream(url, **kwargs):
+    return stream_crop_data(database_url=url, numeric_columns=['soil_ph', 'nitrogen'],
+                            categorical_columns=['region', 'crop'], **kwargs)
+
+
+class TestStreamCropData:
+    """stream_crop_data test sınıfı."""
+
+    @pytest.mark.unit
+    def test_full_read_is_downcast(self, crop_db):
+        """Test that every row is read with float32 numeric and category text columns."""
+        df = _stream(crop_db, chunk_size=64)
+
+        assert len(df) == 300
+        assert list(df.columns) == ['soil_ph', 'nitrogen', 'region', 'crop']
+        assert df['soil_ph'].dtype == np.float32 and df['nitrogen'].dtype == np.float32
+        assert isinstance(df['region'].dtype, pd.CategoricalDtype)
+        assert isinstance(df['crop'].dtype, pd.CategoricalDtype)
+        assert sorted(df['crop'].cat.categories) == sorted(CROPS)
+        assert df['nitrogen'].sum() == sum(range(300))
+
+    @pytest.mark.unit
+    def test_sample_does_not_depend_on_chunk_size(self, crop_db):
+        """Test that sample_per_crop keeps the same rows whatever the chunk size."""
+        samples = [
+            _stream(crop_db, chunk_size=chunk_size, sample_per_crop=20, random_state=7)
+            for chunk_size in (7, 64, 1000)
+        ]
+
+        for df in samples:
+            assert df['crop'].astype(str).value_counts().to_dict() == {crop: 20 for crop in CROPS}
+            assert isinstance(df['crop'].dtype, pd.CategoricalDtype)
+        picked = [sorted(df['nitrogen'].astype(int)) for df in samples]
+        assert picked[0] == picked[1] == picked[2]
+
+    @pytest.mark.unit
+    def test_empty_table_returns_none(self, crop_db):
+        """Test that a table without rows yields None, like load_crop_data."""
+        with create_engine(crop_db).begin() as conn:
+            conn.execute(text('DELETE FROM crop_dataset_v_100bin'))
+
+        assert _stream(crop_db) is None
@@ -0,0 +1,142 @@
+"""
+Unit tests for activity log retention
+
+Bu test dosyası kullanıcı aktivite kayıtlarının partition / parçalı silme ile
+temizlenmesi servisi için birim testlerini içerir.
+"""
+
+import os
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from services.activity_retention import (
+    purge_expired_activity, purge_in_batches, month_partitions, month_partition_ddl, default_partition_ddl,
+    partition_activity_logs, ensure_partitions
+)
+
+db = SQLAlchemy()
+
+NOW = datetime(2024, 5, 20, 12, 0)
+
+# PostgreSQL-only partition tests run when this points at a disposable database
+POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+
+
+class ActivityLog(db.Model):
+    __tablename__ = 'user_activity_logs'
+
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(36), nullable=False)
+    activity_type = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime)
+
+
+@pytest.fixture
+def retention_app():
+    """Flask app with one activity row per hour for the last 120 days."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            ActivityLog(id=f'log-{i}', user_id='u1', activity_type='login',
+                        created_at=NOW - timedelta(hours=i))
+            for i in range(120 * 24)
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestActivityRetention:
+    """Activity retention test sınıfı."""
+
+    @pytest.mark.unit
+    def test_purge_deletes_only_expired_rows_in_batches(self, retention_app):
+        """Test that rows older than the cutoff are removed in id chunks with progress reports."""
+        reports = []
+
+        result = purge_expired_activity(db.session, days_to_keep=90, batch_size=200, pause_seconds=0,
+                                        progress=reports.append, now=NOW)
+
+        expired = 120 * 24 - 90 * 24 - 1
+        assert result['mode'] == 'batches' and result['partitions_dropped'] == []
+        assert result['rows_deleted'] == result['total_estimate'] == expired
+        assert result['batches'] == len(reports) == -(-expired // 200)
+        assert [r['rows_deleted'] for r in reports] == sorted(r['rows_deleted'] for r in reports)
+        assert ActivityLog.query.count() == 90 * 24 + 1
+        assert ActivityLog.query.order_by(ActivityLog.created_at).first().created_at == NOW - timedelta(days=90)
+
+    @pytest.mark.unit
+    def test_each_batch_is_bounded_and_committed(self, retention_app):
+        """Test that each DELETE is bounded by batch_size, every batch commits and max_batches stops early."""
+        deletes, commits = [], []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, params, *args:
+                     deletes.append(len(params)) if statement.startswith('DELETE') else None)
+        event.listen(db.engine, 'commit', lambda conn: commits.append(len(deletes)))
+
+        result = purge_in_batches(db.session, NOW - timedelta(days=90), batch_size=100,
+                                  pause_seconds=0, progress=None, max_batches=3)
+
+        assert result['rows_deleted'] == 300 and deletes == [100, 100, 100]
+        assert commits == [1, 2, 3]
+
+    @pytest.mark.unit
+    def test_month_partitions_cover_year_boundary(self):
+        """Test monthly partition names and ranges across December."""
+        partitions = month_partitions('user_activity_logs', datetime(2023, 11, 15), datetime(2024, 1, 3))
+
+        assert [name for name, _, _ in partitions] == [
+            'user_activity_logs_y2023m11', 'user_activity_logs_y2023m12', 'user_activity_logs_y2024m01'
+        ]
+        assert partitions[1][1:] == (datetime(2023, 12, 1), datetime(2024, 1, 1))
+
+    @pytest.mark.unit
+    def test_partition_ddl_attaches_after_draining_default(self):
+        """Test that a new month is created detached, filled from DEFAULT, then attached."""
+        statements = month_partition_ddl('user_activity_logs', 'user_activity_logs_y2024m06',
+                                         datetime(2024, 6, 1), datetime(2024, 7, 1))
+
+        assert default_partition_ddl('user_activity_logs') == \
+            'CREATE TABLE IF NOT EXISTS user_activity_logs_default PARTITION OF user_activity_logs DEFAULT'
+        assert statements[0] == 'CREATE TABLE user_activity_logs_y2024m06 (LIKE user_activity_logs INCLUDING DEFAULTS)'
+        assert "DELETE FROM user_activity_logs_default WHERE created_at >= '2024-06-01' " \
+               "AND created_at < '2024-07-01' RETURNING *" in statements[1]
+        assert statements[1].endswith('INSERT INTO user_activity_logs_y2024m06 SELECT * FROM moved')
+        assert statements[2] == ("ALTER TABLE user_activity_logs ATTACH PARTITION user_activity_logs_y2024m06 "
+                                 "FOR VALUES FROM ('2024-06-01') TO ('2024-07-01')")
+
+    @pytest.mark.integration
+    @pytest.mark.database
+    @pytest.mark.skipif(not POSTGRES_URL, reason='TEST_POSTGRES_URL not set')
+    def test_postgres_inserts_beyond_partitions_land_in_default(self):
+        """Test that rows past the last month go to DEFAULT and move into their month later."""
+        engine = create_engine(POSTGRES_URL)
+        with Session(engine) as session:
+            session.execute(text("DROP TABLE IF EXISTS retention_logs CASCADE"))
+            session.execute(text("CREATE TABLE IF NOT EXISTS users (id VARCHAR(36) PRIMARY KEY)"))
+            session.execute(text(
+                "CREATE TABLE retention_logs (id VARCHAR(36) PRIMARY KEY, user_id VARCHAR(36), created_at TIMESTAMP)"
+            ))
+            session.commit()
+            try:
+                partition_activity_logs(session, table='retention_logs', months_ahead=0, now=NOW)
+                session.execute(text("INSERT INTO retention_logs VALUES ('late', NULL, '2024-07-15')"))
+                session.commit()
+                assert session.execute(text("SELECT id FROM retention_logs_default")).scalars().all() == ['late']
+
+                created = ensure_partitions(session, table='retention_logs', months_ahead=2, now=NOW)
+
+                assert created == ['retention_logs_y2024m06', 'retention_logs_y2024m07']
+                assert session.execute(text("SELECT COUNT(*) FROM retention_logs_default")).scalar() == 0
+                assert session.execute(text("SELECT id FROM retention_logs_y2024m07")).scalars().all() == ['late']
+            finally:
+                session.rollback()
+                session.execute(text("DROP TABLE IF EXISTS retention_logs CASCADE"))
+                session.commit()
@@ -0,0 +1,108 @@
+"""
+Unit tests for the activity writer
+
+Bu test dosyası aktivite kayıtlarını arka planda toplu yazan servis için
+birim testlerini içerir.
+"""
+
+import threading
+import time
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, func, select
+from services.activity_writer import ActivityWriter
+
+metadata = MetaData()
+activity_logs = Table(
+    'user_activity_logs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('activity_type', String(50), nullable=False),
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """File-backed SQLite engine shared by the test and the writer thread."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'activity.db'}")
+    metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _rows(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(activity_logs)).scalar()
+
+
+def _record(i):
+    return {'id': i, 'activity_type': 'login'}
+
+
+class GatedWriter(ActivityWriter):
+    """Writer whose inserts wait until the test opens the gate."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gate = threading.Event()
+
+    def _write(self, batch):
+        self.gate.wait(5)
+        super()._write(batch)
+
+
+class TestActivityWriter:
+    """Activity writer test sınıfı."""
+
+    @pytest.mark.unit
+    def test_records_are_written_in_size_bounded_batches(self, engine):
+        """Test that full batches are written immediately and flush writes the remainder."""
+        writer = ActivityWriter(engine, activity_logs, batch_size=10, flush_interval=60)
+
+        assert all(writer.submit(_record(i)) for i in range(25))
+        assert writer.flush(timeout=5)
+
+        assert _rows(engine) == 25
+        assert writer.stats()['batches'] == 3
+        writer.close()
+
+    @pytest.mark.unit
+    def test_interval_flush_without_full_batch(self, engine):
+        """Test that a partial batch is written once flush_interval has passed."""
+        writer = ActivityWriter(engine, activity_logs, batch_size=100, flush_interval=0.05)
+        writer.submit(_record(1))
+        writer.submit(_record(2))
+
+        deadline = time.monotonic() + 5
+        while writer.stats()['written'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert _rows(engine) == 2
+        writer.close()
+
+    @pytest.mark.unit
+    def test_overload_drops_and_counts(self, engine):
+        """Test that a full queue drops records instead of blocking the caller."""
+        writer = GatedWriter(engine, activity_logs, max_queue=5, batch_size=1, flush_interval=60)
+        writer.submit(_record(0))
+        while writer.stats()['queued']:
+            time.sleep(0.01)  # the thread takes record 0 and waits at the gate
+
+        accepted = [writer.submit(_record(i)) for i in range(1, 11)]
+        writer.gate.set()
+        writer.close()
+
+        assert accepted == [True] * 5 + [False] * 5
+        assert writer.stats()['dropped'] == 5
+        assert _rows(engine) == 6
+
+    @pytest.mark.unit
+    def test_close_drains_queue_and_rejects_new_records(self, engine):
+        """Test that close writes everything still buffered and later submits are dropped."""
+        writer = ActivityWriter(engine, activity_logs, batch_size=1000, flush_interval=60)
+        for i in range(50):
+            writer.submit(_record(i))
+
+        writer.close()
+
+        assert _rows(engine) == 50
+        assert writer.submit(_record(99)) is False
+        assert writer.stats()['dropped'] == 1
@@ -0,0 +1,160 @@
+"""
+Unit tests for the average soil data index
+
+Bu test dosyası ortalama toprak verisi için bellek içi hiyerarşik indeks
+servisi için birim testlerini içerir.
+"""
+
+from datetime import datetime
+import uuid
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import Session
+from services.average_soil_index import AverageSoilIndex, FALLBACK_LEVELS
+from services.average_soil_refresh import ingest_measurements
+
+db = SQLAlchemy()
+
+
+class SoilRow(db.Model):
+    __tablename__ = 'soil_rows'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    soil_type = db.Column(db.String(50))
+    region = db.Column(db.String(50))
+    fertilizer_type = db.Column(db.String(50))
+    irrigation_method = db.Column(db.String(50))
+    weather_condition = db.Column(db.String(50))
+    avg_soil_ph = db.Column(db.Float)
+    avg_nitrogen = db.Column(db.Float)
+    avg_phosphorus = db.Column(db.Float)
+    avg_potassium = db.Column(db.Float)
+    avg_moisture = db.Column(db.Float)
+    avg_temperature_celsius = db.Column(db.Float)
+    avg_rainfall_mm = db.Column(db.Float)
+    data_count = db.Column(db.Integer, default=1)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('soil_type', 'region', 'fertilizer_type', 'irrigation_method', 'weather_condition'),
+    )
+
+    def to_dict(self):
+        return {'id': self.id, 'region': self.region, 'average_values': {'ph': self.avg_soil_ph}}
+
+
+def _row(soil, region, fertilizer='npk', irrigation='drip', weather='sunny', ph=6.5):
+    return SoilRow(soil_type=soil, region=region, fertilizer_type=fertilizer,
+                   irrigation_method=irrigation, weather_condition=weather, avg_soil_ph=ph)
+
+
+@pytest.fixture
+def soil_app():
+    """Flask app with an in-memory table of average soil rows."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            _row('Loamy', 'Aegean', ph=6.1),
+            _row('Loamy', 'Aegean', fertilizer='organic', ph=6.2),
+            _row('Clay', 'Aegean', ph=7.0),
+            _row('Sandy', 'Marmara', ph=5.5),
+        ])
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+
+def _lookup(index, **overrides):
+    conditions = {'soil_type': 'Loamy', 'region': 'Aegean', 'fertilizer_type': 'organic',
+                  'irrigation_method': 'drip', 'weather_condition': 'sunny'}
+    conditions.update(overrides)
+    return index.lookup(**conditions)
+
+
+class TestAverageSoilIndex:
+    """Average soil index test sınıfı."""
+
+    @pytest.mark.unit
+    def test_fallback_levels(self, soil_app):
+        """Test exact -> region+soil -> region -> soil -> any resolution."""
+        index = AverageSoilIndex(SoilRow)
+
+        record, level = _lookup(index)
+        assert (record.to_dict()['average_values']['ph'], level) == (6.2, 0)
+        record, level = _lookup(index, weather_condition='rainy')
+        assert (record.to_dict()['average_values']['ph'], level) == (6.1, 1)
+        record, level = _lookup(index, soil_type='Silt')
+        assert (record.soil_type, level) == ('Loamy', 2)
+        record, level = _lookup(index, region='Black Sea', soil_type='Sandy')
+        assert (record.region, level) == ('Marmara', 3)
+        record, level = _lookup(index, region='Black Sea', soil_type='Silt')
+        assert level == 4
+
+        limited = AverageSoilIndex(SoilRow, levels=FALLBACK_LEVELS[:3])
+        assert _lookup(limited, region='Black Sea', soil_type='Sandy') == (None, None)
+
+    @pytest.mark.unit
+    def test_lookups_do_not_query_after_build(self, soil_app):
+        """Test that lookups are served from memory until the index is invalidated."""
+        index = AverageSoilIndex(SoilRow, refresh_interval=3600)
+        _lookup(index)
+        version = index.version
+
+        db.session.add(_row('Silt', 'Black Sea'))
+        db.session.commit()
+        assert _lookup(index, region='Black Sea', soil_type='Silt')[1] == 4
+
+        index.invalidate()
+        record, level = _lookup(index, region='Black Sea', soil_type='Silt')
+        assert index.version == version + 1
+        assert (record.region, level) == ('Black Sea', 1)
+
+    @pytest.mark.unit
+    def test_writes_from_other_processes_are_picked_up(self, soil_app):
+        """Test that a changed fingerprint triggers a rebuild after the refresh interval."""
+        index = AverageSoilIndex(SoilRow, refresh_interval=0)
+        _lookup(index)
+        version = index.version
+
+        _lookup(index)
+        assert index.version == version
+
+        db.session.add(_row('Silt', 'Black Sea'))
+        db.session.commit()
+        record, _ = _lookup(index, region='Black Sea', soil_type='Silt')
+        assert index.version == version + 1
+        assert record.region == 'Black Sea'
+
+    @pytest.mark.unit
+    def test_ingest_from_another_session_is_picked_up(self, soil_app):
+        """Test that an in-place upsert made through another session rebuilds a second index."""
+        index = AverageSoilIndex(SoilRow, refresh_interval=0)
+        assert _lookup(index)[0].to_dict()['average_values']['ph'] == 6.2
+
+        with Session(db.engine) as other:
+            ingest_measurements(other, [{
+                'soil_type': 'Loamy', 'region': 'Aegean', 'fertilizer_type': 'organic',
+                'irrigation_method': 'drip', 'weather_condition': 'sunny', 'soil_ph': 7.0,
+                'nitrogen': 0, 'phosphorus': 0, 'potassium': 0, 'moisture': 0,
+                'temperature_celsius': 0, 'rainfall_mm': 0,
+            }], target_table='soil_rows', store_raw=False)
+        assert SoilRow.query.count() == 4
+
+        record, level = _lookup(index)
+        assert level == 0
+        assert record.to_dict()['average_values']['ph'] == pytest.approx(6.6)
+
+    @pytest.mark.unit
+    def test_records_are_detached_snapshots(self, soil_app):
+        """Test that returned records survive session teardown and cannot be mutated through to_dict."""
+        index = AverageSoilIndex(SoilRow)
+        record, _ = _lookup(index)
+        db.session.remove()
+
+        record.to_dict()['average_values']['ph'] = 0
+        assert record.to_dict()['average_values']['ph'] == 6.2
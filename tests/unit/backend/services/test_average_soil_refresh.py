@@ -0,0 +1,194 @@
+"""
+Unit tests for average soil data refresh
+
+Bu test dosyası ortalama toprak verisini veritabanı içinde yeniden hesaplayan
+refresh ve artımlı ölçüm ekleme servisi için birim testlerini içerir.
+"""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from services.average_soil_refresh import (
+    refresh_average_soil_data, ingest_measurements, find_drift, aggregate_file, load_from_file
+)
+
+CONDITIONS = "soil_type, region, fertilizer_type, irrigation_method, weather_condition"
+
+
+@pytest.fixture
+def session():
+    """SQLite session with a TEXT-typed crop_dataset and an average_soil_data table."""
+    engine = create_engine('sqlite://')
+    with Session(engine) as session:
+        session.execute(text(f"""
+            CREATE TABLE crop_dataset (
+                soil_ph TEXT, nitrogen TEXT, phosphorus TEXT, potassium TEXT, moisture TEXT,
+                temperature_celsius TEXT, rainfall_mm TEXT, {CONDITIONS.replace(',', ' TEXT,')} TEXT, crop TEXT
+            )
+        """))
+        session.execute(text(f"""
+            CREATE TABLE average_soil_data (
+                id VARCHAR(36) PRIMARY KEY, {CONDITIONS.replace(',', ' VARCHAR(50),')} VARCHAR(50),
+                avg_soil_ph NUMERIC, avg_nitrogen NUMERIC, avg_phosphorus NUMERIC, avg_potassium NUMERIC,
+                avg_moisture NUMERIC, avg_temperature_celsius NUMERIC, avg_rainfall_mm NUMERIC,
+                data_count INTEGER, last_updated DATETIME, created_at DATETIME,
+                UNIQUE ({CONDITIONS})
+            )
+        """))
+        rows = [
+            ('6.0', 'Loamy', 'Aegean'), ('7.0', 'Loamy', 'Aegean'), ('5.0', 'Clay', 'Marmara'),
+        ]
+        for ph, soil, region in rows:
+            session.execute(text(f"""
+                INSERT INTO crop_dataset VALUES (:ph, '10', '20', '30', '40', '25', '500',
+                                                 :soil, :region, 'npk', 'drip', 'sunny', 'wheat')
+            """), {'ph': ph, 'soil': soil, 'region': region})
+        session.execute(text(f"""
+            INSERT INTO average_soil_data (id, {CONDITIONS}, avg_soil_ph, data_count)
+            VALUES ('old', 'Sandy', 'Aegean', 'npk', 'drip', 'sunny', 9.9, 1)
+        """))
+        session.commit()
+        yield session
+
+
+def _measurement(ph, soil='Loamy', region='Aegean', **overrides):
+    row = {
+        'soil_type': soil, 'region': region, 'fertilizer_type': 'npk', 'irrigation_method': 'drip',
+        'weather_condition': 'sunny', 'soil_ph': ph, 'nitrogen': 10, 'phosphorus': 20, 'potassium': 30,
+        'moisture': 40, 'temperature_celsius': 25, 'rainfall_mm': 500, 'crop': 'wheat'
+    }
+    row.update(overrides)
+    return row
+
+
+class TestAverageSoilRefresh:
+    """Average soil refresh test sınıfı."""
+
+    @pytest.mark.unit
+    def test_refresh_replaces_rows_with_server_side_aggregates(self, session):
+        """Test that the live table is swapped for fresh GROUP BY results."""
+        stats = refresh_average_soil_data(session)
+
+        assert (stats['rows_staged'], stats['rows_deleted'], stats['rows_inserted']) == (2, 1, 2)
+        assert stats['duration_ms'] >= 0
+        rows = session.execute(text(
+            "SELECT region, avg_soil_ph, avg_rainfall_mm, data_count FROM average_soil_data ORDER BY region"
+        )).all()
+        assert [(r[0], float(r[1]), float(r[2]), r[3]) for r in rows] == [
+            ('Aegean', 6.5, 500.0, 2), ('Marmara', 5.0, 500.0, 1)
+        ]
+        tables = session.execute(text("SELECT name FROM sqlite_temp_master WHERE type = 'table'")).all()
+        assert tables == []
+
+    @pytest.mark.unit
+    def test_permanent_table_with_staging_name_is_untouched(self, session):
+        """Test that the staging table can never drop a real table named like it."""
+        session.execute(text("CREATE TABLE average_soil_data_staging (note TEXT)"))
+        session.execute(text("INSERT INTO average_soil_data_staging VALUES ('keep me')"))
+        session.commit()
+
+        refresh_average_soil_data(session)
+
+        assert session.execute(text("SELECT note FROM average_soil_data_staging")).scalars().all() == ['keep me']
+
+    @pytest.mark.unit
+    def test_empty_source_keeps_current_rows(self, session):
+        """Test that an empty aggregate does not wipe the live table."""
+        session.execute(text("DELETE FROM crop_dataset"))
+        session.commit()
+
+        with pytest.raises(ValueError):
+            refresh_average_soil_data(session)
+
+        assert session.execute(text("SELECT id FROM average_soil_data")).scalars().all() == ['old']
+
+    @pytest.mark.unit
+    def test_invalid_table_name_is_rejected(self, session):
+        """Test that table names are validated before being put into SQL."""
+        with pytest.raises(ValueError):
+            refresh_average_soil_data(session, source_table='crop_dataset; DROP TABLE x')
+
+    @pytest.mark.unit
+    def test_ingest_updates_running_averages(self, session):
+        """Test that a batch is folded into existing and new groups with one upsert per group."""
+        refresh_average_soil_data(session)
+
+        stats = ingest_measurements(session, [
+            _measurement(8.0), _measurement(9.5),
+            _measurement(4.0, soil='Silt', region='Black Sea'),
+            _measurement('not a number'),
+            {'soil_type': 'Loamy'},
+        ])
+
+        assert stats['rows_accepted'] == 3
+        assert stats['rows_rejected'] == 2
+        assert stats['groups_upserted'] == 2
+        rows = session.execute(text("SELECT region, avg_soil_ph, data_count FROM average_soil_data")).all()
+        # Aegean: (6.0 + 7.0 + 8.0 + 9.5) / 4
+        assert {r[0]: (float(r[1]), r[2]) for r in rows} == {
+            'Aegean': (7.625, 4), 'Marmara': (5.0, 1), 'Black Sea': (4.0, 1)
+        }
+
+    @pytest.mark.unit
+    def test_ingested_rows_match_full_recompute(self, session):
+        """Test that incremental maintenance agrees with the GROUP BY consistency check."""
+        refresh_average_soil_data(session)
+        for ph in (5.5, 6.25, 8.0):
+            ingest_measurements(session, [_measurement(ph)], store_raw=True)
+
+        assert find_drift(session) == {'groups': 2, 'missing': 0, 'drifted': 0, 'extra': 0}
+
+        ingest_measurements(session, [_measurement(6.0, region='Black Sea')])
+        assert find_drift(session)['extra'] == 1
+
+    @pytest.mark.unit
+    def test_store_raw_requires_source_table(self, session):
+        """Test that raw storage is opt-in and fails clearly when crop_dataset is missing."""
+        session.execute(text("DROP TABLE crop_dataset"))
+        session.commit()
+
+        with pytest.raises(ValueError, match='crop_dataset'):
+            ingest_measurements(session, [_measurement(8.0)], store_raw=True)
+
+        assert ingest_measurements(session, [_measurement(8.0)])['groups_upserted'] == 1
+
+    @pytest.mark.unit
+    def test_file_aggregation_matches_sql_group_by(self, session, tmp_path):
+        """Test that chunked CSV aggregation produces the same rows as the SQL refresh."""
+        path = tmp_path / 'crop_dataset.csv'
+        rows = [_measurement(ph, soil, region) for ph, soil, region in
+                [(6.0, 'Loamy', 'Aegean'), (7.0, 'Loamy', 'Aegean'), (5.0, 'Clay', 'Marmara')]]
+        rows.append(_measurement(None, 'Loamy', 'Aegean'))
+        pd.DataFrame(rows).to_csv(path, index=False)
+
+        averages = aggregate_file(str(path), chunk_size=1)
+        assert averages.set_index('region')['avg_soil_ph'].to_dict() == {'Aegean': 6.5, 'Marmara': 5.0}
+        assert averages.set_index('region')['data_count'].to_dict() == {'Aegean': 3, 'Marmara': 1}
+
+        stats = load_from_file(session, str(path), chunk_size=2)
+        assert (stats['rows_deleted'], stats['rows_inserted'], stats['source_rows']) == (1, 2, 4)
+        session.execute(text("INSERT INTO crop_dataset (soil_type, region, fertilizer_type, irrigation_method, "
+                             "weather_condition, soil_ph, nitrogen, phosphorus, potassium, moisture, "
+                             "temperature_celsius, rainfall_mm) VALUES ('Loamy', 'Aegean', 'npk', 'drip', "
+                             "'sunny', NULL, '10', '20', '30', '40', '25', '500')"))
+        assert find_drift(session) == {'groups': 2, 'missing': 0, 'drifted': 0, 'extra': 0}
+
+    @pytest.mark.unit
+    def test_file_load_supports_app_layout(self, tmp_path):
+        """Test loading into app.py's ph/nitrogen/... column layout."""
+        engine = create_engine('sqlite://')
+        path = tmp_path / 'crop_dataset.csv'
+        pd.DataFrame([_measurement(6.0), _measurement(7.0)]).to_csv(path, index=False)
+        with Session(engine) as session:
+            session.execute(text(
+                "CREATE TABLE average_soil_data (id VARCHAR(36) PRIMARY KEY, soil_type TEXT, region TEXT, "
+                "fertilizer_type TEXT, irrigation_method TEXT, weather_condition TEXT, ph FLOAT, nitrogen FLOAT, "
+                "phosphorus FLOAT, potassium FLOAT, humidity FLOAT, temperature FLOAT, rainfall FLOAT, "
+                "created_at DATETIME, updated_at DATETIME)"
+            ))
+            load_from_file(session, str(path))
+
+            row = session.execute(text("SELECT ph, humidity, rainfall, updated_at FROM average_soil_data")).one()
+            assert row[:3] == (6.5, 40.0, 500.0)
+            assert row[3] is not None
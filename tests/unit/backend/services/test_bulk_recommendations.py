@@ -0,0 +1,204 @@
+"""
+Unit tests for bulk recommendation generation
+
+Bu test dosyası toplu (küme tabanlı) öneri üretim servisi için birim
+testlerini içerir.
+"""
+
+from types import SimpleNamespace
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+from services.bulk_recommendations import (
+    generate_environment_to_product, generate_product_to_environment, check_intervals
+)
+from services.recommendation_stats import get_user_counts, COUNTER_TABLE
+from tests.utils.database.query_counter import assert_max_queries
+
+db = SQLAlchemy()
+
+
+class Prod(db.Model):
+    __tablename__ = 'prods'
+
+    id = db.Column(db.String(36), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    is_active = db.Column(db.Boolean, default=True)
+    requirements = db.relationship('Req', uselist=False)
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name, 'requirements': {'ph': self.requirements.ph_min}}
+
+
+class Req(db.Model):
+    __tablename__ = 'reqs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.String(36), db.ForeignKey('prods.id'), nullable=False)
+    ph_min = db.Column(db.Float)
+    ph_max = db.Column(db.Float)
+    temperature_min = db.Column(db.Float)
+    temperature_max = db.Column(db.Float)
+    humidity_min = db.Column(db.Float)
+    humidity_max = db.Column(db.Float)
+
+
+class Rec(db.Model):
+    __tablename__ = 'recs'
+
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(36), nullable=False)
+    product_id = db.Column(db.String(36), nullable=False)
+    environment_id = db.Column(db.String(36), nullable=False)
+    model_result_id = db.Column(db.String(36))
+    recommendation_type = db.Column(db.String(30), nullable=False)
+    confidence_score = db.Column(db.Float)
+    suitability_score = db.Column(db.Float)
+    model_type = db.Column(db.String(50), nullable=False)
+    model_version = db.Column(db.String(20), nullable=False)
+    algorithm = db.Column(db.String(30), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    benefits = db.Column(db.Text)
+    challenges = db.Column(db.Text)
+    suggestions = db.Column(db.Text)
+    input_parameters = db.Column(db.JSON)
+    status = db.Column(db.String(20))
+    is_favorite = db.Column(db.Boolean)
+    view_count = db.Column(db.Integer)
+    last_viewed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+
+
+ENVIRONMENT = SimpleNamespace(id='env-1', name='Field 1', to_dict=lambda: {'id': 'env-1', 'name': 'Field 1'})
+LATEST = SimpleNamespace(ph=6.5, temperature=31.0, humidity=None)
+
+REQUIREMENTS = {
+    'Wheat': dict(ph_min=6.0, ph_max=7.5, temperature_min=10, temperature_max=25),
+    'Tomato': dict(ph_min=6.8, ph_max=0, temperature_min=18, temperature_max=35, humidity_min=40),
+    'Cotton': dict(ph_min=5.5, ph_max=8.0, temperature_min=20, temperature_max=40),
+    'Rice': dict(ph_min=7.0, ph_max=6.0, temperature_min=32, temperature_max=30),
+}
+
+
+def _reference(req, data):
+    """The checks of ProductRequirements.is_suitable_for_environment, row by row."""
+    issues = []
+    for name, label in (('ph', 'pH'), ('temperature', 'Temperature'), ('humidity', 'Humidity')):
+        value, low, high = getattr(data, name), getattr(req, f'{name}_min'), getattr(req, f'{name}_max')
+        if value is None:
+            continue
+        if low and value < low:
+            issues.append(f"{label} too low: {value} < {low}")
+        if high and value > high:
+            issues.append(f"{label} too high: {value} > {high}")
+    return not issues, issues
+
+
+@pytest.fixture
+def catalog_app():
+    """Flask app with four products with requirements and one without."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        for i, (name, bounds) in enumerate(REQUIREMENTS.items()):
+            db.session.add(Prod(id=f'p{i}', name=name, requirements=Req(**bounds)))
+        db.session.add(Prod(id='p-none', name='Mystery'))
+        db.session.add(Prod(id='p-off', name='Retired', is_active=False, requirements=Req(ph_min=1)))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestBulkRecommendations:
+    """Bulk recommendation generation test sınıfı."""
+
+    @pytest.mark.unit
+    def test_results_match_per_product_checks(self, catalog_app):
+        """Test that vectorized checks give the same suitability, scores and issues as the row-wise check."""
+        payloads = generate_environment_to_product(db.session, Prod, Rec, 'u1', ENVIRONMENT, LATEST)
+        db.session.commit()
+
+        assert sorted(p['product']['name'] for p in payloads) == sorted(REQUIREMENTS)
+        for payload in payloads:
+            product = db.session.get(Prod, payload['product_id'])
+            suitable, issues = _reference(product.requirements, LATEST)
+            assert payload['suitability_score'] == (1.0 if suitable else 0.5)
+            assert payload['confidence_score'] == (0.8 if suitable else 0.3)
+            assert payload['challenges'] == (", ".join(issues) if issues else "No major challenges identified.")
+            stored = db.session.get(Rec, payload['id'])
+            assert (stored.title, stored.challenges) == (payload['title'], payload['challenges'])
+            assert payload['environment'] == ENVIRONMENT.to_dict()
+
+    @pytest.mark.unit
+    def test_one_select_and_one_insert(self, catalog_app):
+        """Test that products, requirements and recommendations cost one SELECT and one INSERT."""
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2].split()[0]))
+
+        payloads = generate_environment_to_product(db.session, Prod, Rec, 'u1', ENVIRONMENT, LATEST)
+        for payload in payloads:
+            payload['product']['requirements']
+
+        assert statements == ['SELECT', 'INSERT']
+        assert len(payloads) == 4
+
+    @pytest.mark.unit
+    def test_no_per_product_queries(self, catalog_app):
+        """Test that generating for the whole catalog runs no statement shape more than once."""
+        with assert_max_queries(db.engine, 2, n_plus_one_threshold=1):
+            payloads = generate_environment_to_product(db.session, Prod, Rec, 'u1', ENVIRONMENT, LATEST)
+            assert all(p['product']['requirements'] for p in payloads)
+
+    @pytest.mark.unit
+    def test_counters_follow_bulk_insert(self, catalog_app):
+        """Test that enabled recommendation counters include bulk-inserted rows."""
+        db.session.execute(text(f"""
+            CREATE TABLE {COUNTER_TABLE} (
+                user_id VARCHAR(36) PRIMARY KEY, total INTEGER, favorite INTEGER, active INTEGER,
+                dismissed INTEGER, implemented INTEGER, product_to_environment INTEGER,
+                environment_to_product INTEGER, updated_at DATETIME
+            )
+        """))
+        get_user_counts(Rec, 'u1', use_counters=True)
+
+        generate_environment_to_product(db.session, Prod, Rec, 'u1', ENVIRONMENT, LATEST, maintain_counters=True)
+        db.session.commit()
+
+        assert get_user_counts(Rec, 'u1', use_counters=True) == get_user_counts(Rec, 'u1')
+        assert get_user_counts(Rec, 'u1', use_counters=True)['environment_to_product'] == 4
+        db.session.execute(text(f"DROP TABLE {COUNTER_TABLE}"))
+
+    @pytest.mark.unit
+    def test_product_to_environment_skips_environments_without_data(self, catalog_app):
+        """Test one product against several environments with a single INSERT."""
+        environments = [SimpleNamespace(id=f'env-{i}', name=f'Field {i}', to_dict=lambda i=i: {'id': f'env-{i}'})
+                        for i in range(3)]
+        latest = {'env-0': LATEST, 'env-2': SimpleNamespace(ph=6.2, temperature=20.0, humidity=55.0)}
+        wheat = db.session.get(Prod, 'p0')
+        wheat.requirements
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2].split()[0]))
+
+        payloads = generate_product_to_environment(db.session, Rec, 'u1', wheat, environments, latest)
+
+        assert statements == ['INSERT']
+        assert [(p['environment_id'], p['suitability_score']) for p in payloads] == [('env-0', 0.5), ('env-2', 1.0)]
+        assert payloads[0]['challenges'] == _reference(wheat.requirements, LATEST)[1][0]
+        assert payloads[1]['description'].endswith('is suitable for growing in Field 2.')
+
+    @pytest.mark.unit
+    def test_interval_check_broadcasts_over_environments(self):
+        """Test that one product can be checked against several environments at once."""
+        suitable, too_low, too_high = check_intervals(
+            [[5.0, 20.0, 50.0], [7.0, float('nan'), 50.0], [6.5, 40.0, 10.0]],
+            [[6.0, 10.0, float('nan')]], [[7.5, 30.0, float('nan')]]
+        )
+
+        assert suitable.tolist() == [False, True, False]
+        assert too_low[0, 0] and too_high[2, 1] and not too_low[2, 2]
@@ -0,0 +1,101 @@
+"""
+Unit tests for the cached index base
+
+Bu test dosyası parmak izi ile tazelenen bellek içi indeks temel sınıfı ve
+commit sonrası geçersiz kılma kancaları için birim testlerini içerir.
+"""
+
+from datetime import datetime
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, text
+from services.cached_index import CachedIndex, register_index, install_index_invalidation
+
+db = SQLAlchemy()
+
+
+class Crop(db.Model):
+    __tablename__ = 'cached_crops'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Note(db.Model):
+    __tablename__ = 'cached_notes'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+
+class CropNames(CachedIndex):
+    label = 'Crop names'
+
+    def _read_fingerprint(self):
+        return Crop.query.with_entities(func.count(Crop.id), func.max(Crop.updated_at)).one()
+
+    def _load_rows(self):
+        return Crop.query.all()
+
+    def _swap_in(self, rows):
+        self.names = sorted(row.name for row in rows)
+        return len(self.names)
+
+    def lookup(self):
+        self._ensure_fresh()
+        return self.names
+
+
+@pytest.fixture
+def crop_app():
+    """Flask app with two crops and an unrelated notes table."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Crop(name='wheat'), Crop(name='rice')])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestCachedIndex:
+    """Cached index test sınıfı."""
+
+    @pytest.mark.unit
+    def test_built_lazily_and_refreshed_by_fingerprint(self, crop_app):
+        """Test that the first lookup builds and an outside write is seen after refresh_interval."""
+        index = CropNames(Crop, refresh_interval=0)
+        assert index.version == 0
+        assert index.lookup() == ['rice', 'wheat'] and index.version == 1
+
+        assert index.lookup() and index.version == 1
+        db.session.execute(text("UPDATE cached_crops SET name = 'maize', updated_at = '2099-01-01' WHERE name = 'rice'"))
+        db.session.commit()
+        assert index.lookup() == ['maize', 'wheat'] and index.version == 2
+
+    @pytest.mark.unit
+    def test_only_commits_to_registered_tables_invalidate(self, crop_app):
+        """Test that a commit marks stale only the indexes registered for the written tables."""
+        listeners = install_index_invalidation(db.session)
+        try:
+            index = register_index(CropNames(Crop, refresh_interval=3600), ['cached_crops'])
+            index.lookup()
+
+            db.session.add(Note())
+            db.session.commit()
+            assert index.lookup() and index.version == 1
+
+            db.session.add(Crop(name='barley'))
+            db.session.rollback()
+            assert index.lookup() and index.version == 1
+
+            db.session.add(Crop(name='barley'))
+            db.session.commit()
+            assert index.lookup() == ['barley', 'rice', 'wheat'] and index.version == 2
+        finally:
+            for name, listener in zip(('before_flush', 'after_commit', 'after_rollback'), listeners):
+                event.remove(db.session, name, listener)
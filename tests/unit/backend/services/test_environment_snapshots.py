@@ -0,0 +1,78 @@
+"""
+Unit tests for environment snapshots
+
+Bu test dosyası birden çok ortam için en güncel ortam verisini tek sorguda
+getiren servis için birim testlerini içerir.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from services.environment_snapshots import latest_environment_data
+
+db = SQLAlchemy()
+
+START = datetime(2024, 5, 1, 8, 0)
+
+
+class EnvData(db.Model):
+    __tablename__ = 'environment_data'
+
+    id = db.Column(db.String(36), primary_key=True)
+    environment_id = db.Column(db.String(36), nullable=False)
+    ph = db.Column(db.Float)
+    measured_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_environment_data_env_measured', 'environment_id', 'measured_at'),
+    )
+
+
+@pytest.fixture
+def data_app():
+    """Flask app with 10 environments, each measured on several days in shuffled order."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            EnvData(id=f'e{env}-d{day}', environment_id=f'e{env}', ph=env + day / 10,
+                    measured_at=START + timedelta(days=day))
+            for env in range(10)
+            for day in (3, 0, env % 5 + 4, 1)
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestEnvironmentSnapshots:
+    """Environment snapshots test sınıfı."""
+
+    @pytest.mark.unit
+    def test_latest_row_per_environment_in_one_query(self, data_app):
+        """Test that the newest measurement of each requested environment comes back from one query."""
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        latest = latest_environment_data(db.session, EnvData, [f'e{env}' for env in range(10)] + ['e-missing'])
+
+        assert len(statements) == 1 and 'ROW_NUMBER' in statements[0].upper()
+        assert sorted(latest) == sorted(f'e{env}' for env in range(10))
+        for env in range(10):
+            expected = EnvData.query.filter_by(environment_id=f'e{env}').order_by(EnvData.measured_at.desc()).first()
+            assert latest[f'e{env}'].id == expected.id == f'e{env}-d{env % 5 + 4}'
+
+    @pytest.mark.unit
+    def test_only_requested_environments_and_empty_input(self, data_app):
+        """Test that other environments are not returned and no ids means no query."""
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        assert latest_environment_data(db.session, EnvData, []) == {}
+        assert statements == []
+        assert set(latest_environment_data(db.session, EnvData, ['e2', 'e7', 'e2'])) == {'e2', 'e7'}
@@ -0,0 +1,122 @@
+"""
+Unit tests for incremental model training
+
+Bu test dosyası mevcut modellerin geri bildirim verisiyle eğitimine devam eden
+incremental training servisi için birim testlerini içerir.
+"""
+
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+import lightgbm as lgb
+from xgboost import XGBClassifier
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder
+from services.incremental_training import (
+    continue_xgboost_bundle, continue_lightgbm_bundle, write_versioned_bundle
+)
+
+NUMERIC = ['soil_ph', 'rainfall_mm']
+
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'soil_ph': rng.uniform(4, 9, n),
+        'rainfall_mm': rng.uniform(100, 900, n),
+        'region': rng.choice(['Aegean', 'Marmara'], n),
+    })
+    df['crop'] = np.where(df['soil_ph'] > 6.5, 'wheat', np.where(df['region'] == 'Aegean', 'cotton', 'corn'))
+    df['fertilizer_type'] = np.where(df['rainfall_mm'] > 500, 'organic', 'npk')
+    return df
+
+
+@pytest.fixture
+def crop_bundle():
+    """Small model_data bundle in the layout XGBoostCropPredictor loads."""
+    df = _frame(600)
+    encoders = {col: LabelEncoder().fit(df[col]) for col in ['region', 'crop']}
+    X = df[NUMERIC + ['region']].assign(region=encoders['region'].transform(df['region']))
+    model = XGBClassifier(n_estimators=20, max_depth=3, n_jobs=1)
+    model.fit(X, encoders['crop'].transform(df['crop']))
+    return {
+        'model': model, 'encoders': encoders, 'feature_order': X.columns.tolist(),
+        'numeric_features': NUMERIC, 'categorical_features': ['region'], 'target': 'crop'
+    }
+
+
+@pytest.fixture
+def environment_bundle():
+    """Small per-target bundle in the EnvironmentalRecommendationModel layout."""
+    df = _frame(600)
+    preprocessor = ColumnTransformer([
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), ['crop', 'region']),
+        ('num', 'passthrough', NUMERIC)
+    ])
+    X = preprocessor.fit_transform(df)
+    le = LabelEncoder().fit(df['fertilizer_type'])
+    model = lgb.LGBMClassifier(n_estimators=10, verbose=-1).fit(X, le.transform(df['fertilizer_type']))
+    return {
+        'models': {'fertilizer_type': model}, 'preprocessor': preprocessor,
+        'label_encoders': {'fertilizer_type': le}, 'classes': {'fertilizer_type': le.classes_},
+        'weather_mapping': {}, 'target_columns': ['fertilizer_type']
+    }
+
+
+class TestIncrementalTraining:
+    """Incremental training test sınıfı."""
+
+    @pytest.mark.unit
+    def test_xgboost_bundle_continues_from_current_model(self, crop_bundle):
+        """Test that new trees are appended and the bundle layout is kept."""
+        rows = _frame(200, seed=1)
+        rows.loc[0, 'crop'] = 'banana'  # unseen label -> row dropped
+
+        new_bundle, added = continue_xgboost_bundle(crop_bundle, rows, num_boost_round=5, n_jobs=1)
+
+        assert added == 5
+        assert new_bundle['model'].get_booster().num_boosted_rounds() == 25
+        assert crop_bundle['model'].get_booster().num_boosted_rounds() == 20
+        assert set(new_bundle) == set(crop_bundle)
+
+        sample = pd.DataFrame([[7.5, 300.0, 0]], columns=new_bundle['feature_order'])
+        loaded = pickle.loads(pickle.dumps(new_bundle))
+        assert loaded['model'].predict_proba(sample).shape == (1, 3)
+        assert not np.allclose(
+            loaded['model'].predict_proba(sample), crop_bundle['model'].predict_proba(sample)
+        )
+
+    @pytest.mark.unit
+    def test_xgboost_bundle_without_usable_rows(self, crop_bundle):
+        """Test that rows with unknown categories leave the bundle unchanged."""
+        rows = _frame(10).assign(region='Unknown')
+
+        new_bundle, added = continue_xgboost_bundle(crop_bundle, rows)
+
+        assert added == 0
+        assert new_bundle is crop_bundle
+
+    @pytest.mark.unit
+    def test_lightgbm_bundle_continues_every_target(self, environment_bundle):
+        """Test that each per-target LightGBM model keeps its wrapper type."""
+        new_bundle, added = continue_lightgbm_bundle(environment_bundle, _frame(200, seed=2), num_boost_round=4)
+
+        model = new_bundle['models']['fertilizer_type']
+        assert added == 4
+        assert isinstance(model, lgb.LGBMClassifier)
+        assert model.booster_.current_iteration() == 14
+        assert environment_bundle['models']['fertilizer_type'].booster_.current_iteration() == 10
+
+    @pytest.mark.unit
+    def test_write_versioned_bundle(self, tmp_path, crop_bundle):
+        """Test versioned output and atomic promotion."""
+        live_path = tmp_path / 'crop_model.pkl'
+
+        path = write_versioned_bundle(crop_bundle, str(live_path), 'v20240101000000')
+        assert path == str(tmp_path / 'crop_model.v20240101000000.pkl')
+        assert not live_path.exists()
+
+        write_versioned_bundle(crop_bundle, str(live_path), 'v20240102000000', promote=True)
+        with open(live_path, 'rb') as f:
+            assert pickle.load(f)['feature_order'] == crop_bundle['feature_order']
@@ -0,0 +1,115 @@
+"""
+Unit tests for keyset pagination
+
+Bu test dosyası (created_at, id) üzerinde imleç tabanlı sayfalama servisi
+için birim testlerini içerir.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from werkzeug.datastructures import MultiDict
+from services.keyset_pagination import (
+    keyset_page, encode_cursor, decode_cursor, pagination_payload, cursor_requested, InvalidCursor
+)
+
+db = SQLAlchemy()
+
+START = datetime(2024, 3, 1, 12, 0)
+
+
+class Rec(db.Model):
+    __tablename__ = 'recommendations'
+
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(36), nullable=False)
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_recommendations_user_status_created', 'user_id', 'status', 'created_at', 'id'),
+    )
+
+
+@pytest.fixture
+def rec_app():
+    """Flask app with 95 recommendations for u1 (many sharing a created_at) and some for u2."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Rec(id=f'r{i:03d}', user_id='u1', status='dismissed' if i % 10 == 0 else 'active',
+                created_at=START + timedelta(minutes=i // 4, microseconds=i % 2))
+            for i in range(95)
+        ] + [Rec(id=f'x{i}', user_id='u2', status='active', created_at=START) for i in range(5)])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _active(user_id='u1'):
+    return Rec.query.filter_by(user_id=user_id, status='active')
+
+
+class TestKeysetPagination:
+    """Keyset pagination test sınıfı."""
+
+    @pytest.mark.unit
+    def test_pages_cover_every_row_once_in_order(self, rec_app):
+        """Test that following next_cursor returns all rows newest first, without gaps or repeats."""
+        expected = [r.id for r in _active().order_by(Rec.created_at.desc(), Rec.id.desc()).all()]
+        seen, cursor, pages = [], None, 0
+
+        while True:
+            page = keyset_page(_active(), Rec, per_page=7, cursor=cursor)
+            seen.extend(r.id for r in page['items'])
+            pages += 1
+            if not page['has_next']:
+                break
+            cursor = page['next_cursor']
+
+        assert seen == expected
+        assert pages == -(-len(expected) // 7)
+        assert page['next_cursor'] is None
+
+    @pytest.mark.unit
+    def test_one_indexed_query_and_total_on_request(self, rec_app):
+        """Test that a deep page is a single indexed range query and COUNT runs only when asked."""
+        cursor = keyset_page(_active(), Rec, per_page=60)['next_cursor']
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2:4]))
+
+        page = keyset_page(_active(), Rec, per_page=10, cursor=cursor)
+        assert len(statements) == 1
+        assert '(recommendations.created_at, recommendations.id) < (?, ?)' in statements[0][0]
+        assert 'total' not in pagination_payload(page)
+        plan = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statements[0][0], statements[0][1])
+        assert 'idx_recommendations_user_status_created' in str(plan.fetchall())
+
+        statements.clear()
+        page = keyset_page(_active(), Rec, per_page=10, cursor=cursor, include_total=True)
+        assert len(statements) == 2
+        assert pagination_payload(page)['total'] == _active().count() == 85
+
+    @pytest.mark.unit
+    def test_cursor_round_trip_and_rejection(self, rec_app):
+        """Test that cursors decode to the last row's key and tampered cursors are rejected."""
+        created_at = datetime(2024, 3, 1, 12, 5, 0, 1)
+        assert decode_cursor(encode_cursor(created_at, 'r021')) == (created_at, 'r021')
+
+        for cursor in ('not-a-cursor', encode_cursor(created_at, 'r1')[:-3], 'W10'):
+            with pytest.raises(InvalidCursor):
+                keyset_page(_active(), Rec, cursor=cursor)
+
+    @pytest.mark.unit
+    def test_keyset_only_on_opt_in(self):
+        """Test that list endpoints keep page numbers unless a cursor or pagination=cursor is sent."""
+        assert not cursor_requested(MultiDict())
+        assert not cursor_requested(MultiDict({'page': '2', 'per_page': '10'}))
+        assert cursor_requested(MultiDict({'pagination': 'cursor'}))
+        assert cursor_requested(MultiDict({'cursor': encode_cursor(START, 'r001')}))
@@ -0,0 +1,104 @@
+"""
+Unit tests for model compaction
+
+Bu test dosyası model bundle'larını doğruluk bütçesi içinde küçülten
+model compaction servisi için birim testlerini içerir.
+"""
+
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+import lightgbm as lgb
+from xgboost import XGBClassifier
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder
+from services.model_compaction import (
+    compact_xgboost_bundle, compact_lightgbm_bundle, smallest_iteration_count
+)
+
+NUMERIC = ['soil_ph', 'rainfall_mm']
+
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'soil_ph': rng.uniform(4, 9, n),
+        'rainfall_mm': rng.uniform(100, 900, n),
+        'region': rng.choice(['Aegean', 'Marmara'], n),
+    })
+    df['crop'] = np.where(df['soil_ph'] > 6.5, 'wheat', np.where(df['region'] == 'Aegean', 'cotton', 'corn'))
+    df['fertilizer_type'] = np.where(df['rainfall_mm'] > 500, 'organic', 'npk')
+    return df
+
+
+class TestModelCompaction:
+    """Model compaction test sınıfı."""
+
+    @pytest.mark.unit
+    def test_smallest_iteration_count_respects_budget(self):
+        """Test that the first iteration count within the accuracy budget is chosen."""
+        y = np.zeros(100, dtype=int)
+        accuracy_at = {k: min(1.0, k / 10) for k in range(1, 101)}
+
+        def predict_proba(k):
+            correct = int(accuracy_at[k] * 100)
+            proba = np.tile([0.1, 0.9], (100, 1))
+            proba[:correct] = [0.9, 0.1]
+            return proba
+
+        k, full, compact = smallest_iteration_count(
+            predict_proba, 100, y, max_accuracy_drop=0.2, max_logloss_increase=None
+        )
+
+        assert k == 8
+        assert full['accuracy'] == 1.0
+        assert compact['accuracy'] == pytest.approx(0.8)
+
+    @pytest.mark.unit
+    def test_xgboost_bundle_is_truncated(self):
+        """Test that an oversized XGBoost model is truncated and stays loadable."""
+        df = _frame(800)
+        encoders = {col: LabelEncoder().fit(df[col]) for col in ['region', 'crop']}
+        X = df[NUMERIC + ['region']].assign(region=encoders['region'].transform(df['region']))
+        model = XGBClassifier(n_estimators=200, max_depth=3, n_jobs=1)
+        model.fit(X, encoders['crop'].transform(df['crop']))
+        bundle = {
+            'model': model, 'encoders': encoders, 'feature_order': X.columns.tolist(),
+            'numeric_features': NUMERIC, 'categorical_features': ['region'], 'target': 'crop'
+        }
+
+        slim_bundle, reports = compact_xgboost_bundle(bundle, _frame(400, seed=1), max_accuracy_drop=0.01)
+
+        report = reports['crop']
+        assert report['iterations_after'] < 200
+        assert report['accuracy_before'] - report['accuracy_after'] <= 0.01
+        assert report['after']['size_kb'] < report['before']['size_kb']
+
+        loaded = pickle.loads(pickle.dumps(slim_bundle))
+        assert loaded['model'].get_booster().num_boosted_rounds() == report['iterations_after']
+        assert set(loaded) == set(bundle)
+
+    @pytest.mark.unit
+    def test_lightgbm_bundle_is_truncated_per_target(self):
+        """Test that each LightGBM target gets its own iteration count."""
+        df = _frame(800)
+        preprocessor = ColumnTransformer([
+            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), ['crop', 'region']),
+            ('num', 'passthrough', NUMERIC)
+        ])
+        X = preprocessor.fit_transform(df)
+        le = LabelEncoder().fit(df['fertilizer_type'])
+        model = lgb.LGBMClassifier(n_estimators=300, verbose=-1).fit(X, le.transform(df['fertilizer_type']))
+        bundle = {
+            'models': {'fertilizer_type': model}, 'preprocessor': preprocessor,
+            'label_encoders': {'fertilizer_type': le}, 'classes': {'fertilizer_type': le.classes_},
+            'weather_mapping': {}, 'target_columns': ['fertilizer_type']
+        }
+
+        slim_bundle, reports = compact_lightgbm_bundle(bundle, _frame(400, seed=2), max_accuracy_drop=0.0)
+
+        slim = slim_bundle['models']['fertilizer_type']
+        assert isinstance(slim, lgb.LGBMClassifier)
+        assert slim.booster_.current_iteration() == reports['fertilizer_type']['iterations_after'] < 300
+        assert reports['fertilizer_type']['accuracy_after'] >= reports['fertilizer_type']['accuracy_before']
@@ -0,0 +1,122 @@
+"""
+Unit tests for product search
+
+Bu test dosyası Türkçe duyarlı, n-gram indeksli ürün arama servisi için
+birim testlerini içerir.
+"""
+
+import random
+from datetime import datetime
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from services.product_search import ProductSearchIndex, fold, get_search_index, search_products
+from services.cached_index import install_index_invalidation
+
+db = SQLAlchemy()
+
+
+class Product(db.Model):
+    __tablename__ = 'products'
+
+    id = db.Column(db.String(36), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    is_active = db.Column(db.Boolean, default=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+CATALOG = [
+    ('Ispanak', 'Yeşil yapraklı sebze'),
+    ('Çay', 'Karadeniz bölgesi'),
+    ('Kırmızı Biber', 'Acı ve tatlı çeşitleri'),
+    ('Biber', 'Sivri biber'),
+    ('Dolmalık Biber', None),
+    ('Fıstık', 'Antep fıstığı, biber ile değil'),
+    ('Pirinç', 'Çeltik'),
+]
+
+
+@pytest.fixture
+def catalog_app():
+    """Flask app with a small Turkish product catalog and one inactive product."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Product(id=f'p{i}', name=name, description=description)
+                            for i, (name, description) in enumerate(CATALOG)])
+        db.session.add(Product(id='p-off', name='Eski Biber', is_active=False))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _names(products):
+    return [p.name for p in products]
+
+
+class TestProductSearch:
+    """Product search test sınıfı."""
+
+    @pytest.mark.unit
+    def test_turkish_folding(self, catalog_app):
+        """Test that İ/I/ı/i and ç ş ğ ö ü are matched regardless of case and marks."""
+        assert fold('İSPANAK') == fold('ıspanak') == fold('Ispanak') == 'ispanak'
+        for query in ('ISPANAK', 'ıspanak', 'İspanak', 'ispa'):
+            assert _names(search_products(db.session, Product, query)) == ['Ispanak']
+        assert _names(search_products(db.session, Product, 'cay')) == ['Çay']
+        assert _names(search_products(db.session, Product, 'KIRMIZI')) == ['Kırmızı Biber']
+        assert _names(search_products(db.session, Product, 'celtik')) == ['Pirinç']
+        assert search_products(db.session, Product, 'nonexistent') == []
+        assert search_products(db.session, Product, '   ') == []
+
+    @pytest.mark.unit
+    def test_ranked_and_limited(self, catalog_app):
+        """Test exact, prefix, word prefix and description matches come in that order, up to limit."""
+        results = _names(search_products(db.session, Product, 'biber'))
+
+        assert results[0] == 'Biber'
+        assert set(results[1:3]) == {'Kırmızı Biber', 'Dolmalık Biber'}
+        assert results[3:] == ['Fıstık']
+        assert 'Eski Biber' not in results
+        assert _names(search_products(db.session, Product, 'biber', limit=1)) == ['Biber']
+
+    @pytest.mark.unit
+    def test_same_matches_as_substring_scan(self, catalog_app):
+        """Test that n-gram candidates give exactly the products a folded substring scan finds."""
+        rng = random.Random(3)
+        words = ['buğday', 'arpa', 'mısır', 'ıhlamur', 'İncir', 'şeftali', 'zeytin', 'çilek', 'kavun', 'üzüm']
+        db.session.add_all([Product(id=f'r{i}', name=' '.join(rng.sample(words, 2)),
+                                    description=' '.join(rng.sample(words, 3))) for i in range(200)])
+        db.session.commit()
+        index = ProductSearchIndex(Product)
+        active = Product.query.filter_by(is_active=True).all()
+
+        for query in ('a', 'ih', 'incir', 'ILHAMUR', 'tin çil', 'zeytin arpa', 'q'):
+            expected = {p.id for p in active if fold(query) in f'{fold(p.name)}\n{fold(p.description)}'}
+            assert {product_id for product_id, _, _ in index.search(fold(query), limit=1000)} == expected
+
+    @pytest.mark.unit
+    def test_index_refreshed_after_product_commit(self, catalog_app):
+        """Test that lookups cost one primary key query and a committed product is found next time."""
+        listeners = install_index_invalidation(db.session)
+        try:
+            search_products(db.session, Product, 'biber')
+            version = get_search_index(Product).version
+            statements = []
+            event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+            search_products(db.session, Product, 'biber')
+            assert len(statements) == 1
+
+            db.session.add(Product(id='p-new', name='Isot Biberi'))
+            db.session.commit()
+            assert 'Isot Biberi' in _names(search_products(db.session, Product, 'İSOT'))
+            assert get_search_index(Product).version == version + 1
+        finally:
+            for name, listener in zip(('before_flush', 'after_commit', 'after_rollback'), listeners):
+                event.remove(db.session, name, listener)
@@ -0,0 +1,224 @@
+"""
+Unit tests for recommendation statistics
+
+Bu test dosyası tek sorguluk öneri istatistikleri ve kullanıcı bazlı sayaç
+tablosu servisi için birim testlerini içerir.
+"""
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from services.recommendation_stats import (
+    get_user_counts, backfill_user_counters, install_counter_maintenance, apply_counter_deltas,
+    format_stats, COUNTER_TABLE
+)
+
+db = SQLAlchemy()
+
+# PostgreSQL-only locking tests run when this points at a disposable database
+POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+
+COUNTER_DDL = f"""
+    CREATE TABLE {COUNTER_TABLE} (
+        user_id VARCHAR(36) PRIMARY KEY, total INTEGER, favorite INTEGER, active INTEGER,
+        dismissed INTEGER, implemented INTEGER, product_to_environment INTEGER,
+        environment_to_product INTEGER, updated_at TIMESTAMP
+    )
+"""
+
+
+class Rec(db.Model):
+    __tablename__ = 'recs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(36), nullable=False)
+    recommendation_type = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), default='active')
+    is_favorite = db.Column(db.Boolean, default=False)
+
+
+@pytest.fixture
+def stats_app(tmp_path):
+    """Flask app (file database, so threads share it) with recommendations for two users and an empty counters table."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'stats.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(text(COUNTER_DDL))
+        db.session.add_all([
+            Rec(user_id='u1', recommendation_type='product_to_environment'),
+            Rec(user_id='u1', recommendation_type='product_to_environment', is_favorite=True),
+            Rec(user_id='u1', recommendation_type='environment_to_product', status='implemented'),
+            Rec(user_id='u1', recommendation_type='environment_to_product', status='dismissed', is_favorite=True),
+            Rec(user_id='u2', recommendation_type='product_to_environment'),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _count_queries(engine):
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestRecommendationStats:
+    """Recommendation statistics test sınıfı."""
+
+    @pytest.mark.unit
+    def test_all_counts_come_from_one_query(self, stats_app):
+        """Test that every counter of the stats endpoint is computed with a single statement."""
+        statements = _count_queries(db.engine)
+
+        counts = get_user_counts(Rec, 'u1')
+
+        assert len(statements) == 1
+        assert format_stats(counts) == {
+            'total_recommendations': 4,
+            'active_recommendations': 2,
+            'favorite_recommendations': 2,
+            'implemented_recommendations': 1,
+            'dismissed_recommendations': 1,
+            'by_type': {'product_to_environment': 2, 'environment_to_product': 2}
+        }
+
+    @pytest.mark.unit
+    def test_counters_are_backfilled_then_read_by_key(self, stats_app):
+        """Test that the first read backfills the counters row and later reads use it."""
+        statements = _count_queries(db.engine)
+        first = get_user_counts(Rec, 'u1', use_counters=True)
+
+        assert first == get_user_counts(Rec, 'u1')
+        backfill = [s for s in statements if s.lstrip().startswith('INSERT')]
+        assert len(backfill) == 1 and 'SELECT' in backfill[0] and 'FROM recs' in backfill[0]
+
+        statements.clear()
+        second = get_user_counts(Rec, 'u1', use_counters=True)
+
+        assert first == second
+        assert len(statements) == 1 and COUNTER_TABLE in statements[0]
+
+    @pytest.mark.unit
+    def test_backfill_keeps_an_existing_row(self, stats_app):
+        """Test that a row written by a concurrent backfill is not replaced."""
+        db.session.execute(text(
+            f"INSERT INTO {COUNTER_TABLE} (user_id, total, favorite, active, dismissed, implemented, "
+            f"product_to_environment, environment_to_product) VALUES ('u2', 7, 0, 7, 0, 0, 7, 0)"
+        ))
+        db.session.commit()
+
+        backfill_user_counters(db.session, Rec, 'u2')
+        db.session.commit()
+
+        assert get_user_counts(Rec, 'u2', use_counters=True)['total'] == 7
+        assert get_user_counts(Rec, 'nobody', use_counters=True) == dict.fromkeys(get_user_counts(Rec, 'u2'), 0)
+
+    @pytest.mark.unit
+    def test_counters_follow_inserts_status_changes_and_deletes(self, stats_app):
+        """Test that counters stay equal to the grouped query through writes."""
+        listener = install_counter_maintenance(db.session, Rec)
+        try:
+            get_user_counts(Rec, 'u1', use_counters=True)
+
+            db.session.add(Rec(user_id='u1', recommendation_type='environment_to_product'))
+            active = Rec.query.filter_by(user_id='u1', status='active', is_favorite=False).first()
+            active.status = 'implemented'
+            active.is_favorite = True
+            db.session.delete(Rec.query.filter_by(user_id='u1', status='dismissed').one())
+            db.session.commit()
+
+            maintained = get_user_counts(Rec, 'u1', use_counters=True)
+            assert maintained == get_user_counts(Rec, 'u1')
+            assert maintained['total'] == 4 and maintained['implemented'] == 2
+
+            db.session.add(Rec(user_id='u1', recommendation_type='product_to_environment'))
+            db.session.rollback()
+            assert get_user_counts(Rec, 'u1', use_counters=True) == maintained
+        finally:
+            event.remove(db.session, 'before_flush', listener)
+
+    @pytest.mark.unit
+    def test_backfill_waits_for_an_uncommitted_insert(self, stats_app):
+        """Test that a backfill racing an uncommitted recommendation insert still counts it."""
+        listener = install_counter_maintenance(db.session, Rec)
+        try:
+            db.session.add(Rec(user_id='u1', recommendation_type='environment_to_product'))
+            db.session.flush()
+            results = {}
+
+            def read_counters():
+                with stats_app.app_context():
+                    results['counts'] = get_user_counts(Rec, 'u1', use_counters=True)
+                    db.session.commit()
+
+            reader = threading.Thread(target=read_counters)
+            reader.start()
+            time.sleep(0.3)
+            db.session.commit()
+            reader.join()
+
+            assert results['counts']['total'] == 5
+            assert get_user_counts(Rec, 'u1', use_counters=True) == get_user_counts(Rec, 'u1')
+        finally:
+            event.remove(db.session, 'before_flush', listener)
+
+    @pytest.mark.unit
+    def test_counter_updates_lock_users_in_id_order(self):
+        """Test that on PostgreSQL every user row is locked before its counters are updated."""
+        statements = []
+        connection = SimpleNamespace(dialect=SimpleNamespace(name='postgresql'),
+                                     execute=lambda clause, params: statements.append((str(clause), params['user_id'])))
+
+        apply_counter_deltas(connection, {'u2': {'total': 1}, 'u1': {'total': 1, 'favorite': 1}})
+
+        assert [(sql.split()[0], 'FOR UPDATE' in sql, user) for sql, user in statements] == [
+            ('SELECT', True, 'u1'), ('UPDATE', False, 'u1'), ('SELECT', True, 'u2'), ('UPDATE', False, 'u2')
+        ]
+
+    @pytest.mark.integration
+    @pytest.mark.database
+    @pytest.mark.skipif(not POSTGRES_URL, reason='TEST_POSTGRES_URL not set')
+    def test_postgres_backfill_counts_a_concurrent_insert(self):
+        """Test that under READ COMMITTED the backfill blocks on the user lock and sees the committed row."""
+        engine = create_engine(POSTGRES_URL)
+        with Session(engine) as setup:
+            setup.execute(text(f"DROP TABLE IF EXISTS recs, {COUNTER_TABLE}"))
+            setup.execute(text("CREATE TABLE IF NOT EXISTS users (id VARCHAR(36) PRIMARY KEY)"))
+            setup.execute(text("INSERT INTO users (id) VALUES ('stats-u1') ON CONFLICT DO NOTHING"))
+            setup.execute(text(
+                "CREATE TABLE recs (id SERIAL PRIMARY KEY, user_id VARCHAR(36) NOT NULL, "
+                "recommendation_type VARCHAR(30) NOT NULL, status VARCHAR(20), is_favorite BOOLEAN)"
+            ))
+            setup.execute(text(COUNTER_DDL))
+            setup.commit()
+        try:
+            with Session(engine) as writer, Session(engine) as reader:
+                apply_counter_deltas(writer.connection(), {'stats-u1': {'total': 1, 'active': 1}})
+                writer.execute(text(
+                    "INSERT INTO recs (user_id, recommendation_type, status, is_favorite) "
+                    "VALUES ('stats-u1', 'product_to_environment', 'active', false)"
+                ))
+                backfill = threading.Thread(target=lambda: (backfill_user_counters(reader, Rec, 'stats-u1'),
+                                                            reader.commit()))
+                backfill.start()
+                time.sleep(0.3)
+                assert backfill.is_alive()
+                writer.commit()
+                backfill.join()
+
+                total = reader.execute(text(f"SELECT total FROM {COUNTER_TABLE} WHERE user_id = 'stats-u1'"))
+                assert total.scalar() == 1
+        finally:
+            with Session(engine) as cleanup:
+                cleanup.execute(text(f"DROP TABLE IF EXISTS recs, {COUNTER_TABLE}"))
+                cleanup.execute(text("DELETE FROM users WHERE id = 'stats-u1'"))
+                cleanup.commit()
@@ -0,0 +1,181 @@
+"""
+Unit tests for the requirement index
+
+Bu test dosyası ürün gereksinim aralıkları üzerindeki bellek içi indeks
+için birim testlerini içerir.
+"""
+
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+from services.requirement_index import RequirementIndex, get_requirement_index
+from services.cached_index import install_index_invalidation
+
+db = SQLAlchemy()
+
+FEATURES = (('ph', 'pH'), ('temperature', 'Temperature'), ('humidity', 'Humidity'))
+
+
+class Product(db.Model):
+    __tablename__ = 'products'
+
+    id = db.Column(db.String(36), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    is_active = db.Column(db.Boolean, default=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    requirements = db.relationship('ProductRequirements', uselist=False)
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name}
+
+
+class ProductRequirements(db.Model):
+    __tablename__ = 'product_requirements'
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.String(36), db.ForeignKey('products.id'), nullable=False)
+    ph_min = db.Column(db.Float)
+    ph_max = db.Column(db.Float)
+    temperature_min = db.Column(db.Float)
+    temperature_max = db.Column(db.Float)
+    humidity_min = db.Column(db.Float)
+    humidity_max = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def _random_bounds(rng, low, high):
+    """A range, sometimes open on one side (None / 0 mean no bound)."""
+    start = round(rng.uniform(low, high), 1)
+    end = round(start + rng.uniform(0, (high - low) / 2), 1)
+    return rng.choice([(start, end), (start, end), (None, end), (start, 0), (None, None)])
+
+
+def _reference(req, values):
+    """is_suitable_for_environment plus the routes' partial score, product by product."""
+    issues, total, passed = [], 0, 0
+    for name, label in FEATURES:
+        value, low, high = values.get(name), getattr(req, f'{name}_min'), getattr(req, f'{name}_max')
+        failed = False
+        if value is not None:
+            if low and value < low:
+                issues.append(f"{label} too low: {value} < {low}")
+                failed = True
+            if high and value > high:
+                issues.append(f"{label} too high: {value} > {high}")
+                failed = True
+        if low is not None or high is not None:
+            total += 1
+            passed += bool(value) and not failed
+    score = 1.0 if not issues else (passed / total if total else 0.0)
+    return not issues, issues, score
+
+
+@pytest.fixture
+def catalog_app():
+    """Flask app with 300 products with random requirement ranges."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    rng = random.Random(7)
+    with app.app_context():
+        db.create_all()
+        for i in range(300):
+            ph, temperature, humidity = (_random_bounds(rng, 4, 9), _random_bounds(rng, 0, 40),
+                                         _random_bounds(rng, 10, 90))
+            db.session.add(Product(id=f'p{i}', name=f'Crop {i}', is_active=i % 50 != 0, requirements=ProductRequirements(
+                ph_min=ph[0], ph_max=ph[1], temperature_min=temperature[0], temperature_max=temperature[1],
+                humidity_min=humidity[0], humidity_max=humidity[1])))
+        db.session.add(Product(id='p-none', name='Mystery'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestRequirementIndex:
+    """Requirement index test sınıfı."""
+
+    @pytest.mark.unit
+    def test_matches_product_by_product_check(self, catalog_app):
+        """Test that fitting products, failed constraints and scores equal the row-by-row check."""
+        index = RequirementIndex(Product)
+        products = {p.id: p for p in Product.query.filter_by(is_active=True).all() if p.requirements}
+        environments = [
+            {'ph': 6.5, 'temperature': 22.0, 'humidity': 55.0},
+            {'ph': 4.0, 'temperature': 38.5, 'humidity': None},
+            SimpleNamespace(ph=7.2, temperature=15.0, humidity=80.0),
+        ]
+
+        for environment in environments:
+            values = environment if isinstance(environment, dict) else vars(environment)
+            match = index.match(environment)
+            expected = {pid: _reference(p.requirements, values) for pid, p in products.items()}
+
+            assert sorted(p.id for p in match.suitable_products()) == sorted(
+                pid for pid, (suitable, _, _) in expected.items() if suitable)
+            assert match.failures() == {pid: issues for pid, (suitable, issues, _) in expected.items() if not suitable}
+            ranked = match.ranked()
+            assert len(ranked) == len(products)
+            for result in ranked:
+                assert (result['suitable'], result['issues'], result['suitability_score']) == expected[result['product']['id']]
+            assert [r['suitability_score'] for r in ranked] == sorted((r['suitability_score'] for r in ranked), reverse=True)
+
+    @pytest.mark.unit
+    def test_lookups_do_not_query(self, catalog_app):
+        """Test that once built, lookups are answered from memory."""
+        index = RequirementIndex(Product)
+        index.build()
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        for ph in (5.0, 6.0, 7.0, 8.0):
+            index.match({'ph': ph, 'temperature': 20.0, 'humidity': 50.0}).ranked()
+
+        assert statements == []
+        assert index.version == 1
+
+    @pytest.mark.unit
+    def test_rebuilt_after_product_commit(self, catalog_app):
+        """Test that a committed product create or update bumps the version, a rollback does not."""
+        listeners = install_index_invalidation(db.session)
+        index = get_requirement_index(Product)
+        try:
+            before = index.match({'ph': 6.5}).version
+
+            db.session.add(Product(id='p-new', name='Quinoa', requirements=ProductRequirements(ph_min=9.5)))
+            db.session.rollback()
+            assert index.match({'ph': 6.5}).version == before
+
+            db.session.add(Product(id='p-new', name='Quinoa', requirements=ProductRequirements(ph_min=9.5)))
+            db.session.commit()
+            match = index.match({'ph': 6.5})
+            assert match.version == before + 1
+            assert match.failures()['p-new'] == ['pH too low: 6.5 < 9.5']
+
+            db.session.get(Product, 'p-new').requirements.ph_min = 6.0
+            db.session.commit()
+            match = index.match({'ph': 6.5})
+            assert match.version == before + 2
+            assert 'p-new' in {p.id for p in match.suitable_products()}
+        finally:
+            for name, listener in zip(('before_flush', 'after_commit', 'after_rollback'), listeners):
+                event.remove(db.session, name, listener)
+
+    @pytest.mark.unit
+    def test_fingerprint_catches_writes_from_other_processes(self, catalog_app):
+        """Test that a change made outside this session is picked up after refresh_interval."""
+        index = RequirementIndex(Product, refresh_interval=0)
+        index.build()
+
+        db.session.execute(text(
+            "UPDATE product_requirements SET ph_min = NULL, ph_max = 1.0, updated_at = :later WHERE product_id = 'p1'"
+        ), {'later': datetime.utcnow() + timedelta(days=1)})
+        db.session.commit()
+
+        match = index.match({'ph': 6.5})
+        assert match.version == 2
+        assert match.failures()['p1'] == ['pH too high: 6.5 > 1.0']
@@ -0,0 +1,261 @@
+"""
+Unit tests for statistics rollups
+
+Bu test dosyası model kullanım ve kullanıcı aktivite istatistikleri için
+günlük / saatlik özet tablosu servisi için birim testlerini içerir.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+from services.rollups import (
+    rollup_model_usage, model_usage_statistics, rollup_activity_usage, activity_statistics,
+    get_watermark, MODEL_USAGE, MODEL_USAGE_TABLE
+)
+
+db = SQLAlchemy()
+
+NOW = datetime(2024, 5, 20, 15, 30)
+
+
+class Result(db.Model):
+    __tablename__ = 'model_results'
+
+    id = db.Column(db.Integer, primary_key=True)
+    model_type = db.Column(db.String(50), nullable=False)
+    algorithm = db.Column(db.String(30), nullable=False)
+    processing_time_ms = db.Column(db.Float)
+    status = db.Column(db.String(20), default='completed')
+    created_at = db.Column(db.DateTime)
+
+
+class UsageDaily(db.Model):
+    __tablename__ = 'model_usage_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    model_type = db.Column(db.String(50), primary_key=True)
+    algorithm = db.Column(db.String(30), primary_key=True)
+    request_count = db.Column(db.Integer, nullable=False)
+    processing_time_sum = db.Column(db.Float, nullable=False)
+
+
+class Watermark(db.Model):
+    __tablename__ = 'rollup_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    rolled_until = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime)
+
+
+class Activity(db.Model):
+    __tablename__ = 'user_activity_logs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(36), nullable=False)
+    activity_type = db.Column(db.String(50), nullable=False)
+    activity_category = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), default='success')
+    response_time_ms = db.Column(db.Float)
+    device_type = db.Column(db.String(20))
+    platform = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime)
+
+
+class ActivityHourly(db.Model):
+    __tablename__ = 'activity_usage_hourly'
+
+    hour = db.Column(db.DateTime, primary_key=True)
+    user_id = db.Column(db.String(36), primary_key=True)
+    activity_type = db.Column(db.String(50), primary_key=True)
+    activity_category = db.Column(db.String(30), primary_key=True)
+    device_type = db.Column(db.String(20), primary_key=True)
+    platform = db.Column(db.String(50), primary_key=True)
+    activity_count = db.Column(db.Integer)
+    success_count = db.Column(db.Integer)
+    response_count = db.Column(db.Integer)
+    response_time_sum = db.Column(db.Float)
+    latency_le_50 = db.Column(db.Integer)
+    latency_le_100 = db.Column(db.Integer)
+    latency_le_250 = db.Column(db.Integer)
+    latency_le_500 = db.Column(db.Integer)
+    latency_le_1000 = db.Column(db.Integer)
+    latency_le_2500 = db.Column(db.Integer)
+    latency_gt_2500 = db.Column(db.Integer)
+
+
+def _loop_statistics(model_type=None, days=30):
+    """Reference: the per-row loop get_model_statistics used to run."""
+    query = Result.query.filter(Result.created_at >= NOW - timedelta(days=days), Result.status == 'completed')
+    if model_type:
+        query = query.filter_by(model_type=model_type)
+    results = query.all()
+    stats = {'total_requests': len(results),
+             'avg_processing_time': sum(r.processing_time_ms or 0 for r in results) / len(results) if results else 0,
+             'model_types': {}, 'algorithms': {}, 'daily_requests': {}}
+    for r in results:
+        stats['model_types'][r.model_type] = stats['model_types'].get(r.model_type, 0) + 1
+        stats['algorithms'][r.algorithm] = stats['algorithms'].get(r.algorithm, 0) + 1
+        day = r.created_at.strftime('%Y-%m-%d')
+        stats['daily_requests'][day] = stats['daily_requests'].get(day, 0) + 1
+    return stats
+
+
+def _loop_activity_statistics(user_id=None, days=30):
+    """Reference: the per-row loop get_activity_statistics used to run."""
+    query = Activity.query.filter(Activity.created_at >= NOW - timedelta(days=days))
+    if user_id:
+        query = query.filter_by(user_id=user_id)
+    activities = query.all()
+    stats = {'total_activities': len(activities), 'activities_by_type': {}, 'activities_by_category': {},
+             'daily_activities': {}, 'device_breakdown': {}, 'platform_breakdown': {}}
+    success, times = 0, []
+    for a in activities:
+        stats['activities_by_type'][a.activity_type] = stats['activities_by_type'].get(a.activity_type, 0) + 1
+        stats['activities_by_category'][a.activity_category] = \
+            stats['activities_by_category'].get(a.activity_category, 0) + 1
+        day = a.created_at.strftime('%Y-%m-%d')
+        stats['daily_activities'][day] = stats['daily_activities'].get(day, 0) + 1
+        if a.device_type:
+            stats['device_breakdown'][a.device_type] = stats['device_breakdown'].get(a.device_type, 0) + 1
+        if a.platform:
+            stats['platform_breakdown'][a.platform] = stats['platform_breakdown'].get(a.platform, 0) + 1
+        success += a.status == 'success'
+        if a.response_time_ms:
+            times.append(a.response_time_ms)
+    stats['success_rate'] = success / len(activities) * 100 if activities else 0
+    stats['avg_response_time'] = sum(times) / len(times) if times else 0
+    return stats, times
+
+
+@pytest.fixture
+def usage_app():
+    """Flask app with 40 days of model results (every 7 hours, some failed)."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        start = NOW - timedelta(days=40)
+        db.session.add_all([
+            Result(model_type=('crop_recommendation', 'environment_recommendation')[i % 2],
+                   algorithm=('lightgbm', 'xgboost', 'random_forest')[i % 3],
+                   processing_time_ms=None if i % 5 == 0 else float(i % 17) * 10,
+                   status='failed' if i % 11 == 0 else 'completed',
+                   created_at=start + timedelta(hours=7 * i))
+            for i in range(40 * 24 // 7 + 1)
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def activity_app(usage_app):
+    """Adds 10 days of activity logs (every 13 minutes) to the usage app."""
+    start = NOW - timedelta(days=10)
+    db.session.add_all([
+        Activity(user_id=('u1', 'u2', 'u3')[i % 3],
+                 activity_type=('login', 'product_view', 'recommendation_request')[i % 3 - (i % 2)],
+                 activity_category=('authentication', 'product')[i % 2],
+                 status='error' if i % 9 == 0 else 'success',
+                 response_time_ms=None if i % 4 == 0 else float(i * 37 % 3000),
+                 device_type=(None, 'mobile', 'desktop')[i % 3],
+                 platform=('web', None, 'android', 'ios')[i % 4],
+                 created_at=start + timedelta(minutes=13 * i))
+        for i in range(10 * 24 * 60 // 13)
+    ])
+    db.session.commit()
+    return usage_app
+
+
+def _assert_same(stats, expected, approx=('avg_processing_time',)):
+    for key in approx:
+        assert stats.pop(key) == pytest.approx(expected.pop(key))
+    assert stats == expected
+
+
+class TestRollups:
+    """Statistics rollups test sınıfı."""
+
+    @pytest.mark.unit
+    def test_statistics_match_row_loop_with_and_without_rollup(self, usage_app):
+        """Test that results are identical before rolling up, after it, and with a stale watermark."""
+        for model_type, days in ((None, 30), ('crop_recommendation', 7), (None, 365)):
+            _assert_same(model_usage_statistics(db.session, model_type, days, now=NOW),
+                         _loop_statistics(model_type, days))
+
+        rollup_model_usage(db.session, now=NOW - timedelta(days=3))
+        db.session.add(Result(model_type='crop_recommendation', algorithm='xgboost', processing_time_ms=5,
+                              created_at=NOW - timedelta(hours=1)))
+        db.session.commit()
+
+        for model_type, days in ((None, 30), ('crop_recommendation', 7), (None, 1), (None, 365)):
+            _assert_same(model_usage_statistics(db.session, model_type, days, now=NOW),
+                         _loop_statistics(model_type, days))
+
+    @pytest.mark.unit
+    def test_rollup_is_incremental_and_picks_up_late_rows(self, usage_app):
+        """Test that re-running only rewrites the lookback window and includes late arrivals."""
+        first = rollup_model_usage(db.session, now=NOW)
+        assert get_watermark(db.session, MODEL_USAGE) == datetime(2024, 5, 20)
+        assert first['days_from'] is None
+
+        db.session.add(Result(model_type='crop_recommendation', algorithm='xgboost',
+                              created_at=datetime(2024, 5, 19, 23, 0)))
+        db.session.commit()
+        second = rollup_model_usage(db.session, now=NOW + timedelta(days=1))
+
+        assert second['days_from'] == '2024-05-19'
+        assert second['rows_written'] < first['rows_written']
+        _assert_same(model_usage_statistics(db.session, None, 30, now=NOW), _loop_statistics(None, 30))
+
+    @pytest.mark.unit
+    def test_rolled_up_days_are_not_scanned(self, usage_app):
+        """Test that raw scans after the rollup are limited to the partial first day and the tail."""
+        rollup_model_usage(db.session, now=NOW)
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, params, *args: statements.append((statement, params)))
+
+        model_usage_statistics(db.session, None, 30, now=NOW)
+
+        raw = [params for statement, params in statements if 'FROM model_results' in statement]
+        assert any(MODEL_USAGE_TABLE in statement for statement, _ in statements)
+        assert len(raw) == 2
+        for params in raw:
+            start, end = (datetime.fromisoformat(str(p)) for p in params[:2])
+            assert end - start <= timedelta(days=1)
+
+    @pytest.mark.unit
+    def test_activity_statistics_merge_hourly_rollup_with_live_tail(self, activity_app):
+        """Test that activity statistics and the latency histogram match the row loop around a rollup."""
+        rollup_activity_usage(db.session, now=NOW - timedelta(hours=5, minutes=20))
+        db.session.add(Activity(user_id='u1', activity_type='login', activity_category='authentication',
+                                response_time_ms=80, created_at=NOW - timedelta(minutes=3)))
+        db.session.commit()
+
+        for user_id, days in ((None, 30), ('u2', 7), (None, 1)):
+            stats = activity_statistics(db.session, user_id, days, now=NOW)
+            expected, times = _loop_activity_statistics(user_id, days)
+            histogram = stats.pop('response_time_histogram')
+            _assert_same(stats, expected, approx=('success_rate', 'avg_response_time'))
+            assert sum(histogram.values()) == len(times)
+            assert histogram['<=50'] == sum(1 for t in times if t <= 50)
+            assert histogram['>2500'] == sum(1 for t in times if t > 2500)
+
+    @pytest.mark.unit
+    def test_activity_rollup_only_rewrites_the_lookback_window(self, activity_app):
+        """Test that a re-run recomputes only the last hours and agrees with a full rebuild."""
+        rollup_activity_usage(db.session, now=NOW - timedelta(days=1))
+        second = rollup_activity_usage(db.session, now=NOW, lookback_hours=2)
+        assert second['hours_from'] == (NOW - timedelta(days=1, hours=2)).replace(minute=0).isoformat()
+        incremental = db.session.execute(text('SELECT * FROM activity_usage_hourly ORDER BY 1, 2, 3, 4, 5, 6')).all()
+
+        db.session.execute(text('DELETE FROM activity_usage_hourly'))
+        db.session.execute(text('DELETE FROM rollup_watermarks'))
+        rollup_activity_usage(db.session, now=NOW)
+        assert db.session.execute(text('SELECT * FROM activity_usage_hourly ORDER BY 1, 2, 3, 4, 5, 6')).all() \
+            == incremental
@@ -0,0 +1,17 @@
+"""
+Pytest configuration for backend utils unit tests
+
+Servis modülleri backend/ kökünden import edilir (services.*, utils.*); testler repo
+kökünden de çalışsın diye backend/ sys.path'in başına, tests.utils yardımcılarını
+(query_counter gibi) import edebilmek için de repo kökü sonuna eklenir.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..'))
+BACKEND_DIR = os.path.join(REPO_ROOT, 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
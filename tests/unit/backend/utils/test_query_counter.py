@@ -0,0 +1,99 @@
+"""
+Unit tests for query count assertions
+
+Bu test dosyası tests/utils/database/query_counter yardımcıları
+(assert_max_queries, assert_endpoint_queries) için birim testlerini içerir.
+"""
+
+import pytest
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from tests.utils.database.query_counter import assert_max_queries, assert_endpoint_queries
+
+db = SQLAlchemy()
+
+
+class Plot(db.Model):
+    __tablename__ = 'counted_plots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    readings = db.relationship('Reading', lazy='select')
+
+
+class Reading(db.Model):
+    __tablename__ = 'counted_readings'
+
+    id = db.Column(db.Integer, primary_key=True)
+    plot_id = db.Column(db.Integer, db.ForeignKey('counted_plots.id'), nullable=False)
+    ph = db.Column(db.Float)
+
+
+@pytest.fixture
+def plot_app():
+    """Flask app with five plots of two readings each and a route that lazy loads them."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    @app.route('/plots')
+    def list_plots():
+        return jsonify([[r.ph for r in plot.readings] for plot in Plot.query.all()])
+
+    with app.app_context():
+        db.create_all()
+        for i in range(5):
+            db.session.add(Plot(id=i, readings=[Reading(ph=6.0), Reading(ph=7.0)]))
+        db.session.commit()
+        db.session.expunge_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestQueryCounter:
+    """Query counter test sınıfı."""
+
+    @pytest.mark.unit
+    def test_within_budget_yields_stats(self, plot_app):
+        """Test that a block within max_queries passes and exposes its QueryStats."""
+        with assert_max_queries(db.engine, 1) as stats:
+            Plot.query.all()
+
+        assert stats.count == 1
+
+    @pytest.mark.unit
+    def test_over_budget_lists_statement_shapes(self, plot_app):
+        """Test that exceeding max_queries fails with the most frequent shapes listed."""
+        with pytest.raises(AssertionError) as error:
+            with assert_max_queries(db.engine, 3):
+                for plot in Plot.query.all():
+                    plot.readings
+
+        message = str(error.value)
+        assert 'Expected at most 3 queries, 6 ran' in message
+        assert '5x SELECT' in message and 'counted_readings' in message
+
+    @pytest.mark.unit
+    def test_repeated_shape_flagged_as_n_plus_one(self, plot_app):
+        """Test that n_plus_one_threshold catches a lazy load per row even under max_queries."""
+        with pytest.raises(AssertionError, match='Likely N\\+1'):
+            with assert_max_queries(db.engine, 10, n_plus_one_threshold=2):
+                for plot in Plot.query.all():
+                    plot.readings
+
+        with assert_max_queries(db.engine, 2, n_plus_one_threshold=1):
+            plots = Plot.query.options(db.selectinload(Plot.readings)).all()
+            assert sum(len(plot.readings) for plot in plots) == 10
+
+    @pytest.mark.unit
+    def test_endpoint_queries(self, plot_app):
+        """Test that assert_endpoint_queries returns the response and fails on an N+1 endpoint."""
+        client = plot_app.test_client()
+
+        with pytest.raises(AssertionError, match='Likely N\\+1'):
+            assert_endpoint_queries(client, db.engine, 'GET', '/plots', 10, n_plus_one_threshold=2)
+
+        db.session.remove()
+        response = assert_endpoint_queries(client, db.engine, 'GET', '/plots', 6)
+        assert response.status_code == 200
+        assert response.get_json() == [[6.0, 7.0]] * 5
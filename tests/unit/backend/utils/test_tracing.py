@@ -0,0 +1,148 @@
+"""
+Unit tests for request tracing
+
+Bu test dosyası request tracing yardımcıları için birim testlerini içerir.
+"""
+
+import json
+import pytest
+from sqlalchemy import create_engine, text
+from utils import tracing
+from utils.tracing import (
+    span, start_trace, finish_trace, get_request_id, server_timing_header, instrument_sqlalchemy,
+    statement_shape, query_stats_header, query_stats_warnings, count_queries
+)
+
+
+class TestTracing:
+    """Tracing test sınıfı."""
+
+    @pytest.fixture(autouse=True)
+    def trace_file(self, tmp_path, monkeypatch):
+        """Redirect exported spans to a temporary file."""
+        path = tmp_path / 'traces.jsonl'
+        monkeypatch.setattr(tracing.tracer, 'trace_file', str(path))
+        monkeypatch.setattr(tracing.tracer, '_exporter', None)
+        yield path
+        finish_trace()
+
+    @pytest.mark.unit
+    def test_nested_spans_are_recorded(self):
+        """Test that nested spans get parent ids and durations."""
+        trace = start_trace('req-1', sampled=True)
+
+        with span('ml.predict_crop', model='lightgbm'):
+            with span('lightgbm.predict'):
+                pass
+
+        assert get_request_id() == 'req-1'
+        finish_trace()
+
+        by_name = {s.name: s for s in trace.spans}
+        assert by_name['lightgbm.predict'].parent_id == by_name['ml.predict_crop'].span_id
+        assert by_name['ml.predict_crop'].parent_id == by_name['request'].span_id
+        assert by_name['ml.predict_crop'].attributes == {'model': 'lightgbm'}
+        assert all(s.duration_ms is not None for s in trace.spans)
+        assert get_request_id() is None
+
+    @pytest.mark.unit
+    def test_unsampled_trace_records_nothing(self, trace_file):
+        """Test that unsampled requests keep a request id but record no spans."""
+        trace = start_trace(sampled=False)
+
+        with span('db.query') as current:
+            assert current is None
+
+        assert get_request_id() == trace.request_id
+        finish_trace()
+
+        assert trace.spans == []
+        assert not trace_file.exists()
+
+    @pytest.mark.unit
+    def test_spans_exported_as_jsonl(self, trace_file):
+        """Test that sampled traces are written one span per line."""
+        start_trace('req-2', sampled=True)
+        with span('pdf.render'):
+            pass
+        finish_trace()
+
+        lines = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert {line['name'] for line in lines} == {'request', 'pdf.render'}
+        assert all(line['request_id'] == 'req-2' for line in lines)
+
+    @pytest.mark.unit
+    def test_span_error_is_captured(self):
+        """Test that exceptions are attached to the failing span."""
+        trace = start_trace(sampled=True)
+
+        with pytest.raises(ValueError):
+            with span('llm.generate_content'):
+                raise ValueError('quota exceeded')
+
+        finish_trace()
+        failed = [s for s in trace.spans if s.name == 'llm.generate_content'][0]
+        assert failed.error == 'quota exceeded'
+
+    @pytest.mark.unit
+    def test_server_timing_header(self):
+        """Test Server-Timing aggregation by span name."""
+        trace = start_trace(sampled=True)
+        for _ in range(3):
+            with span('db.query'):
+                pass
+        finish_trace()
+
+        header = server_timing_header(trace)
+        assert 'db.query;dur=' in header
+        assert 'desc="x3"' in header
+        assert 'total;dur=' in header
+        assert server_timing_header(None) is None
+
+    @pytest.mark.unit
+    def test_statement_shape(self):
+        """Test that bind parameters and parameter lists of any paramstyle share one shape."""
+        assert statement_shape('SELECT * FROM t\n WHERE id IN (?, ?, ?) AND a = ?') == \
+            statement_shape('SELECT * FROM t WHERE id IN (%(id_1)s) AND a = :a') == \
+            'SELECT * FROM t WHERE id IN (?) AND a = ?'
+        assert statement_shape('INSERT INTO t (a, b) VALUES (?, ?), (?, ?)') == 'INSERT INTO t (a, b) VALUES (?)'
+
+    @pytest.mark.unit
+    def test_request_queries_counted_and_n_plus_one_flagged(self, monkeypatch):
+        """Test that unsampled requests still count statements and flag a shape repeated in a loop."""
+        monkeypatch.setattr(tracing.tracer, 'n_plus_one_threshold', 10)
+        monkeypatch.setattr(tracing.tracer, 'slow_query_ms', 0.0)
+        engine = create_engine('sqlite://')
+        instrument_sqlalchemy(engine)
+        trace = start_trace(sampled=False)
+
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+            for product_id in range(12):
+                conn.execute(text('SELECT :id AS product_id'), {'id': product_id})
+        finish_trace()
+
+        assert trace.spans == []
+        assert trace.queries.count == 13
+        assert trace.queries.repeated(10) == [('SELECT ? AS product_id', 12)]
+        assert len(trace.queries.slowest()) == 5
+        assert 'n_plus_one=1;max_repeat=12' in query_stats_header(trace)
+        warnings = query_stats_warnings(trace)
+        assert warnings[0] == 'Likely N+1: 12x SELECT ? AS product_id'
+        assert sum(w.startswith('Slow query') for w in warnings) == 5
+
+    @pytest.mark.unit
+    def test_count_queries_block(self):
+        """Test that count_queries only sees statements run inside the block."""
+        engine = create_engine('sqlite://')
+
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+            with count_queries(engine) as stats:
+                conn.execute(text('SELECT 2'))
+                conn.execute(text('SELECT 2'))
+            conn.execute(text('SELECT 3'))
+
+        assert stats.count == 2
+        assert stats.shapes == {'SELECT 2': 2}
+        assert stats.total_ms >= 0
@@ -0,0 +1,44 @@
+"""
+Query Count Assertions
+
+Bu modül endpoint ve fonksiyon başına SQL sorgu sayısını sınırlayan
+yardımcı fonksiyonları içerir. Döngü içinde lazy load edilen ilişkiler
+(product.requirements, environment_data gibi) N+1 olarak yakalanır.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Optional
+from utils.tracing import QueryStats, count_queries
+
+
+def _describe(stats: QueryStats) -> str:
+    """Sorgu şekillerini en sık çalışandan başlayarak listeler."""
+    lines = [f"  {count}x {shape[:200]}" for shape, count in
+             sorted(stats.shapes.items(), key=lambda item: item[1], reverse=True)]
+    return '\n'.join(lines)
+
+
+@contextmanager
+def assert_max_queries(engine, max_queries: int, n_plus_one_threshold: Optional[int] = None):
+    """
+    Blok içinde engine üzerinde çalışan sorgu sayısının max_queries'i aşmadığını doğrular.
+
+    n_plus_one_threshold verilirse aynı sorgu şeklinin bundan fazla çalışması da hata sayılır.
+    """
+    with count_queries(engine) as stats:
+        yield stats
+
+    assert stats.count <= max_queries, \
+        f"Expected at most {max_queries} queries, {stats.count} ran:\n{_describe(stats)}"
+    if n_plus_one_threshold is not None:
+        repeated = stats.repeated(n_plus_one_threshold)
+        assert not repeated, \
+            f"Likely N+1, statements repeated more than {n_plus_one_threshold} times:\n{_describe(stats)}"
+
+
+def assert_endpoint_queries(client, engine, method: str, path: str, max_queries: int,
+                            n_plus_one_threshold: Optional[int] = None, **request_kwargs: Any) -> Any:
+    """Bir endpoint çağrısının sorgu sayısını doğrular ve response'u döndürür."""
+    with assert_max_queries(engine, max_queries, n_plus_one_threshold):
+        response = client.open(path, method=method, **request_kwargs)
+    return response
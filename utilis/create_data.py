@@ -1,96 +1,225 @@
-import pandas as pd
-import numpy as np
-
-# Veri seti parametreleri
-n_samples = 100000
-crops = ['rice', 'cotton', 'wheat', 'barley', 'sunflower', 'corn', 'oat']
-n_per_crop = n_samples // len(crops)
-
-regions = ['Mediterranean', 'Southeastern Anatolia', 'Marmara', 'Black Sea', 'Eastern Anatolia', 'Aegean', 'Central Anatolia']
-soil_types = ['Sandy', 'Loamy', 'Clay', 'Silty']
-fertilizer_types = ['Urea', 'Ammonium Sulphate', 'Potassium Nitrate']
-irrigation_methods = ['Drip Irrigation', 'Sprinkler Irrigation', 'Flood Irrigation', 'Rain-fed']
-weather_conditions = ['cloudy', 'sunny', 'rainy', 'windy']
-
-# Her bir ekin için optimum koşullar (merkez değerler)
-optimums = {
-    'rice': {
-        'region': ('Marmara', 'Black Sea', 'Mediterranean'), 'soil_type': ('Clay', 'Loamy', 'Silty'), 'soil_ph': 6.7, 'nitrogen': 90, 'phosphorus': 50, 'potassium': 40, 'moisture': 85, 'temperature_celsius': 22, 'rainfall_mm': 1600,
-        'fertilizer_type': ('Urea', 'Ammonium Sulphate', 'Potassium Nitrate'), 'irrigation_method': ('Flood Irrigation', 'Sprinkler Irrigation', 'Drip Irrigation'), 'weather_condition': ('rainy', 'cloudy', 'sunny')
-    },
-    'cotton': {
-        'region': ('Southeastern Anatolia', 'Aegean', 'Mediterranean'), 'soil_type': ('Sandy', 'Loamy', 'Clay'), 'soil_ph': 7.2, 'nitrogen': 120, 'phosphorus': 60, 'potassium': 50, 'moisture': 65, 'temperature_celsius': 30, 'rainfall_mm': 750,
-        'fertilizer_type': ('Potassium Nitrate', 'Urea', 'Ammonium Sulphate'), 'irrigation_method': ('Drip Irrigation', 'Sprinkler Irrigation', 'Flood Irrigation'), 'weather_condition': ('sunny', 'cloudy', 'windy')
-    },
-    'wheat': {
-        'region': ('Central Anatolia', 'Marmara', 'Southeastern Anatolia'), 'soil_type': ('Silty', 'Loamy', 'Clay'), 'soil_ph': 6.5, 'nitrogen': 70, 'phosphorus': 40, 'potassium': 60, 'moisture': 60, 'temperature_celsius': 20, 'rainfall_mm': 550,
-        'fertilizer_type': ('Ammonium Sulphate', 'Urea', 'Potassium Nitrate'), 'irrigation_method': ('Sprinkler Irrigation', 'Rain-fed', 'Drip Irrigation'), 'weather_condition': ('windy', 'cloudy', 'sunny')
-    },
-    'barley': {
-        'region': ('Central Anatolia', 'Eastern Anatolia', 'Southeastern Anatolia'), 'soil_type': ('Loamy', 'Silty', 'Sandy'), 'soil_ph': 7.7, 'nitrogen': 60, 'phosphorus': 35, 'potassium': 52, 'moisture': 55, 'temperature_celsius': 19, 'rainfall_mm': 450,
-        'fertilizer_type': ('Potassium Nitrate', 'Ammonium Sulphate', 'Urea'), 'irrigation_method': ('Rain-fed', 'Sprinkler Irrigation', 'Drip Irrigation'), 'weather_condition': ('sunny', 'windy', 'cloudy')
-    },
-    'sunflower': {
-        'region': ('Marmara', 'Central Anatolia', 'Aegean'), 'soil_type': ('Sandy', 'Loamy', 'Silty'), 'soil_ph': 6.2, 'nitrogen': 90, 'phosphorus': 45, 'potassium': 70, 'moisture': 70, 'temperature_celsius': 24, 'rainfall_mm': 650,
-        'fertilizer_type': ('Urea', 'Ammonium Sulphate', 'Potassium Nitrate'), 'irrigation_method': ('Drip Irrigation', 'Sprinkler Irrigation', 'Rain-fed'), 'weather_condition': ('sunny', 'cloudy', 'windy')
-    },
-    'corn': {
-        'region': ('Marmara', 'Mediterranean', 'Aegean'), 'soil_type': ('Loamy', 'Silty', 'Clay'), 'soil_ph': 6.9, 'nitrogen': 120, 'phosphorus': 50, 'potassium': 62, 'moisture': 75, 'temperature_celsius': 25.5, 'rainfall_mm': 1000,
-        'fertilizer_type': ('Urea', 'Potassium Nitrate', 'Ammonium Sulphate'), 'irrigation_method': ('Drip Irrigation', 'Sprinkler Irrigation', 'Flood Irrigation'), 'weather_condition': ('cloudy', 'sunny', 'rainy')
-    },
-    'oat': {
-        'region': ('Eastern Anatolia', 'Central Anatolia', 'Marmara'), 'soil_type': ('Silty', 'Loamy', 'Sandy'), 'soil_ph': 6.2, 'nitrogen': 60, 'phosphorus': 35, 'potassium': 45, 'moisture': 65, 'temperature_celsius': 18, 'rainfall_mm': 600,
-        'fertilizer_type': ('Ammonium Sulphate', 'Urea', 'Potassium Nitrate'), 'irrigation_method': ('Rain-fed', 'Sprinkler Irrigation', 'Drip Irrigation'), 'weather_condition': ('windy', 'cloudy', 'rainy')
-    }
-}
-
-all_data = []
-VARIANCE_PERCENT = 0.50  # Değişiklik: Varyans %10'a çıkarıldı
-
-for crop in crops:
-    crop_optimums = optimums[crop]
-    data = {}
-
-    # Sayısal değişkenleri üret
-    for key in ['soil_ph', 'nitrogen', 'phosphorus', 'potassium', 'moisture', 'temperature_celsius', 'rainfall_mm']:
-        center = crop_optimums[key]
-        low = center * (1 - VARIANCE_PERCENT)
-        high = center * (1 + VARIANCE_PERCENT)
-        data[key] = np.random.uniform(low, high, size=n_per_crop)
-
-    # Kategorik değişkenleri üret
-    for key in ['region', 'soil_type', 'fertilizer_type', 'irrigation_method', 'weather_condition']:
-        choices = crop_optimums[key]
-        probabilities = [0.6, 0.25, 0.15]
-        if len(choices) < 3:
-             probabilities = [1.0] if len(choices) == 1 else [0.7, 0.3]
-        data[key] = np.random.choice(choices, size=n_per_crop, p=probabilities)
-
-    data['crop'] = crop
-    all_data.append(pd.DataFrame(data))
-
-# Veriyi birleştir ve karıştır
-df = pd.concat(all_data).sample(frac=1).reset_index(drop=True)
-
-# Değişiklik: Aykırı değer oranı %5'e çıkarıldı
-outlier_indices = df.sample(frac=0.07).index
-numeric_cols = df.select_dtypes(include=np.number).columns
-
-for idx in outlier_indices:
-    col_to_change = np.random.choice(numeric_cols)
-    direction = np.random.choice([-1, 1])
-    # Değişiklik: Sapma %20 ile %50 arasında olacak şekilde ayarlandı
-    deviation = np.random.uniform(0.30, 0.60)
-    factor = 1 + deviation * direction
-    df.loc[idx, col_to_change] *= factor
-
-
-# Veri setini yeni bir isimle CSV dosyasına kaydet
-df.to_csv('crop_dataset_v_100bin.csv', index=False)
-
-print("'crop_dataset_v2.csv' dosyası başarıyla oluşturuldu ve 50000 satır veri içeriyor.")
-print("Değişiklikler:")
-print("- Sayısal değerler optimumun +/- %10 aralığında oluşturuldu.")
-print("- Verinin %5'ine aykırı değer eklendi.")
-print("- Aykırı değer sapması %20 ile %50 arasına yükseltildi.")
-print("\nSol taraftaki dosya menüsünden dosyayı bulup indirebilirsiniz.")
\ No newline at end of file
+"""
+Sentetik crop veri seti üreticisi
+
+Her parça (chunk) tüm ürünler için vektörel olarak üretilir, aykırı değerler tek adımda
+eklenir ve çıktı CSV/Parquet dosyasına parça parça yazılır; böylece yüz milyonlarca satır
+sabit bellekle üretilebilir. Aynı seed ve chunk-size ile üretim, worker sayısından
+bağımsız olarak aynıdır.
+
+Kullanım:
+    python create_data.py --rows 100000000 --seed 42 --output crop_dataset.parquet
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+import numpy as np
+
+# Veri seti parametreleri
+n_samples = 100000
+crops = ['rice', 'cotton', 'wheat', 'barley', 'sunflower', 'corn', 'oat']
+
+regions = ['Mediterranean', 'Southeastern Anatolia', 'Marmara', 'Black Sea', 'Eastern Anatolia', 'Aegean', 'Central Anatolia']
+soil_types = ['Sandy', 'Loamy', 'Clay', 'Silty']
+fertilizer_types = ['Urea', 'Ammonium Sulphate', 'Potassium Nitrate']
+irrigation_methods = ['Drip Irrigation', 'Sprinkler Irrigation', 'Flood Irrigation', 'Rain-fed']
+weather_conditions = ['cloudy', 'sunny', 'rainy', 'windy']
+
+# Her bir ekin için optimum koşullar (merkez değerler)
+optimums = {
+    'rice': {
+        'region': ('Marmara', 'Black Sea', 'Mediterranean'), 'soil_type': ('Clay', 'Loamy', 'Silty'), 'soil_ph': 6.7, 'nitrogen': 90, 'phosphorus': 50, 'potassium': 40, 'moisture': 85, 'temperature_celsius': 22, 'rainfall_mm': 1600,
+        'fertilizer_type': ('Urea', 'Ammonium Sulphate', 'Potassium Nitrate'), 'irrigation_method': ('Flood Irrigation', 'Sprinkler Irrigation', 'Drip Irrigation'), 'weather_condition': ('rainy', 'cloudy', 'sunny')
+    },
+    'cotton': {
+        'region': ('Southeastern Anatolia', 'Aegean', 'Mediterranean'), 'soil_type': ('Sandy', 'Loamy', 'Clay'), 'soil_ph': 7.2, 'nitrogen': 120, 'phosphorus': 60, 'potassium': 50, 'moisture': 65, 'temperature_celsius': 30, 'rainfall_mm': 750,
+        'fertilizer_type': ('Potassium Nitrate', 'Urea', 'Ammonium Sulphate'), 'irrigation_method': ('Drip Irrigation', 'Sprinkler Irrigation', 'Flood Irrigation'), 'weather_condition': ('sunny', 'cloudy', 'windy')
+    },
+    'wheat': {
+        'region': ('Central Anatolia', 'Marmara', 'Southeastern Anatolia'), 'soil_type': ('Silty', 'Loamy', 'Clay'), 'soil_ph': 6.5, 'nitrogen': 70, 'phosphorus': 40, 'potassium': 60, 'moisture': 60, 'temperature_celsius': 20, 'rainfall_mm': 550,
+        'fertilizer_type': ('Ammonium Sulphate', 'Urea', 'Potassium Nitrate'), 'irrigation_method': ('Sprinkler Irrigation', 'Rain-fed', 'Drip Irrigation'), 'weather_condition': ('windy', 'cloudy', 'sunny')
+    },
+    'barley': {
+        'region': ('Central Anatolia', 'Eastern Anatolia', 'Southeastern Anatolia'), 'soil_type': ('Loamy', 'Silty', 'Sandy'), 'soil_ph': 7.7, 'nitrogen': 60, 'phosphorus': 35, 'potassium': 52, 'moisture': 55, 'temperature_celsius': 19, 'rainfall_mm': 450,
+        'fertilizer_type': ('Potassium Nitrate', 'Ammonium Sulphate', 'Urea'), 'irrigation_method': ('Rain-fed', 'Sprinkler Irrigation', 'Drip Irrigation'), 'weather_condition': ('sunny', 'windy', 'cloudy')
+    },
+    'sunflower': {
+        'region': ('Marmara', 'Central Anatolia', 'Aegean'), 'soil_type': ('Sandy', 'Loamy', 'Silty'), 'soil_ph': 6.2, 'nitrogen': 90, 'phosphorus': 45, 'potassium': 70, 'moisture': 70, 'temperature_celsius': 24, 'rainfall_mm': 650,
+        'fertilizer_type': ('Urea', 'Ammonium Sulphate', 'Potassium Nitrate'), 'irrigation_method': ('Drip Irrigation', 'Sprinkler Irrigation', 'Rain-fed'), 'weather_condition': ('sunny', 'cloudy', 'windy')
+    },
+    'corn': {
+        'region': ('Marmara', 'Mediterranean', 'Aegean'), 'soil_type': ('Loamy', 'Silty', 'Clay'), 'soil_ph': 6.9, 'nitrogen': 120, 'phosphorus': 50, 'potassium': 62, 'moisture': 75, 'temperature_celsius': 25.5, 'rainfall_mm': 1000,
+        'fertilizer_type': ('Urea', 'Potassium Nitrate', 'Ammonium Sulphate'), 'irrigation_method': ('Drip Irrigation', 'Sprinkler Irrigation', 'Flood Irrigation'), 'weather_condition': ('cloudy', 'sunny', 'rainy')
+    },
+    'oat': {
+        'region': ('Eastern Anatolia', 'Central Anatolia', 'Marmara'), 'soil_type': ('Silty', 'Loamy', 'Sandy'), 'soil_ph': 6.2, 'nitrogen': 60, 'phosphorus': 35, 'potassium': 45, 'moisture': 65, 'temperature_celsius': 18, 'rainfall_mm': 600,
+        'fertilizer_type': ('Ammonium Sulphate', 'Urea', 'Potassium Nitrate'), 'irrigation_method': ('Rain-fed', 'Sprinkler Irrigation', 'Drip Irrigation'), 'weather_condition': ('windy', 'cloudy', 'rainy')
+    }
+}
+
+VARIANCE_PERCENT = 0.50  # Değişiklik: Varyans %10'a çıkarıldı
+OUTLIER_FRACTION = 0.07  # Verinin %7'sine aykırı değer eklenir
+
+NUMERIC_COLUMNS = ['soil_ph', 'nitrogen', 'phosphorus', 'potassium', 'moisture', 'temperature_celsius', 'rainfall_mm']
+CATEGORICAL_COLUMNS = ['region', 'soil_type', 'fertilizer_type', 'irrigation_method', 'weather_condition']
+CATEGORY_PROBABILITIES = [0.6, 0.25, 0.15]
+
+
+def generate_crop_rows(crop, n_rows, rng):
+    """Tek bir ürün için n_rows satırı vektörel olarak üretir"""
+    crop_optimums = optimums[crop]
+    data = {}
+
+    # Sayısal değişkenleri üret
+    for key in NUMERIC_COLUMNS:
+        center = crop_optimums[key]
+        data[key] = rng.uniform(center * (1 - VARIANCE_PERCENT), center * (1 + VARIANCE_PERCENT), size=n_rows)
+
+    # Kategorik değişkenleri üret
+    for key in CATEGORICAL_COLUMNS:
+        choices = crop_optimums[key]
+        probabilities = CATEGORY_PROBABILITIES
+        if len(choices) < 3:
+            probabilities = [1.0] if len(choices) == 1 else [0.7, 0.3]
+        data[key] = rng.choice(choices, size=n_rows, p=probabilities)
+
+    data['crop'] = crop
+    return pd.DataFrame(data)
+
+
+def inject_outliers(df, rng, fraction=OUTLIER_FRACTION):
+    """Satırların `fraction` kadarında rastgele bir sayısal kolonu %30-%60 saptırır (döngüsüz)"""
+    n_outliers = int(round(len(df) * fraction))
+    if n_outliers == 0:
+        return df
+
+    rows = rng.choice(len(df), size=n_outliers, replace=False)
+    cols = rng.integers(0, len(NUMERIC_COLUMNS), size=n_outliers)
+    direction = rng.choice([-1, 1], size=n_outliers)
+    deviation = rng.uniform(0.30, 0.60, size=n_outliers)
+
+    values = df[NUMERIC_COLUMNS].to_numpy()
+    values[rows, cols] *= 1 + deviation * direction
+    df[NUMERIC_COLUMNS] = values
+    return df
+
+
+def _generate_chunk(task):
+    """Bir parçayı üretir: her ürün için ayrı tohumlu RNG, ardından karıştırma ve aykırı değerler
+
+    CSV çıktısında parça worker içinde metne çevrilir; yazıcı yalnızca metni dosyaya ekler.
+    """
+    seed, chunk_index, rows_per_crop, outlier_fraction, as_csv = task
+    frames = [
+        generate_crop_rows(crop, rows_per_crop, np.random.default_rng([seed, chunk_index, crop_index]))
+        for crop_index, crop in enumerate(crops)
+    ]
+    rng = np.random.default_rng([seed, chunk_index, len(crops)])
+    df = pd.concat(frames, ignore_index=True)
+    df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+    df = inject_outliers(df, rng, outlier_fraction)
+    if as_csv:
+        return len(df), df.to_csv(header=chunk_index == 0, index=False)
+    return len(df), df
+
+
+class _ChunkWriter:
+    """CSV metnini dosyaya ekler ya da parçaları Parquet row group olarak yazar"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._writer = None
+        self._file = None
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Parquet çıktısı için pyarrow gerekli (pip install pyarrow) ya da .csv kullanın")
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._file.write(chunk)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def _iter_chunks(tasks, workers):
+    """Parçaları sırayla döndürür; paralelde bellekte en fazla 2 * workers parça bekler"""
+    if workers == 1:
+        yield from map(_generate_chunk, tasks)
+        return
+
+    task_iter = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(_generate_chunk, t) for t in islice(task_iter, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            next_task = next(task_iter, None)
+            if next_task is not None:
+                pending.append(executor.submit(_generate_chunk, next_task))
+            yield result
+
+
+def generate_dataset(output_path='crop_dataset_v_100bin.csv', total_rows=n_samples, seed=None,
+                     chunk_size=1_000_000, workers=None, outlier_fraction=OUTLIER_FRACTION):
+    """
+    Veri setini parça parça üretip dosyaya yazar
+
+    total_rows ürünlere eşit bölünür (ürün başına total_rows // len(crops) satır).
+    seed=None ise her çalıştırmada farklı bir veri seti üretilir.
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+    per_crop_total = total_rows // len(crops)
+    per_crop_chunk = max(1, chunk_size // len(crops))
+    chunk_sizes = [per_crop_chunk] * (per_crop_total // per_crop_chunk)
+    if per_crop_total % per_crop_chunk:
+        chunk_sizes.append(per_crop_total % per_crop_chunk)
+    writer = _ChunkWriter(output_path)
+    tasks = [(seed, i, n, outlier_fraction, not writer.parquet) for i, n in enumerate(chunk_sizes)]
+
+    start = time.perf_counter()
+    written = 0
+    try:
+        for n_rows, chunk in _iter_chunks(tasks, workers or os.cpu_count() or 1):
+            writer.write(chunk)
+            written += n_rows
+            print(f"[INFO] {written:,} satır yazıldı ({time.perf_counter() - start:.1f} sn)", end='\r')
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n'{output_path}' dosyası başarıyla oluşturuldu: {written:,} satır, seed={seed}, "
+          f"{elapsed:.1f} sn ({written / max(elapsed, 1e-9):,.0f} satır/sn)")
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sentetik crop veri seti üret')
+    parser.add_argument('--rows', type=int, default=n_samples, help='Toplam satır sayısı')
+    parser.add_argument('--seed', type=int, default=None, help='Tekrarlanabilir üretim için tohum')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help='Parça başına satır sayısı')
+    parser.add_argument('--workers', type=int, default=None, help='Paralel süreç sayısı (varsayılan: CPU sayısı)')
+    parser.add_argument('--outlier-fraction', type=float, default=OUTLIER_FRACTION)
+    parser.add_argument('--output', default='crop_dataset_v_100bin.csv', help='.csv ya da .parquet')
+    args = parser.parse_args()
+
+    generate_dataset(args.output, args.rows, args.seed, args.chunk_size, args.workers, args.outlier_fraction)